@@ -0,0 +1,362 @@
+# Congress AI: Monte Carlo Tree Search with UCT selection.
+# Congress is won by connecting all of one's pawns, which random playouts estimate well.
+# The search is root-parallel: every worker process grows its own tree from the
+# same position with its own seed for the same time budget, then the visit
+# counts of the root moves are summed and the most visited move is played.
+# With an opening book (Engine.opening_book) a book move is played without searching.
+# With tuned evaluation weights (Engine.batch_eval, Tools.tune) a playout that reaches
+# PLAYOUT_LIMIT goes to the side the evaluation favors instead of counting as a draw.
+import math
+import multiprocessing
+import os
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor, wait
+
+from Engine.bitboard import get_tables, iter_bits, BLUE, GREEN, YELLOW, RED, DIAGONALS, LINES
+from Engine.batch_eval import load_weights
+from Engine.movegen import CONGRESS
+from Engine.opening_book import pack_move
+
+EXPLORATION = 1.4
+PLAYOUT_LIMIT = 120  # plies before a playout is scored as a draw
+GREEDY_PLAYOUT = 0.8  # chance of preferring a move next to a friendly pawn in playouts
+STOP_POLL = 0.02  # seconds between checks of the caller's stop event while the workers search
+
+
+class CongressBoard:
+    # Compact Congress position: owner bit sets over static tile colors
+
+    def __init__(self, board, player):
+        self.rows = len(board)
+        self.cols = len(board[0])
+        self.tables = get_tables(self.rows, self.cols)
+
+        self.tiles = [value // 10 for row in board for value in row]
+        self.masks = [0, 0, 0]
+        self.playable = 0
+        self.yellow = 0
+        self.red = 0
+        for sq, value in enumerate(value for row in board for value in row):
+            bit = 1 << sq
+            if value != 0:
+                self.playable |= bit
+            if value // 10 == YELLOW:
+                self.yellow |= bit
+            elif value // 10 == RED:
+                self.red |= bit
+            if value % 10:
+                self.masks[value % 10] |= bit
+
+        # Masks that stop horizontal shifts from wrapping around the board edges
+        self.not_first_col = 0
+        self.not_last_col = 0
+        for sq in range(self.rows * self.cols):
+            if sq % self.cols != 0:
+                self.not_first_col |= 1 << sq
+            if sq % self.cols != self.cols - 1:
+                self.not_last_col |= 1 << sq
+
+        self.player = player
+
+    def copy(self):
+        other = CongressBoard.__new__(CongressBoard)
+        other.__dict__.update(self.__dict__)
+        other.masks = self.masks[:]
+        return other
+
+    def destinations(self, sq):
+        tile = self.tiles[sq]
+        occupied = self.masks[1] | self.masks[2]
+        if tile == BLUE:
+            mask = self.tables.king[sq]
+        elif tile == GREEN:
+            mask = self.tables.knight[sq]
+        elif tile == YELLOW:
+            mask = self.tables.slide(sq, DIAGONALS, occupied | self.yellow)
+        elif tile == RED:
+            mask = self.tables.slide(sq, LINES, occupied | self.red)
+        else:
+            return 0
+        return mask & self.playable & ~occupied  # no captures in Congress
+
+    def generate_moves(self):
+        moves = []
+        for sq in iter_bits(self.masks[self.player]):
+            base = sq << 8
+            for to in iter_bits(self.destinations(sq)):
+                moves.append(base | to)
+        return moves
+
+    def make(self, move):
+        self.masks[self.player] ^= (1 << (move >> 8)) | (1 << (move & 0xFF))
+        self.player = 3 - self.player
+
+    def neighbours(self, mask):
+        # Orthogonal neighbours of every square in mask
+        cols = self.cols
+        return ((mask << cols) | (mask >> cols) | ((mask << 1) & self.not_first_col)
+                | ((mask >> 1) & self.not_last_col)) & self.playable
+
+    def is_connected(self, player):
+        # Orthogonal flood fill on the bit set, one ring of neighbours per step
+        pawns = self.masks[player]
+        if not pawns:
+            return False
+        region = pawns & -pawns
+        while True:
+            grown = (region | self.neighbours(region)) & pawns
+            if grown == region:
+                return region == pawns
+            region = grown
+
+    def groups(self, player):
+        # Orthogonally connected groups of player's pawns
+        pawns = self.masks[player]
+        count = 0
+        while pawns:
+            region = pawns & -pawns
+            while True:
+                grown = (region | self.neighbours(region)) & pawns
+                if grown == region:
+                    break
+                region = grown
+            pawns &= ~region
+            count += 1
+        return count
+
+    def evaluate(self, weights):
+        # Engine.batch_eval score for the side to move: mobility per tile color, groups
+        player = self.player
+        score = 0.0
+        for side, sign in ((player, 1), (3 - player, -1)):
+            for sq in iter_bits(self.masks[side]):
+                tile = self.tiles[sq]
+                if BLUE <= tile <= RED:
+                    score += sign * weights[tile - 1] * bin(self.destinations(sq)).count("1")
+            score += sign * weights[4] * self.groups(side)
+        return score
+
+    def winner(self):
+        # Only the side that just moved can have connected its pawns
+        mover = 3 - self.player
+        return mover if self.is_connected(mover) else 0
+
+    def to_coords(self, move):
+        return divmod(move >> 8, self.cols), divmod(move & 0xFF, self.cols)
+
+
+class Node:
+    __slots__ = ("move", "parent", "mover", "children", "untried", "wins", "visits")
+
+    def __init__(self, move, parent, mover, moves):
+        self.move = move
+        self.parent = parent
+        self.mover = mover   # player who played move
+        self.children = []
+        self.untried = moves
+        self.wins = 0.0
+        self.visits = 0
+
+    def select_child(self):
+        log_visits = math.log(self.visits)
+        return max(self.children,
+                   key=lambda child: child.wins / child.visits + EXPLORATION * math.sqrt(log_visits / child.visits))
+
+
+def playout(board, rng, weights=None):
+    # Light random game to the end; returns the winner, or at PLAYOUT_LIMIT the side
+    # weights favor (0 without weights or when even).
+    # Pawns are tried in random order and, most of the time, a destination touching
+    # another friendly pawn is preferred, which keeps playouts short and meaningful.
+    for _ in range(PLAYOUT_LIMIT):
+        player = board.player
+        own = board.masks[player]
+        pawns = list(iter_bits(own))
+        rng.shuffle(pawns)
+
+        move = None
+        for sq in pawns:
+            targets = board.destinations(sq)
+            if not targets:
+                continue
+            if rng.random() < GREEDY_PLAYOUT:
+                touching = targets & board.neighbours(own & ~(1 << sq))
+                if touching:
+                    targets = touching
+            choices = list(iter_bits(targets))
+            move = (sq << 8) | rng.choice(choices)
+            break
+
+        if move is None:
+            return 3 - player
+        board.make(move)
+        if board.winner():
+            return player
+    if weights is not None:
+        score = board.evaluate(weights)
+        if score:
+            return board.player if score > 0 else 3 - board.player
+    return 0
+
+
+def run_mcts(root_board, time_limit, seed, max_iterations=None, stop=None, weights=None):
+    # One tree from root_board; returns ({root move: (visits, wins)}, iterations,
+    # {root move: (most visited answer, its visits)})
+    # time_limit None: stop on max_iterations only, which makes the search reproducible
+    # stop: threading or multiprocessing Event that ends the search early
+    rng = random.Random(seed)
+    root = Node(None, None, 3 - root_board.player, root_board.generate_moves())
+    deadline = time.perf_counter() + time_limit if time_limit else None
+    iterations = 0
+
+    while ((deadline is None or time.perf_counter() < deadline)
+           and (max_iterations is None or iterations < max_iterations)
+           and (stop is None or not stop.is_set())):
+        board = root_board.copy()
+        node = root
+        winner = 0
+
+        # Selection
+        while not node.untried and node.children:
+            node = node.select_child()
+            board.make(node.move)
+
+        # Expansion (terminal nodes are created with an empty move list)
+        if node.untried:
+            move = node.untried.pop(rng.randrange(len(node.untried)))
+            mover = board.player
+            board.make(move)
+            winner = board.winner()
+            child = Node(move, node, mover, [] if winner else board.generate_moves())
+            node.children.append(child)
+            node = child
+
+        # Simulation
+        if not winner and node.parent:
+            winner = board.winner()
+        if not winner:
+            winner = playout(board, rng, weights)
+
+        # Backpropagation
+        while node is not None:
+            node.visits += 1
+            if winner == node.mover:
+                node.wins += 1
+            elif winner == 0:
+                node.wins += 0.5
+            node = node.parent
+        iterations += 1
+
+    replies = {}
+    for child in root.children:
+        if child.children:
+            reply = max(child.children, key=lambda node: node.visits)
+            replies[child.move] = (reply.move, reply.visits)
+    return {child.move: (child.visits, child.wins) for child in root.children}, iterations, replies
+
+
+_worker_stop = None  # multiprocessing.Event set when the caller cancels the search
+
+
+def _init_worker(stop):
+    global _worker_stop
+    _worker_stop = stop
+
+
+def _worker(board, player, time_limit, seed, max_iterations=None, weights=None):
+    # Process pool entry point: board is the list-of-lists position
+    return run_mcts(CongressBoard(board, player), time_limit, seed, max_iterations, _worker_stop, weights)
+
+
+class CongressAI:
+
+    def __init__(self, workers=None, time_limit=1.0, seed=None, max_iterations=None, book=None, weights=None,
+                 tuned=True, verbose=False):
+        if time_limit is None and max_iterations is None:
+            raise ValueError("CongressAI needs a time limit or an iteration budget")
+        self.workers = workers or os.cpu_count() or 1
+        self.time_limit = time_limit
+        self.max_iterations = max_iterations  # per worker
+        self.rng = random.Random(seed)
+        self.verbose = verbose  # print a line about every move chosen
+        self.executor = None
+        self.worker_stop = None  # multiprocessing.Event shared with the pool workers
+        self.book = book  # Engine.opening_book, consulted before searching
+        # Scores playouts cut at PLAYOUT_LIMIT; without weights, the tuned ones of eval_weights.json
+        # unless tuned is False, then such playouts are draws
+        self.weights = weights or (load_weights().get(CONGRESS) if tuned else None)
+        self.last_stats = {}
+        self.predicted_reply = None  # opponent's expected answer to the last move chosen, for pondering
+
+    def choose_move(self, board, player, stop=None):
+        # Most visited root move over all workers: ((from_row, from_col), (to_row, to_col)) or None
+        # stop ends the search early, in the pool workers too
+        self.predicted_reply = None
+        root = CongressBoard(board, player)
+        moves = root.generate_moves()
+        if not moves:
+            return None
+        if len(moves) == 1:
+            return root.to_coords(moves[0])
+        if self.book is not None:
+            move = self.book.probe(board, player, CONGRESS)
+            if move is not None and pack_move(move, root.cols) in moves:
+                self.predicted_reply = self.book.probe_reply(board, player, CONGRESS, move)
+                self.last_stats = {"workers": self.workers, "iterations": 0, "time": 0.0, "book": True}
+                if self.verbose:
+                    print(f"AI book move {move}")
+                return move
+
+        start = time.perf_counter()
+        seeds = [self.rng.getrandbits(32) for _ in range(self.workers)]
+        if self.workers == 1:
+            results = [run_mcts(root, self.time_limit, seeds[0], self.max_iterations, stop, self.weights)]
+        else:
+            if self.executor is None:
+                self.worker_stop = multiprocessing.Event()
+                self.executor = ProcessPoolExecutor(max_workers=self.workers, initializer=_init_worker,
+                                                    initargs=(self.worker_stop,))
+            self.worker_stop.clear()
+            futures = [self.executor.submit(_worker, board, player, self.time_limit, seed, self.max_iterations,
+                                            self.weights) for seed in seeds]
+            # Pass the caller's stop on to the workers, which cannot see a threading.Event
+            while wait(futures, timeout=STOP_POLL)[1]:
+                if stop is not None and stop.is_set():
+                    self.worker_stop.set()
+            results = [future.result() for future in futures]
+
+        if stop is not None and stop.is_set():
+            return None
+
+        totals = {}
+        iterations = 0
+        for stats, count, _ in results:
+            iterations += count
+            for move, (visits, wins) in stats.items():
+                total = totals.setdefault(move, [0, 0.0])
+                total[0] += visits
+                total[1] += wins
+
+        best = max(totals, key=lambda move: totals[move][0])
+        replies = [replies[best] for _, _, replies in results if best in replies]
+        if replies:
+            self.predicted_reply = root.to_coords(max(replies, key=lambda reply: reply[1])[0])
+        elapsed = time.perf_counter() - start
+        visits, wins = totals[best]
+        self.last_stats = {
+            "workers": self.workers,
+            "iterations": iterations,
+            "time": elapsed,
+            "playouts_per_second": int(iterations / elapsed) if elapsed > 0 else 0,
+            "win_rate": wins / visits if visits else 0.0,
+        }
+        if self.verbose:
+            print(f"AI {iterations} playouts on {self.workers} workers, win rate {self.last_stats['win_rate']:.2f}")
+        return root.to_coords(best)
+
+    def close(self):
+        if self.executor is not None:
+            self.worker_stop.set()
+            self.executor.shutdown(cancel_futures=True)
+            self.executor = None
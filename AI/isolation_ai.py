@@ -0,0 +1,169 @@
+# Isolation AI with an exact endgame solver.
+# A position is the set of occupied squares (one bit set) plus the side to move; the
+# safe squares follow from it. A legal placement is never on another pawn's ray, so
+# it cannot shorten any attack: placing on s removes s and the squares s attacks from
+# the safe set and nothing else. The player left without a safe square loses.
+# Once few enough safe squares remain the rest of the game is searched exactly,
+# with a bounded memo table and two cut-offs:
+#   - a move that leaves the opponent no safe square wins at once,
+#   - if no safe square attacks another, every move stays available and the
+#     side to move wins exactly when the number of safe squares is odd.
+# Before that, placements follow the tuned Engine.batch_eval weights when
+# eval_weights.json has Isolation ones (Tools.tune), a fixed rule otherwise.
+import random
+import time
+
+from Engine.attack_map import AttackMap
+from Engine.batch_eval import load_weights
+from Engine.bitboard import iter_bits, BLUE, GREEN, YELLOW, RED, DIAGONALS, LINES
+from Engine.movegen import ISOLATION
+from Engine.transposition import TranspositionTable
+
+DEFAULT_THRESHOLD = 20      # solve exactly at or below this many safe squares
+DEFAULT_MEMO_SIZE = 100003  # memo buckets (two entries each); prime so raw bit sets spread well
+
+
+class SolveAborted(Exception):
+    pass
+
+
+class IsolationSolver:
+
+    def __init__(self, board, memo_size=DEFAULT_MEMO_SIZE, stop=None):
+        attack_map = AttackMap(board)
+        bb = attack_map.bb
+        self.cols = bb.cols
+        self.tables = bb.tables
+        self.tiles = [value // 10 for value in bb.cells]
+        self.playable = bb.playable
+        self.yellow = bb.colors[YELLOW]
+        self.red = bb.colors[RED]
+
+        self.occupied = bb.occupied()
+        self.safe = attack_map.safe_mask()
+
+        self.memo = TranspositionTable(memo_size)
+        self.nodes = 0
+        self.stop = stop  # threading.Event that abandons the solve
+
+    def attacks(self, sq, occupied):
+        tile = self.tiles[sq]
+        if tile == BLUE:
+            mask = self.tables.king[sq]
+        elif tile == GREEN:
+            mask = self.tables.knight[sq]
+        elif tile == YELLOW:
+            mask = self.tables.slide(sq, DIAGONALS, occupied | self.yellow)
+        elif tile == RED:
+            mask = self.tables.slide(sq, LINES, occupied | self.red)
+        else:
+            return 0
+        return mask & self.playable
+
+    def children(self, occupied, safe):
+        # (square, safe squares left to the opponent) for every placement, fewest left first
+        result = []
+        for sq in iter_bits(safe):
+            bit = 1 << sq
+            result.append((sq, safe & ~bit & ~self.attacks(sq, occupied | bit)))
+        result.sort(key=lambda child: bin(child[1]).count("1"))
+        return result
+
+    def is_independent(self, occupied, safe):
+        for sq in iter_bits(safe):
+            if self.attacks(sq, occupied | (1 << sq)) & safe:
+                return False
+        return True
+
+    def wins(self, occupied, safe, player):
+        # True if the side to move wins with perfect play
+        self.nodes += 1
+        if not self.nodes & 1023 and self.stop is not None and self.stop.is_set():
+            raise SolveAborted()
+        if not safe:
+            return False
+
+        key = (occupied << 1) | (player - 1)
+        known = self.memo.probe(key)
+        if known is not None:
+            return known
+
+        if self.is_independent(occupied, safe):
+            result = bin(safe).count("1") % 2 == 1
+        else:
+            result = False
+            for sq, left in self.children(occupied, safe):
+                if not left or not self.wins(occupied | (1 << sq), left, 3 - player):
+                    result = True
+                    break
+
+        self.memo.store(key, result)
+        return result
+
+    def solve(self, player):
+        # (winning square or None, True if the side to move wins)
+        for sq, left in self.children(self.occupied, self.safe):
+            if not left or not self.wins(self.occupied | (1 << sq), left, 3 - player):
+                return divmod(sq, self.cols), True
+        return None, False
+
+    def get_stats(self):
+        stats = self.memo.get_stats()
+        stats['nodes'] = self.nodes
+        return stats
+
+
+class IsolationAI:
+
+    def __init__(self, threshold=DEFAULT_THRESHOLD, memo_size=DEFAULT_MEMO_SIZE, seed=None, weights=None,
+                 tuned=True):
+        self.threshold = threshold
+        self.memo_size = memo_size
+        self.rng = random.Random(seed)
+        # Engine.batch_eval weights (safe squares, odd count) for the early placements; without
+        # any, the tuned ones of eval_weights.json unless tuned is False, then the fixed rule
+        self.weights = weights or (load_weights().get(ISOLATION) if tuned else None)
+        self.last_stats = {}
+
+    def choose_move(self, board, player, stop=None):
+        # (row, col) to place on, or None if every free square is attacked
+        # stop: threading.Event that abandons the exact solve for the quick placement
+        solver = IsolationSolver(board, self.memo_size, stop)
+        safe_count = bin(solver.safe).count("1")
+        if not safe_count:
+            return None
+
+        start = time.perf_counter()
+        move, proven = None, False
+        if safe_count <= self.threshold:
+            try:
+                move, proven = solver.solve(player)
+            except SolveAborted:
+                move, proven = None, False
+
+        if move is None:
+            # Too early to solve, or a proven loss: keep as many squares as possible for us,
+            # i.e. take the placement leaving the opponent the fewest safe squares, or with
+            # tuned weights the one that leaves the opponent the lowest evaluation
+            children = solver.children(solver.occupied, solver.safe)
+            if self.weights is not None:
+                safe_weight, odd_weight = self.weights
+                scores = {}
+                for sq, left in children:
+                    count = bin(left).count("1")
+                    scores[sq] = safe_weight * count + odd_weight * (1 if count % 2 else -1)
+                lowest = min(scores.values())
+                candidates = [sq for sq, score in scores.items() if score == lowest]
+            else:
+                fewest = bin(children[0][1]).count("1")
+                candidates = [sq for sq, left in children if bin(left).count("1") == fewest]
+            move = divmod(self.rng.choice(candidates), solver.cols)
+
+        self.last_stats = solver.get_stats()
+        self.last_stats.update({
+            'safe_squares': safe_count,
+            'solved': safe_count <= self.threshold,
+            'proven_win': proven,
+            'time': time.perf_counter() - start,
+        })
+        return move
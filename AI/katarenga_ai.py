@@ -0,0 +1,697 @@
+# Katarenga AI: negamax alpha-beta with iterative deepening.
+# The search runs on a compact copy of the board (one owner per square, owner bit sets,
+# static tile colors) and plays moves with make/unmake instead of copying the board.
+# Move ordering: transposition table move, corner entries, captures by static exchange
+# score, then moves that get closer to the corner entry row.
+# At the leaves a quiescence search plays on the captures (and corner entries that win)
+# for a couple of plies, so a pawn left hanging at the horizon is not mistaken
+# for a free one. Captures are tried by their static exchange score: the value of the
+# pawn taken, less the capturing pawn's if an opposing pawn can take back on that square
+# (which depends on the tile colors the opposing pawns stand on), and captures that
+# lose material that way are skipped.
+# With an opening book (Engine.opening_book) a book move is played without searching.
+# With an endgame tablebase (Engine.tablebase) a position with few enough pawns is played
+# from the table, and the search scores such positions exactly instead of going deeper.
+# From the hard level on, a proof-number search (AI.proof_search) first looks for a
+# forced win, and the move the search picks is checked for a forced loss: if the
+# opponent is proven to win after it, the next best moves are tried instead.
+# The static evaluation uses the Katarenga terms of Engine.batch_eval: the weights given,
+# else the tuned ones of eval_weights.json (Tools.tune) when the file has them and tuned
+# is set, the values below otherwise. It is clamped to MAX_EVAL, far from the win scores.
+# With workers > 1 the search is lazy SMP: helper processes search the same position with
+# the main one, half of them a ply ahead, and they all read and write one transposition
+# table in shared memory (Engine.shared_table). Nothing else is shared; the helpers' table
+# entries cut the main search short, and the deepest finished iteration of any process
+# gives the move (the main one's on a tie). Tools.smp measures how it scales.
+import multiprocessing
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from AI.proof_search import ProofSearch, PROVEN
+from Engine.bitboard import get_tables, iter_bits, BLUE, GREEN, YELLOW, RED, DIAGONALS, LINES
+from Engine.zobrist import CELL_KEYS, SIDE_KEY
+from Engine.transposition import TranspositionTable
+from Engine.shared_table import SharedTranspositionTable
+from Engine.movegen import KATARENGA
+from Engine.opening_book import pack_move
+from Engine.layouts import play_move
+from Engine.batch_eval import load_weights
+from Engine.tablebase import Tablebase, WIN as TB_WIN, LOSS as TB_LOSS, DRAW as TB_DRAW, RESULT_NAMES
+
+WIN = 100000
+INFINITY = 10 * WIN
+MATE_BOUND = WIN - 1000  # scores beyond are wins or losses a number of plies away
+
+EXACT, LOWER, UPPER = 0, 1, 2
+
+# Node budget and depth cap per difficulty level, proof-number search budget (0: none)
+LEVELS = {
+    "easy": {"nodes": 300, "depth": 2, "proof": 0},
+    "medium": {"nodes": 5000, "depth": 4, "proof": 0},
+    "hard": {"nodes": 50000, "depth": 8, "proof": 5000},
+    "expert": {"nodes": 500000, "depth": 32, "proof": 50000},
+}
+PROOF_PLIES = 15      # longest forced win looked for
+SAFETY_CANDIDATES = 4  # moves checked for a forced loss before giving up
+QUIESCENCE_PLIES = 2   # captures played on past the depth; more costs the deeper levels a ply
+MAX_EVAL = WIN // 10   # static scores stay far from the win scores whatever the weights
+
+PAWN_VALUE = 100
+ADVANCE_VALUE = 6
+CORNER_VALUE = 400
+# Engine.batch_eval features: material, mobility per tile color, advance, corners held
+DEFAULT_WEIGHTS = (PAWN_VALUE, 0, 0, 0, 0, ADVANCE_VALUE, CORNER_VALUE - PAWN_VALUE)
+
+
+class SearchAborted(Exception):
+    pass
+
+
+def to_table(score, ply):
+    # Win and loss scores count plies from the root; the table keeps them counted from the
+    # node, so an entry reads the same from any path (and any process of the shared table)
+    if score >= MATE_BOUND:
+        return score + ply
+    if score <= -MATE_BOUND:
+        return score - ply
+    return score
+
+
+def from_table(score, ply):
+    if score >= MATE_BOUND:
+        return score - ply
+    if score <= -MATE_BOUND:
+        return score + ply
+    return score
+
+
+class SearchBoard:
+    # Katarenga position for the search: 10x10 board with borders and corners
+
+    def __init__(self, board, player, weights=DEFAULT_WEIGHTS):
+        self.rows = len(board)
+        self.cols = len(board[0])
+        self.tables = get_tables(self.rows, self.cols)
+
+        cells = [value for row in board for value in row]
+        self.tiles = [value // 10 for value in cells]
+        self.owner = [value % 10 for value in cells]
+
+        self.playable = 0
+        self.blue = 0
+        self.green = 0
+        self.yellow = 0
+        self.red = 0
+        self.masks = [0, 0, 0]  # squares held by player 1 and 2
+        for sq, value in enumerate(cells):
+            bit = 1 << sq
+            if value != 0:
+                self.playable |= bit
+            if self.tiles[sq] == BLUE:
+                self.blue |= bit
+            elif self.tiles[sq] == GREEN:
+                self.green |= bit
+            elif self.tiles[sq] == YELLOW:
+                self.yellow |= bit
+            elif self.tiles[sq] == RED:
+                self.red |= bit
+            if self.owner[sq]:
+                self.masks[self.owner[sq]] |= bit
+
+        last_row = (self.rows - 1) * self.cols
+        # Corners each player must hold to win, and the row it enters them from
+        self.targets = [0, (0, self.cols - 1), (last_row, last_row + self.cols - 1)]
+        self.entry_rows = [0, self._row_mask(1), self._row_mask(self.rows - 2)]
+
+        self.player = player
+        self.key = SIDE_KEY if player == 2 else 0
+        for sq, value in enumerate(cells):
+            self.key ^= CELL_KEYS[sq][value]
+
+        self.history = []  # undo stack: (move, captured owner, previous key)
+
+        self.pawn_value, blue, green, yellow, red, self.advance_value, corner_bonus = weights
+        self.corner_value = self.pawn_value + corner_bonus
+        # Value of one destination per tile color, None when mobility is not scored
+        self.mobility = [0, blue, green, yellow, red, 0, 0] if any((blue, green, yellow, red)) else None
+
+    def _row_mask(self, row):
+        mask = 0
+        for col in range(1, self.cols - 1):
+            mask |= 1 << (row * self.cols + col)
+        return mask
+
+    def count(self, player):
+        return bin(self.masks[player]).count("1")
+
+    def destinations(self, sq):
+        tile = self.tiles[sq]
+        tables = self.tables
+        if tile == BLUE:
+            mask = tables.king[sq]
+        elif tile == GREEN:
+            mask = tables.knight[sq]
+        elif tile == YELLOW:
+            mask = tables.slide(sq, DIAGONALS, self.masks[1] | self.masks[2] | self.yellow)
+        elif tile == RED:
+            mask = tables.slide(sq, LINES, self.masks[1] | self.masks[2] | self.red)
+        else:
+            return 0  # corners: a pawn that reached one stays there
+        return mask & self.playable & ~self.masks[self.owner[sq]]
+
+    def generate_moves(self):
+        player = self.player
+        own = self.masks[player]
+        corners = 0
+        for corner in self.targets[player]:
+            if not own >> corner & 1:
+                corners |= 1 << corner
+
+        moves = []
+        for sq in iter_bits(own):
+            mask = self.destinations(sq)
+            if self.entry_rows[player] >> sq & 1:
+                mask |= corners
+            base = sq << 8
+            for to in iter_bits(mask):
+                moves.append(base | to)
+        return moves
+
+    def make(self, move):
+        from_sq, to_sq = move >> 8, move & 0xFF
+        player = self.player
+        captured = self.owner[to_sq]
+        tiles = self.tiles
+
+        self.history.append((move, captured, self.key))
+
+        key = self.key ^ SIDE_KEY
+        key ^= CELL_KEYS[from_sq][tiles[from_sq] * 10 + player] ^ CELL_KEYS[from_sq][tiles[from_sq] * 10]
+        key ^= CELL_KEYS[to_sq][tiles[to_sq] * 10 + captured] ^ CELL_KEYS[to_sq][tiles[to_sq] * 10 + player]
+        self.key = key
+
+        self.owner[from_sq] = 0
+        self.owner[to_sq] = player
+        self.masks[player] ^= (1 << from_sq) | (1 << to_sq)
+        if captured:
+            self.masks[captured] ^= 1 << to_sq
+        self.player = 3 - player
+
+    def unmake(self):
+        move, captured, key = self.history.pop()
+        from_sq, to_sq = move >> 8, move & 0xFF
+        player = 3 - self.player
+
+        self.owner[from_sq] = player
+        self.owner[to_sq] = captured
+        self.masks[player] ^= (1 << from_sq) | (1 << to_sq)
+        if captured:
+            self.masks[captured] |= 1 << to_sq
+        self.player = player
+        self.key = key
+
+    def winner(self):
+        # Only the side that just moved can have won
+        mover = 3 - self.player
+        if not self.masks[self.player]:
+            return mover
+        first, second = self.targets[mover]
+        if self.owner[first] == mover and self.owner[second] == mover:
+            return mover
+        return 0
+
+    def progress(self, player, sq):
+        # Rows left before the corner entry row
+        row = sq // self.cols
+        return row - 1 if player == 1 else self.rows - 2 - row
+
+    def evaluate(self):
+        # Static score from the point of view of the side to move
+        player = self.player
+        mobility = self.mobility
+        score = 0
+        for side, sign in ((player, 1), (3 - player, -1)):
+            value = 0
+            corners = self.targets[side]
+            for sq in iter_bits(self.masks[side]):
+                if sq in corners:
+                    value += self.corner_value
+                else:
+                    value += self.pawn_value + self.advance_value * (self.rows - 3 - self.progress(side, sq))
+                if mobility is not None:
+                    value += mobility[self.tiles[sq]] * bin(self.destinations(sq)).count("1")
+            score += sign * value
+        return max(-MAX_EVAL, min(MAX_EVAL, round(score)))
+
+    def to_coords(self, move):
+        return divmod(move >> 8, self.cols), divmod(move & 0xFF, self.cols)
+
+    def attackers(self, sq, player, occupied):
+        # Squares of player's pawns that could move to sq with the given occupied squares:
+        # the moves of each tile color read backwards from sq
+        tables = self.tables
+        pawns = self.masks[player] & occupied & ~(1 << sq)
+        mask = tables.king[sq] & pawns & self.blue
+        mask |= tables.knight[sq] & pawns & self.green
+        mask |= tables.slide(sq, DIAGONALS, occupied | self.yellow) & pawns & self.yellow
+        mask |= tables.slide(sq, LINES, occupied | self.red) & pawns & self.red
+        return mask
+
+    def captures(self):
+        # Capturing moves of the side to move, corner entries onto a held corner included
+        player = self.player
+        opponent = 3 - player
+        occupied = self.masks[1] | self.masks[2]
+        entries = self.masks[player] & self.entry_rows[player]
+        moves = []
+        for to_sq in iter_bits(self.masks[opponent]):
+            attackers = self.attackers(to_sq, player, occupied)
+            if to_sq in self.targets[player]:
+                attackers |= entries
+            for from_sq in iter_bits(attackers):
+                moves.append(from_sq << 8 | to_sq)
+        return moves
+
+    def value_of(self, player, sq):
+        # Evaluation of player's pawn on sq, mobility aside
+        if sq in self.targets[player]:
+            return self.corner_value
+        return self.pawn_value + self.advance_value * (self.rows - 3 - self.progress(player, sq))
+
+    def see(self, move):
+        # Static exchange score of a capture for the side to move: the pawn taken, less the
+        # capturing pawn if the opponent can take back once it stands on the square
+        from_sq, to_sq = move >> 8, move & 0xFF
+        player = self.player
+        opponent = 3 - player
+        gain = self.value_of(opponent, to_sq)
+        if self.attackers(to_sq, opponent, (self.masks[1] | self.masks[2]) & ~(1 << from_sq)):
+            gain -= self.value_of(player, to_sq)
+        return gain
+
+
+_helper_stop = None  # multiprocessing.Event set when the main search is done
+_helpers = {}  # KatarengaAI of this helper process per (shared table, tablebase file)
+
+
+def _init_helper(stop):
+    global _helper_stop
+    _helper_stop = stop
+
+
+def _helper(board, player, index, settings):
+    # Process pool entry point: one lazy SMP helper search of the list-of-lists position,
+    # (depth finished, score, packed move, nodes)
+    key = (settings["table"], settings["tablebase"])
+    ai = _helpers.get(key)
+    if ai is None:
+        tablebase = Tablebase(settings["tablebase"], board) if settings["tablebase"] else None
+        ai = KatarengaAI(settings["level"], settings["time_limit"], table_size=1, tablebase=tablebase,
+                         weights=settings["weights"], quiescence=settings["quiescence"])
+        ai.table = SharedTranspositionTable.attach(settings["table"], settings["buckets"])
+        _helpers.clear()
+        _helpers[key] = ai
+    ai.max_nodes = settings["nodes"]
+    ai.max_depth = settings["depth"]
+    ai.stop = _helper_stop
+    ai.board = SearchBoard(board, player, ai.weights)
+    move = ai.search(1 + index % 2)
+    stats = ai.last_stats
+    return stats["depth"], stats["score"], move, stats["nodes"]
+
+
+class KatarengaAI:
+
+    def __init__(self, level="medium", time_limit=1.0, table_size=1 << 16, book=None, tablebase=None,
+                 weights=None, quiescence=QUIESCENCE_PLIES, workers=1, tuned=True, verbose=False):
+        if level not in LEVELS:
+            raise ValueError(f"Unknown AI level: {level}")
+        self.level = level
+        self.verbose = verbose  # print a line about every move chosen
+        self.max_nodes = LEVELS[level]["nodes"]
+        self.max_depth = LEVELS[level]["depth"]
+        self.proof_nodes = LEVELS[level]["proof"]
+        self.time_limit = time_limit
+
+        # Lazy SMP: workers - 1 helper processes, started on the first search
+        self.workers = max(1, workers)
+        self.executor = None
+        self.helper_stop = None
+        if self.workers > 1:
+            self.table = SharedTranspositionTable(table_size)
+        else:
+            self.table = TranspositionTable(table_size)
+        self.table_size = table_size
+        self.book = book
+        self.tablebase = tablebase  # for the layout of the boards it is given
+        # Evaluation weights (Engine.batch_eval.FEATURES order); without any, the tuned ones
+        # of eval_weights.json unless tuned is False, then the hand-set ones
+        self.weights = tuple(weights or (load_weights().get(KATARENGA) if tuned else None) or DEFAULT_WEIGHTS)
+        self.quiet = quiescence  # plies of quiescence search at the leaves, 0 for none
+        self.last_stats = {}
+        self.predicted_reply = None  # opponent's expected answer to the last move chosen, for pondering
+
+        self.nodes = 0
+        self.qnodes = 0  # of which in the quiescence search
+        self.probe_pawns = 0  # largest pawn count probed in the tablebase during the search
+        self.deadline = None
+        self.stop = None
+        self.board = None
+
+    def choose_move(self, board, player, stop=None):
+        # Best move for player on a list-of-lists board: ((from_row, from_col), (to_row, to_col)) or None
+        # stop: threading.Event that ends the search early, keeping the last finished depth
+        self.stop = stop
+        self.board = SearchBoard(board, player, self.weights)
+        move = self.book_move(board, player)
+        if move is None:
+            move = self.tablebase_move(board, player)
+        if move is not None:
+            return move
+        if self.proof_nodes:
+            move = self.forced_win()
+            if move is not None:
+                return self.board.to_coords(move)
+        move = self.search() if self.workers == 1 else self.parallel_search(board, player)
+        if move is not None and self.proof_nodes:
+            move = self.avoid_forced_loss(move)
+        return None if move is None else self.board.to_coords(move)
+
+    def forced_win(self):
+        # Winning move proven by proof-number search, or None
+        prover = ProofSearch(self.proof_nodes, PROOF_PLIES, self.stop)
+        result, move = prover.search(self.board)
+        if result != PROVEN:
+            return None
+        line = prover.principal_line(2)
+        self.predicted_reply = line[1] if len(line) > 1 else None
+        self.last_stats = {"nodes": prover.nodes, "depth": 0, "time": prover.last_stats["time"],
+                           "nps": prover.last_stats["nps"], "score": WIN - len(prover.principal_line()),
+                           "proof": True}
+        if self.verbose:
+            print(f"AI forced win {self.board.to_coords(move)}, proof in {prover.nodes} nodes")
+        return move
+
+    def avoid_forced_loss(self, move):
+        # move, or the first of the next best moves after which the opponent has no proven win
+        board = self.board
+        candidates = [move] + [other for other in self.order_moves(board.generate_moves()) if other != move]
+        for candidate in candidates[:SAFETY_CANDIDATES]:
+            if self.stop is not None and self.stop.is_set():
+                break
+            board.make(candidate)
+            lost = False
+            if not board.winner():
+                prover = ProofSearch(self.proof_nodes // SAFETY_CANDIDATES, PROOF_PLIES, self.stop)
+                lost = prover.search(board)[0] == PROVEN
+            board.unmake()
+            if not lost:
+                if candidate != move:
+                    if self.verbose:
+                        print(f"AI avoids a forced loss after {board.to_coords(move)}")
+                    self.predicted_reply = self.predict_reply(candidate)
+                return candidate
+        return move
+
+    def book_move(self, board, player):
+        # Book move of the position, if it has one and it is legal here
+        if self.book is None:
+            return None
+        move = self.book.probe(board, player, KATARENGA)
+        if move is None or pack_move(move, self.board.cols) not in self.board.generate_moves():
+            return None
+        self.predicted_reply = self.book.probe_reply(board, player, KATARENGA, move)
+        self.last_stats = {"nodes": 0, "depth": 0, "time": 0.0, "nps": 0, "book": True}
+        if self.verbose:
+            print(f"AI book move {move}")
+        return move
+
+    def tablebase_move(self, board, player):
+        # Best move by the tablebase, if it covers the position
+        tablebase = self.tablebase
+        if tablebase is None or not tablebase.covers(board):
+            return None
+        moves = [self.board.to_coords(move) for move in self.board.generate_moves()]
+        best = tablebase.best_move(board, player, moves)
+        if best is None:
+            return None
+        move, result, distance = best
+        child = play_move(board, move)
+        reply = None
+        if distance > 1:
+            replies = [self.board.to_coords(move) for move in SearchBoard(child, 3 - player).generate_moves()]
+            reply = tablebase.best_move(child, 3 - player, replies)
+        self.predicted_reply = reply[0] if reply else None
+        self.last_stats = {"nodes": 0, "depth": 0, "time": 0.0, "nps": 0, "tablebase": True,
+                           "score": self.tablebase_score(result, distance, 0)}
+        if self.verbose:
+            print(f"AI tablebase move {move}: {RESULT_NAMES[result]}"
+                  + (f" in {distance}" if result != TB_DRAW else ""))
+        return move
+
+    @staticmethod
+    def tablebase_score(result, distance, ply):
+        if result == TB_WIN:
+            return WIN - ply - distance
+        if result == TB_LOSS:
+            return -(WIN - ply - distance)
+        return 0
+
+    def parallel_search(self, board, player):
+        # Main search with the helpers running alongside, best move of the deepest one
+        if self.executor is None:
+            self.helper_stop = multiprocessing.Event()
+            self.executor = ProcessPoolExecutor(max_workers=self.workers - 1, initializer=_init_helper,
+                                                initargs=(self.helper_stop,))
+        settings = {"level": self.level, "time_limit": self.time_limit, "nodes": self.max_nodes,
+                    "depth": self.max_depth, "weights": self.weights, "quiescence": self.quiet,
+                    "table": self.table.name, "buckets": self.table_size,
+                    "tablebase": self.tablebase.filename if self.tablebase is not None else None}
+        start = time.perf_counter()
+        self.helper_stop.clear()
+        futures = [self.executor.submit(_helper, board, player, index, settings)
+                   for index in range(1, self.workers)]
+        try:
+            move = main_move = self.search()
+        finally:
+            self.helper_stop.set()
+        results = [future.result() for future in futures]
+        if move is None:
+            return None
+
+        stats = self.last_stats
+        depth, score, nodes = stats["depth"], stats["score"], stats["nodes"]
+        for helper_depth, helper_score, helper_move, helper_nodes in results:
+            nodes += helper_nodes
+            if helper_depth > depth and helper_move is not None:
+                depth, score, move = helper_depth, helper_score, helper_move
+        if move != main_move:
+            self.predicted_reply = self.predict_reply(move)
+        elapsed = time.perf_counter() - start
+        stats.update({"nodes": nodes, "depth": depth, "score": score, "time": elapsed,
+                      "nps": int(nodes / elapsed) if elapsed > 0 else 0, "workers": self.workers,
+                      "main_depth": stats["depth"], "main_nodes": stats["nodes"]})
+        if self.verbose:
+            print(f"AI lazy SMP on {self.workers} workers: depth {depth}, {nodes} nodes, {stats['nps']} nodes/s")
+        return move
+
+    def close(self):
+        if self.executor is not None:
+            self.helper_stop.set()
+            self.executor.shutdown(cancel_futures=True)
+            self.executor = None
+        if self.workers > 1:
+            self.table.close()
+
+    def search(self, first_depth=1):
+        # Iterative deepening from first_depth (lazy SMP helpers start a ply ahead)
+        start = time.perf_counter()
+        self.deadline = start + self.time_limit if self.time_limit else None
+        self.nodes = 0
+        self.qnodes = 0
+        self.probe_pawns = self.tablebase.max_pawns if self.tablebase is not None else 0
+
+        self.predicted_reply = None
+        root_moves = self.board.generate_moves()
+        if not root_moves:
+            self.last_stats = {"nodes": 0, "depth": 0, "time": 0.0, "nps": 0, "score": -WIN}
+            return None
+
+        best_move, best_score, depth_done = root_moves[0], 0, 0
+        for depth in range(first_depth, self.max_depth + 1):
+            try:
+                score, move = self.search_root(root_moves, depth)
+            except SearchAborted:
+                while self.board.history:
+                    self.board.unmake()  # back to the root
+                break
+            best_move, best_score, depth_done = move, score, depth
+
+            # Searched move first on the next iteration
+            root_moves.remove(move)
+            root_moves.insert(0, move)
+            if abs(score) >= MATE_BOUND:
+                break  # forced win or loss found
+
+        self.predicted_reply = self.predict_reply(best_move)
+        elapsed = time.perf_counter() - start
+        self.last_stats = {
+            "nodes": self.nodes,
+            "qnodes": self.qnodes,
+            "depth": depth_done,
+            "time": elapsed,
+            "nps": int(self.nodes / elapsed) if elapsed > 0 else 0,
+            "score": best_score,
+            "table": self.table.get_stats(),
+        }
+        if self.verbose:
+            print(f"AI depth {depth_done}, {self.nodes} nodes, {self.last_stats['nps']} nodes/s, score {best_score}")
+        return best_move
+
+    def predict_reply(self, move):
+        # Table move of the position after move (the opponent's best answer found), as coords
+        board = self.board
+        board.make(move)
+        entry = None if board.winner() else self.table.probe_entry(board.key)
+        board.unmake()
+        if entry is None or entry[1][2] is None:
+            return None
+        return board.to_coords(entry[1][2])
+
+    def out_of_time(self):
+        if self.stop is not None and self.stop.is_set():
+            return True
+        return self.deadline is not None and time.perf_counter() > self.deadline
+
+    def search_root(self, moves, depth):
+        board = self.board
+        alpha, beta = -INFINITY, INFINITY
+        best_move = moves[0]
+        for move in moves:
+            board.make(move)
+            if board.winner():
+                score = WIN - 1
+            else:
+                score = -self.negamax(depth - 1, -beta, -alpha, 1)
+            board.unmake()
+            if score > alpha:
+                alpha, best_move = score, move
+        self.table.store(board.key, (alpha, EXACT, best_move), depth)
+        return alpha, best_move
+
+    def negamax(self, depth, alpha, beta, ply):
+        self.nodes += 1
+        if self.nodes >= self.max_nodes or (not self.nodes & 1023 and self.out_of_time()):
+            raise SearchAborted()
+
+        board = self.board
+        if self.probe_pawns and bin(board.masks[1] | board.masks[2]).count("1") <= self.probe_pawns:
+            entry = self.tablebase.probe_masks(board.masks, board.player)
+            if entry is not None and entry[0]:
+                return self.tablebase_score(entry[0], entry[1], ply)
+        if depth <= 0:
+            return self.quiescence(alpha, beta, ply, self.quiet) if self.quiet else board.evaluate()
+
+        original_alpha = alpha
+        hash_move = None
+        entry = self.table.probe_entry(board.key)
+        if entry is not None:
+            entry_depth, (score, flag, hash_move) = entry
+            score = from_table(score, ply)
+            if entry_depth >= depth:
+                if flag == EXACT:
+                    return score
+                if flag == LOWER and score >= beta:
+                    return score
+                if flag == UPPER and score <= alpha:
+                    return score
+
+        moves = board.generate_moves()
+        if not moves:
+            return -WIN + ply  # no legal move: the side to move loses
+
+        best_score, best_move = -INFINITY, moves[0]
+        for move in self.order_moves(moves, hash_move):
+            board.make(move)
+            if board.winner():
+                score = WIN - ply - 1
+            else:
+                score = -self.negamax(depth - 1, -beta, -alpha, ply + 1)
+            board.unmake()
+
+            if score > best_score:
+                best_score, best_move = score, move
+            if score > alpha:
+                alpha = score
+            if alpha >= beta:
+                break
+
+        if best_score <= original_alpha:
+            flag = UPPER
+        elif best_score >= beta:
+            flag = LOWER
+        else:
+            flag = EXACT
+        self.table.store(board.key, (to_table(best_score, ply), flag, best_move), depth)
+        return best_score
+
+    def quiescence(self, alpha, beta, ply, depth):
+        # Stand-pat score, or better by playing on the captures that do not lose material
+        # and the corner entries that win, for up to depth plies; not stored in the table
+        self.nodes += 1
+        self.qnodes += 1
+        if self.nodes >= self.max_nodes or (not self.nodes & 1023 and self.out_of_time()):
+            raise SearchAborted()
+
+        board = self.board
+        score = board.evaluate()
+        if score >= beta or depth <= 0:
+            return score
+        alpha = max(alpha, score)
+
+        player = board.player
+        tactical = []
+        for move in board.captures():
+            gain = board.see(move)
+            if gain >= 0:
+                tactical.append((gain, move))
+        corners = board.targets[player]
+        missing = [corner for corner in corners if board.owner[corner] != player]
+        if len(missing) == 1 and not board.owner[missing[0]]:
+            # One corner to go: entering it wins
+            for from_sq in iter_bits(board.masks[player] & board.entry_rows[player]):
+                tactical.append((WIN, from_sq << 8 | missing[0]))
+        tactical.sort(reverse=True)
+
+        best_score = score
+        for _, move in tactical:
+            board.make(move)
+            if board.winner():
+                score = WIN - ply - 1
+            else:
+                score = -self.quiescence(-beta, -alpha, ply + 1, depth - 1)
+            board.unmake()
+            if score > best_score:
+                best_score = score
+            if score > alpha:
+                alpha = score
+            if alpha >= beta:
+                break
+        return best_score
+
+    def order_moves(self, moves, hash_move=None):
+        board = self.board
+        player = board.player
+        owner = board.owner
+        corners = board.targets[player]
+
+        def priority(move):
+            if move == hash_move:
+                return 100000
+            from_sq, to_sq = move >> 8, move & 0xFF
+            if to_sq in corners:
+                return 50000
+            score = 10000 + board.see(move) if owner[to_sq] else 0
+            return score + board.progress(player, from_sq) - board.progress(player, to_sq)
+
+        return sorted(moves, key=priority, reverse=True)
@@ -0,0 +1,69 @@
+# Computer players by name, for tools that pit them against each other.
+# A spec is "name" or "name:option":
+#   random             uniform random legal move, any mode
+#   alphabeta[:level]  KatarengaAI with a node budget (easy, medium, hard, expert)
+#   mcts[:iterations]  CongressAI on one process with an iteration budget
+#   solver[:threshold] IsolationAI, solving exactly below threshold safe squares
+# Players are built without time limits and never read eval_weights.json: they evaluate
+# with the weights given to make_player, or their hand-set evaluation, so a game only
+# depends on its seed and those weights.
+# choose_move(board, player) returns ((from_row, from_col), (to_row, to_col)), or (row, col)
+# for Isolation, like the AI classes; None when there is no legal move.
+import random
+
+from Engine import movegen
+from Engine.movegen import KATARENGA, CONGRESS, ISOLATION
+from AI.katarenga_ai import KatarengaAI, LEVELS
+from AI.congress_ai import CongressAI
+from AI.isolation_ai import IsolationAI, DEFAULT_THRESHOLD
+
+DEFAULT_MCTS_ITERATIONS = 2000
+
+
+class RandomPlayer:
+
+    def __init__(self, game_type, seed=None):
+        self.game_type = game_type
+        self.rng = random.Random(seed)
+
+    def choose_move(self, board, player, stop=None):
+        moves = movegen.legal_moves_from_board(board, self.game_type, player)
+        if not moves:
+            return None
+        move = self.rng.choice(moves)
+        return move[1] if self.game_type == ISOLATION else move
+
+
+def make_player(spec, game_type, seed=None, weights=None):
+    # weights: Engine.batch_eval weights of the mode, None for the hand-set evaluation
+    name, _, option = spec.partition(":")
+    if name == "random":
+        return RandomPlayer(game_type, seed)
+
+    if name == "alphabeta":
+        if game_type != KATARENGA:
+            raise ValueError("alphabeta only plays Katarenga")
+        level = option or "medium"
+        if level not in LEVELS:
+            raise ValueError(f"Unknown AI level: {level}")
+        return KatarengaAI(level=level, time_limit=None, weights=weights, tuned=False)
+
+    if name == "mcts":
+        if game_type != CONGRESS:
+            raise ValueError("mcts only plays Congress")
+        iterations = int(option) if option else DEFAULT_MCTS_ITERATIONS
+        return CongressAI(workers=1, time_limit=None, seed=seed, max_iterations=iterations, weights=weights,
+                          tuned=False)
+
+    if name == "solver":
+        if game_type != ISOLATION:
+            raise ValueError("solver only plays Isolation")
+        threshold = int(option) if option else DEFAULT_THRESHOLD
+        return IsolationAI(threshold=threshold, seed=seed, weights=weights, tuned=False)
+
+    raise ValueError(f"Unknown player: {spec}")
+
+
+def as_move(game_type, move):
+    # Player answer -> (from_pos or None, to_pos), the GameState.make_move arguments
+    return (None, move) if game_type == ISOLATION else move
@@ -0,0 +1,171 @@
+# Proof-number search for Katarenga: does the attacker have a forced win from a position?
+# Alpha-beta looks at every line to the same depth; a race for the two far corners is a
+# long narrow sequence of forcing moves that it sees late. Proof-number search grows a
+# tree towards the node that is cheapest to settle: each node keeps the number of leaves
+# still needed to prove the win (proof) and to refute it (disproof). On the attacker's
+# turn one good move proves the node (proof = lowest of the children, disproof = sum),
+# on the defender's every move must be answered (proof = sum, disproof = lowest).
+# Leaves start at 1 and the number of replies, so narrow lines are explored first.
+# Wins are the game's: both far corners held (entered straight from the entry row,
+# as SearchBoard generates), the last opposing pawn taken, or the opponent left without
+# a move. Lines longer than max_plies count as refuted, so a disproof means "no forced
+# win within max_plies", and positions are not merged, so repetitions need no care.
+# The search stops at a node budget (or a stop event) and then reports UNKNOWN.
+# It runs on KatarengaAI's SearchBoard, whose moves and wins are the game's.
+import time
+
+PROVEN, DISPROVEN, UNKNOWN = 1, -1, 0
+INFINITE = 10 ** 9
+DEFAULT_MAX_PLIES = 21
+DEFAULT_MAX_NODES = 100000
+
+
+class Node:
+    __slots__ = ("move", "parent", "children", "proof", "disproof", "attacker_to_move", "ply")
+
+    def __init__(self, move, parent, proof, disproof, attacker_to_move, ply):
+        self.move = move
+        self.parent = parent
+        self.children = None  # not expanded yet
+        self.proof = proof
+        self.disproof = disproof
+        self.attacker_to_move = attacker_to_move
+        self.ply = ply
+
+
+class ProofSearch:
+
+    def __init__(self, max_nodes=DEFAULT_MAX_NODES, max_plies=DEFAULT_MAX_PLIES, stop=None):
+        self.max_nodes = max_nodes
+        self.max_plies = max_plies
+        self.stop = stop  # threading.Event that ends the search (UNKNOWN)
+        self.board = None
+        self.root = None
+        self.attacker = 0
+        self.nodes = 0
+        self.last_stats = {}
+
+    def prove(self, board, player, attacker=None):
+        # (PROVEN, DISPROVEN or UNKNOWN, winning move as coords or None) for attacker
+        # (default: player, the side to move) on a list-of-lists position
+        from AI.katarenga_ai import SearchBoard  # KatarengaAI imports this module
+        result, move = self.search(SearchBoard(board, player), attacker)
+        return result, None if move is None else self.board.to_coords(move)
+
+    def search(self, board, attacker=None):
+        # Same on a SearchBoard, with the move packed; the board is back as given afterwards
+        start = time.perf_counter()
+        self.board = board
+        self.attacker = board.player if attacker is None else attacker
+        self.nodes = 1
+
+        root = Node(None, None, 1, 1, board.player == self.attacker, 0)
+        self.root = root
+        while root.proof and root.disproof and self.nodes < self.max_nodes:
+            if self.stop is not None and self.stop.is_set():
+                break
+            node = self.most_proving(root)
+            self.expand(node)
+            self.update(node)
+
+        result = PROVEN if root.proof == 0 else DISPROVEN if root.disproof == 0 else UNKNOWN
+        move = None
+        if result == PROVEN and root.children:
+            move = next(child.move for child in root.children if child.proof == 0)
+        elapsed = time.perf_counter() - start
+        self.last_stats = {"result": result, "nodes": self.nodes, "time": elapsed,
+                           "nps": int(self.nodes / elapsed) if elapsed > 0 else 0}
+        return result, move
+
+    def most_proving(self, node):
+        # Leaf to expand next, with the board played down to it
+        board = self.board
+        while node.children is not None:
+            if node.attacker_to_move:
+                node = min(node.children, key=lambda child: child.proof)
+            else:
+                node = min(node.children, key=lambda child: child.disproof)
+            board.make(node.move)
+        return node
+
+    def expand(self, node):
+        board = self.board
+        attacker = self.attacker
+        node.children = []
+        ply = node.ply + 1
+        for move in board.generate_moves():
+            board.make(move)
+            winner = board.winner()
+            to_move = board.player
+            if winner:
+                proof, disproof = (0, INFINITE) if winner == attacker else (INFINITE, 0)
+            elif ply >= self.max_plies:
+                proof, disproof = INFINITE, 0  # beyond the horizon: not a forced win
+            else:
+                replies = len(board.generate_moves())
+                if not replies:  # the side to move loses
+                    proof, disproof = (INFINITE, 0) if to_move == attacker else (0, INFINITE)
+                elif to_move == attacker:
+                    proof, disproof = 1, replies
+                else:
+                    proof, disproof = replies, 1
+            node.children.append(Node(move, node, proof, disproof, to_move == attacker, ply))
+            board.unmake()
+        self.nodes += len(node.children)
+        if not node.children:  # only the root can get here: the side to move has lost
+            node.proof, node.disproof = (INFINITE, 0) if node.attacker_to_move else (0, INFINITE)
+
+    def update(self, node):
+        # New numbers from node up to the root, taking the moves back on the way
+        board = self.board
+        while node is not None:
+            children = node.children
+            if children:
+                if node.attacker_to_move:
+                    node.proof = min(child.proof for child in children)
+                    node.disproof = min(INFINITE, sum(child.disproof for child in children))
+                else:
+                    node.proof = min(INFINITE, sum(child.proof for child in children))
+                    node.disproof = min(child.disproof for child in children)
+                if node.proof == 0 or node.disproof == 0:
+                    self.prune(node)
+            if node.parent is not None:
+                board.unmake()
+            node = node.parent
+
+    @staticmethod
+    def prune(node):
+        # A settled node only keeps what shows a proof: its winning move, or all the
+        # defences of a proven node. Refuted nodes drop their children.
+        if node.proof == 0:
+            if node.attacker_to_move:
+                node.children = [next(child for child in node.children if child.proof == 0)]
+        else:
+            node.children = []
+
+    def principal_line(self, limit=None):
+        # Moves (as coords) of the last proof from the root: the attacker's winning moves and
+        # the defender's longest resistance found, until the proof tree ends
+        line = []
+        node = self.root
+        board = self.board
+        if node is None or node.proof != 0:
+            return line
+        while node.children and (limit is None or len(line) < limit):
+            if node.attacker_to_move:
+                node = next(child for child in node.children if child.proof == 0)
+            else:
+                node = max(node.children, key=lambda child: self.size(child))
+            line.append(board.to_coords(node.move))
+        return line
+
+    @staticmethod
+    def size(node):
+        # Nodes kept under node, a measure of how long the defence lasts
+        count, stack = 0, [node]
+        while stack:
+            current = stack.pop()
+            count += 1
+            if current.children:
+                stack.extend(current.children)
+        return count
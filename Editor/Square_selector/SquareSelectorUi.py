@@ -2,6 +2,7 @@ import pygame
 
 from Board.Board import Board
 from Board.Board_draw_tools import Board_draw_tools
+from Engine.balance_store import BalanceStore, balance_key, describe_balance
 from UI_tools.BaseUi import BaseUI
 from Game_ui.Katarenga import Katarenga
 from Game_ui.Congress import Congress
@@ -67,6 +68,11 @@ class SquareSelectorUi(BaseUI):
         # AI toggle checkbox (only for local games)
         self.__ai = False
         self.checkbox_rect = pygame.Rect(20, 220, 20, 20)
+
+        # Balance of the finished board, read from the results of Tools.balance
+        self.balance_store = BalanceStore.open_existing()
+        self.balance_board = None
+        self.balance_label = None
         
     def is_board_filled(self):
         # Check if the board has no empty cells (0 means empty)
@@ -76,6 +82,17 @@ class SquareSelectorUi(BaseUI):
                     return False
         return True
 
+    def get_balance_label(self):
+        # Looked up again only when the board changes
+        board = tuple(tuple(row) for row in self.board)
+        if board != self.balance_board:
+            self.balance_board = board
+            stats = None
+            if self.balance_store is not None:
+                stats = self.balance_store.get(balance_key(self.board, self.gamemode), self.gamemode)
+            self.balance_label = describe_balance(stats)
+        return self.balance_label
+
     def create_square_buttons(self):
         buttons = []
         button_width = 150
@@ -287,6 +304,12 @@ class SquareSelectorUi(BaseUI):
             start_text = self.button_font.render("Launch Game", True, (255, 255, 255))
         screen.blit(start_text, start_text.get_rect(center=self.start_button_rect.center))
 
+        # Draw balance score of the finished board next to the start button
+        if is_ready:
+            balance_text = font.render(self.get_balance_label(), True, (255, 255, 255))
+            screen.blit(balance_text, balance_text.get_rect(midleft=(self.start_button_rect.right + 20,
+                                                                    self.start_button_rect.centery)))
+
         # Draw square buttons for selection
         for name, rect in self.square_buttons:
             pygame.draw.rect(screen, (60, 60, 60), rect)
@@ -0,0 +1,85 @@
+# Incrementally maintained map of the squares attacked by the pawns on the board.
+# Used by Isolation, where a tile may only be taken if no pawn (of either side) attacks it.
+# Each pawn keeps its own attack mask and every square keeps a count of its attackers,
+# so placing or removing one pawn only touches that pawn and the sliders whose ray
+# crosses its square, instead of rescanning the whole board for every free cell.
+from Engine.bitboard import BitboardRules, YELLOW, RED, iter_bits
+
+
+class AttackMap:
+
+    def __init__(self, board):
+        self.bb = BitboardRules(board)
+        size = self.bb.rows * self.bb.cols
+
+        self.counts = [0] * size   # number of pawns attacking each square
+        self.piece_attacks = {}    # square of a pawn -> its attack mask
+        self.attacked = 0          # squares with at least one attacker
+        self.free = self.bb.playable & ~self.bb.occupied() & ~self.bb.colors[5] & ~self.bb.colors[6]
+
+        for sq in iter_bits(self.bb.occupied()):
+            self._add_attacks(sq, self.bb.attacks(sq))
+
+    def _add_attacks(self, sq, mask):
+        self.piece_attacks[sq] = mask
+        counts = self.counts
+        for target in iter_bits(mask):
+            counts[target] += 1
+        self.attacked |= mask
+
+    def _remove_attacks(self, sq):
+        mask = self.piece_attacks.pop(sq)
+        counts = self.counts
+        for target in iter_bits(mask):
+            counts[target] -= 1
+            if counts[target] == 0:
+                self.attacked &= ~(1 << target)
+
+    def _sliders_through(self, sq):
+        # Yellow and red pawns whose ray reaches sq: their attacks change when sq fills or empties
+        cells = self.bb.cells
+        return [piece for piece, mask in self.piece_attacks.items()
+                if mask >> sq & 1 and cells[piece] // 10 in (YELLOW, RED)]
+
+    def _refresh(self, pieces):
+        for piece in pieces:
+            self._remove_attacks(piece)
+            self._add_attacks(piece, self.bb.attacks(piece))
+
+    def place(self, row, col, player):
+        sq = self.bb.square(row, col)
+        blocked = self._sliders_through(sq)
+
+        self.bb.set_cell(row, col, self.bb.cells[sq] // 10 * 10 + player)
+        self.free &= ~(1 << sq)
+
+        self._refresh(blocked)
+        self._add_attacks(sq, self.bb.attacks(sq))
+
+    def remove(self, row, col):
+        sq = self.bb.square(row, col)
+        self._remove_attacks(sq)
+
+        self.bb.set_cell(row, col, self.bb.cells[sq] // 10 * 10)
+        self.free |= 1 << sq
+
+        self._refresh(self._sliders_through(sq))
+
+    def is_attacked(self, row, col):
+        return bool(self.attacked >> self.bb.square(row, col) & 1)
+
+    def is_safe(self, row, col):
+        # Free tile that no pawn attacks: a legal Isolation placement
+        return bool(self.safe_mask() >> self.bb.square(row, col) & 1)
+
+    def safe_mask(self):
+        return self.free & ~self.attacked
+
+    def can_play(self):
+        return self.safe_mask() != 0
+
+    def safe_count(self):
+        return bin(self.safe_mask()).count("1")
+
+    def safe_squares(self):
+        return [self.bb.coords(sq) for sq in iter_bits(self.safe_mask())]
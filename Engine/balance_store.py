@@ -0,0 +1,126 @@
+# Results of the balance analysis (Tools.balance): how often player 1 wins each board.
+# One row per (layout, game mode, player spec) with the game count, the wins of each
+# side, the draws and the game lengths; new games add to the row. Layouts are keyed by
+# balance_key, the layout ID of the board in the canonical orientation of its game mode
+# (Engine.symmetry), so mirrored or turned boards that play the same share their results.
+# Reading a score is one indexed lookup: SquareSelectorUi shows it for the board being built.
+import math
+import os
+import sqlite3
+
+from Engine.layouts import layout_id
+from Engine.symmetry import canonical_layout
+
+STORE_FILE = "balance.db"
+Z_95 = 1.96
+
+
+def balance_key(board, game_type):
+    # Key of an 8x8 board of tiles for a game mode
+    tiles = [[value // 10 * 10 for value in row] for row in board]
+    return layout_id(canonical_layout(tiles, game_type)[0])
+
+
+class BalanceStore:
+
+    def __init__(self, filename=STORE_FILE, read_only=False):
+        self.filename = filename
+        if read_only:
+            self.db = sqlite3.connect(f"file:{filename}?mode=ro", uri=True)
+            return
+        self.db = sqlite3.connect(filename)
+        with self.db:
+            self.db.execute("""
+                CREATE TABLE IF NOT EXISTS balance (
+                    layout TEXT, game INTEGER, player TEXT,
+                    games INTEGER, p1_wins INTEGER, p2_wins INTEGER, draws INTEGER,
+                    plies INTEGER, plies_squared INTEGER,
+                    PRIMARY KEY (layout, game, player))
+            """)
+
+    @classmethod
+    def open_existing(cls, filename=STORE_FILE):
+        # Read-only store, or None when there is none (nothing analyzed yet)
+        if not os.path.exists(filename):
+            return None
+        try:
+            return cls(filename, read_only=True)
+        except sqlite3.Error:
+            return None
+
+    def close(self):
+        self.db.close()
+
+    def add(self, key, game_type, player, results):
+        # results: (winner or 0 for a draw, plies) of each new game
+        games = len(results)
+        p1_wins = sum(1 for winner, _ in results if winner == 1)
+        p2_wins = sum(1 for winner, _ in results if winner == 2)
+        plies = sum(length for _, length in results)
+        plies_squared = sum(length * length for _, length in results)
+        with self.db:
+            self.db.execute("""
+                INSERT INTO balance VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT (layout, game, player) DO UPDATE SET
+                    games = games + excluded.games, p1_wins = p1_wins + excluded.p1_wins,
+                    p2_wins = p2_wins + excluded.p2_wins, draws = draws + excluded.draws,
+                    plies = plies + excluded.plies, plies_squared = plies_squared + excluded.plies_squared
+            """, (key, game_type, player, games, p1_wins, p2_wins, games - p1_wins - p2_wins, plies, plies_squared))
+
+    def games_played(self, key, game_type, player):
+        row = self.db.execute("SELECT games FROM balance WHERE layout = ? AND game = ? AND player = ?",
+                              (key, game_type, player)).fetchone()
+        return row[0] if row else 0
+
+    def get(self, key, game_type, player=None):
+        # Statistics of a layout, summed over player specs unless one is given; None if never analyzed
+        query = ("SELECT SUM(games), SUM(p1_wins), SUM(p2_wins), SUM(draws), SUM(plies), SUM(plies_squared) "
+                 "FROM balance WHERE layout = ? AND game = ?")
+        params = [key, game_type]
+        if player is not None:
+            query += " AND player = ?"
+            params.append(player)
+        games, p1_wins, p2_wins, draws, plies, plies_squared = self.db.execute(query, params).fetchone()
+        if not games:
+            return None
+        return balance_stats(games, p1_wins, p2_wins, draws, plies, plies_squared)
+
+    def rows(self, game_type=None):
+        query = "SELECT * FROM balance" + (" WHERE game = ?" if game_type else "") + " ORDER BY layout, game, player"
+        return self.db.execute(query, (game_type,) if game_type else ()).fetchall()
+
+
+def wilson_interval(successes, trials, z=Z_95):
+    if not trials:
+        return 0.0, 0.0
+    p = successes / trials
+    denominator = 1 + z * z / trials
+    center = (p + z * z / (2 * trials)) / denominator
+    margin = z * math.sqrt(p * (1 - p) / trials + z * z / (4 * trials * trials)) / denominator
+    return max(0.0, center - margin), min(1.0, center + margin)
+
+
+def balance_stats(games, p1_wins, p2_wins, draws, plies, plies_squared):
+    # score: player 1's share of the points (a draw is half a point), 0.5 is a fair board
+    # low, high: its 95% Wilson interval, which stays inside [0, 1] for lopsided boards
+    score = (p1_wins + draws / 2) / games
+    low, high = wilson_interval(p1_wins + draws / 2, games)
+    mean = plies / games
+    return {
+        "games": games,
+        "p1_wins": p1_wins,
+        "p2_wins": p2_wins,
+        "draws": draws,
+        "score": score,
+        "low": low,
+        "high": high,
+        "mean_plies": mean,
+        "std_plies": math.sqrt(max(0.0, plies_squared / games - mean * mean)),
+    }
+
+
+def describe_balance(stats):
+    # Short label for the board selector
+    if stats is None:
+        return "Balance: not analyzed"
+    return f"Balance: P1 {stats['score']:.0%} ({stats['low']:.0%}-{stats['high']:.0%}, {stats['games']} games)"
@@ -0,0 +1,246 @@
+# Static evaluation of many positions at once with NumPy (optional: RuntimeError without it).
+# Boards come stacked in one array, either (batch, rows, cols) in the color * 10 + owner
+# encoding or as planes (batch, 2, rows, cols) holding the tile color and the owner
+# (to_planes). Every feature is computed for the whole batch with array operations:
+# a step or a knight jump is a shifted copy of the board, a slide is one shift per
+# distance with the pawns still moving carried along, and Congress groups come from
+# label propagation between orthogonal neighbours. The cost per position falls as the
+# batch grows instead of paying the Python loop of the search evaluations.
+# Features are from the side to move: own count minus the opponent's for pawns,
+# mobility per tile color, Katarenga progress towards the corner entry rows and corners
+# held, Congress pawn groups, Isolation safe squares. A score is features @ weights
+# (DEFAULT_WEIGHTS, or tuned ones), one value per board.
+# Tuned weights (Tools.tune) live in a JSON file with a revision number that grows with
+# every tuning run; the AIs read the weights of their mode when they are created and
+# keep their hand-set evaluation for a mode the file does not hold.
+import json
+import os
+from functools import lru_cache
+
+from Engine.bitboard import BLUE, GREEN, YELLOW, RED, KING_STEPS, KNIGHT_STEPS, DIAGONALS, LINES
+from Engine.layouts import GAME_NAMES
+from Engine.movegen import KATARENGA, CONGRESS, ISOLATION
+
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    np = None
+    NUMPY_AVAILABLE = False
+
+MOBILITY = ("mobility_blue", "mobility_green", "mobility_yellow", "mobility_red")
+FEATURES = {
+    KATARENGA: ("material",) + MOBILITY + ("advance", "corners"),
+    CONGRESS: MOBILITY + ("groups",),
+    ISOLATION: ("safe_squares", "safe_odd"),
+}
+# Katarenga matches KatarengaAI's evaluation: a pawn is 100 plus 6 per row advanced,
+# one on a target corner 400 in all
+DEFAULT_WEIGHTS = {
+    KATARENGA: (100.0, 0.0, 0.0, 0.0, 0.0, 6.0, 300.0),
+    CONGRESS: (1.0, 1.0, 1.0, 1.0, -50.0),
+    ISOLATION: (0.0, 100.0),
+}
+CORNER_TILES = (5, 6)
+
+WEIGHTS_FILE = "eval_weights.json"
+WEIGHTS_FORMAT = 1
+MODE_NAMES = {game_type: name for name, game_type in GAME_NAMES.items()}
+
+
+def _require_numpy():
+    if not NUMPY_AVAILABLE:
+        raise RuntimeError("NumPy is required for batch evaluation")
+
+
+def stack(boards):
+    # List of list-of-lists boards of one size -> (batch, rows, cols) array
+    _require_numpy()
+    return np.asarray(boards, dtype=np.int16)
+
+
+def to_planes(boards):
+    # (batch, 2, rows, cols) uint8 planes: tile color, owner
+    tiles, owners = _split(boards)
+    return np.stack((tiles, owners), axis=1).astype(np.uint8)
+
+
+def _split(boards):
+    _require_numpy()
+    boards = np.asarray(boards)
+    if boards.ndim == 4 and boards.shape[1] == 2:
+        return boards[:, 0].astype(np.int16), boards[:, 1].astype(np.int16)
+    if boards.ndim == 3:
+        return boards // 10, boards % 10
+    raise ValueError(f"Expected (batch, rows, cols) boards or (batch, 2, rows, cols) planes, got shape {boards.shape}")
+
+
+def _shift(array, dr, dc):
+    # out[..., r, c] = array[..., r + dr, c + dc], False/0 off the board
+    rows, cols = array.shape[-2:]
+    out = np.zeros_like(array)
+    if abs(dr) >= rows or abs(dc) >= cols:
+        return out
+    out[..., max(0, -dr):rows - max(0, dr), max(0, -dc):cols - max(0, dc)] = \
+        array[..., max(0, dr):rows + min(0, dr), max(0, dc):cols + min(0, dc)]
+    return out
+
+
+@lru_cache(maxsize=None)
+def _inside(rows, cols, dr, dc):
+    # (rows, cols) mask of the squares from which (dr, dc) stays on the board
+    return _shift(np.ones((rows, cols), dtype=bool), dr, dc)
+
+
+def _reach(pawns, tiles, occupied, color):
+    # (dr, dc, reached): reached[b, r, c] when the pawn on (r, c) attacks (r + dr, c + dc),
+    # whatever stands there, for the pawns of one tile color
+    rows, cols = pawns.shape[-2:]
+    if color == BLUE or color == GREEN:
+        for dr, dc in KING_STEPS if color == BLUE else KNIGHT_STEPS:
+            yield dr, dc, pawns & _inside(rows, cols, dr, dc)
+        return
+    stoppers = occupied | (tiles == color)
+    for dr, dc in DIAGONALS if color == YELLOW else LINES:
+        moving = pawns
+        for step in range(1, max(rows, cols)):
+            reached = moving & _inside(rows, cols, step * dr, step * dc)
+            if not reached.any():
+                break
+            yield step * dr, step * dc, reached
+            moving = reached & ~_shift(stoppers, step * dr, step * dc)
+
+
+def _count(mask):
+    return mask.sum(axis=(-2, -1)).astype(np.float64)
+
+
+def feature_matrix(boards, game_type, player=1):
+    # (batch, features) array in the order of FEATURES[game_type]; player: side to move,
+    # one for the whole batch or one per board
+    if game_type not in FEATURES:
+        raise ValueError(f"Unknown game type: {game_type}")
+    tiles, owners = _split(boards)
+    batch, rows, cols = tiles.shape
+    player = np.broadcast_to(np.asarray(player), (batch,))
+    if not np.isin(player, (1, 2)).all():
+        raise ValueError("player must be 1 or 2")
+    to_move = player[:, None, None]
+    own = owners == to_move
+    other = (owners != 0) & ~own
+    occupied = owners != 0
+    playable = (tiles != 0) | occupied
+
+    if game_type == ISOLATION:
+        attacked = np.zeros_like(occupied)
+        for color in (BLUE, GREEN, YELLOW, RED):
+            for dr, dc, reached in _reach(occupied & (tiles == color), tiles, occupied, color):
+                attacked |= _shift(reached, -dr, -dc)
+        free = playable & ~occupied & ~np.isin(tiles, CORNER_TILES)
+        safe = _count(free & ~attacked)
+        return np.column_stack((safe, np.where(safe % 2 == 1, 1.0, -1.0)))
+
+    columns = []
+    if game_type == KATARENGA:
+        columns.append(_count(own) - _count(other))
+
+    # Destinations of each side per tile color: playable squares not held by that side
+    # (Katarenga) or empty (Congress has no captures)
+    sign = np.where(own, 1, -1).astype(np.int8)
+    for color in (BLUE, GREEN, YELLOW, RED):
+        moves = np.zeros((batch, rows, cols), dtype=np.int8)  # per source square
+        for dr, dc, reached in _reach(occupied & (tiles == color), tiles, occupied, color):
+            target = _shift(owners, dr, dc)
+            open_target = target == 0 if game_type == CONGRESS else target != owners
+            moves += reached & _shift(playable, dr, dc) & open_target
+        columns.append(_count(moves * sign))
+
+    if game_type == KATARENGA:
+        row = np.arange(rows)[None, :, None]
+        corners = np.zeros((batch, rows, cols), dtype=bool)
+        if rows >= 10 and cols >= 10:
+            corners[:, [0, 0, rows - 1, rows - 1], [0, cols - 1, 0, cols - 1]] = True
+        # Rows left before the corner entry row (row 1 for player 1, rows - 2 for player 2)
+        progress = np.where(owners == 1, row - 1, rows - 2 - row)
+        top = corners & (row == 0)  # player 1's targets, the bottom ones are player 2's
+        on_target = np.where(owners == 1, top, corners & ~top)  # a pawn on one of its own targets
+        advance = np.where(on_target, 0, rows - 3 - progress)
+        columns.append(_count(np.where(own, advance, 0)) - _count(np.where(other, advance, 0)))
+        columns.append(_count(own & on_target) - _count(other & on_target))
+
+    if game_type == CONGRESS:
+        columns.append(_groups(own) - _groups(other))
+
+    return np.column_stack(columns)
+
+
+def _groups(pawns):
+    # Orthogonally connected groups of pawns per board: every pawn takes the largest
+    # label of its group by repeated neighbour maxima, a group counts once (its top pawn)
+    batch, rows, cols = pawns.shape
+    start = np.where(pawns, np.arange(1, rows * cols + 1).reshape(rows, cols), 0)
+    labels = start
+    while True:
+        spread = labels
+        for dr, dc in LINES:
+            spread = np.maximum(spread, _shift(labels, dr, dc))
+        spread = np.where(pawns, spread, 0)
+        if np.array_equal(spread, labels):
+            break
+        labels = spread
+    return _count(pawns & (labels == start))
+
+
+def evaluate(boards, game_type, player=1, weights=None):
+    # Score of every board for its side to move: (batch,) float64
+    features = feature_matrix(boards, game_type, player)
+    weights = np.asarray(DEFAULT_WEIGHTS[game_type] if weights is None else weights, dtype=np.float64)
+    if weights.shape != (features.shape[1],):
+        raise ValueError(f"Expected {features.shape[1]} weights for this game mode, got {weights.size}")
+    return features @ weights
+
+
+def load_weights(filename=WEIGHTS_FILE):
+    # {game_type: weights} of the modes tuned in the file; {} when there is none
+    if not os.path.exists(filename):
+        return {}
+    try:
+        with open(filename, encoding="utf-8") as f:
+            data = json.load(f)
+        if data.get("format") != WEIGHTS_FORMAT:
+            raise ValueError(f"format {data.get('format')} instead of {WEIGHTS_FORMAT}")
+        weights = {}
+        for name, mode in data.get("modes", {}).items():
+            game_type = GAME_NAMES[name]
+            if tuple(mode["features"]) != FEATURES[game_type]:
+                print(f"Evaluation weights for {name} skipped: other features")
+                continue
+            weights[game_type] = tuple(float(value) for value in mode["weights"])
+        return weights
+    except (OSError, ValueError, KeyError, TypeError) as e:
+        print(f"Evaluation weights not loaded: {e}")
+        return {}
+
+
+def read_weights_file(filename=WEIGHTS_FILE):
+    # Whole file content, or an empty revision 0
+    if not os.path.exists(filename):
+        return {"format": WEIGHTS_FORMAT, "revision": 0, "modes": {}}
+    with open(filename, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def write_weights(tuned, filename=WEIGHTS_FILE):
+    # tuned: {game_type: {"weights": [...], and any details to keep}}; the modes not in
+    # tuned keep their weights, the revision goes up by one. Returns the new revision.
+    data = read_weights_file(filename)
+    data["format"] = WEIGHTS_FORMAT
+    data["revision"] = data.get("revision", 0) + 1
+    modes = data.setdefault("modes", {})
+    for game_type, mode in tuned.items():
+        modes[MODE_NAMES[game_type]] = dict(mode, features=list(FEATURES[game_type]), revision=data["revision"])
+    temp = filename + ".tmp"
+    with open(temp, "w", encoding="utf-8") as f:
+        json.dump(data, f, indent=2)
+    os.replace(temp, filename)
+    return data["revision"]
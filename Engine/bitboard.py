@@ -0,0 +1,187 @@
+# Bitboard move generation for the colored-tile rules.
+# A square is numbered row * cols + col and a set of squares is a plain Python int used
+# as a bit set, so every destination of a pawn comes out of a few AND/OR operations
+# instead of one Moves_rules.verify_move call per target square.
+from functools import lru_cache
+
+BLUE = 1    # king
+GREEN = 2   # knight
+YELLOW = 3  # bishop, stops on yellow
+RED = 4     # rook, stops on red
+
+KING_STEPS = [(dx, dy) for dx in (-1, 0, 1) for dy in (-1, 0, 1) if dx != 0 or dy != 0]
+KNIGHT_STEPS = [(2, 1), (1, 2), (-1, 2), (-2, 1), (-2, -1), (-1, -2), (1, -2), (2, -1)]
+DIAGONALS = [(-1, -1), (-1, 1), (1, -1), (1, 1)]
+LINES = [(-1, 0), (1, 0), (0, -1), (0, 1)]
+
+
+def lowest_bit(mask):
+    return (mask & -mask).bit_length() - 1
+
+
+def highest_bit(mask):
+    return mask.bit_length() - 1
+
+
+def iter_bits(mask):
+    # Yields the square index of every set bit, lowest first
+    while mask:
+        low = mask & -mask
+        yield low.bit_length() - 1
+        mask ^= low
+
+
+class AttackTables:
+    # Precomputed per-square masks for one board size
+
+    def __init__(self, rows, cols):
+        self.rows = rows
+        self.cols = cols
+        self.size = rows * cols
+
+        self.king = [self._step_mask(sq, KING_STEPS) for sq in range(self.size)]
+        self.knight = [self._step_mask(sq, KNIGHT_STEPS) for sq in range(self.size)]
+
+        # rays[direction][sq] = every square from sq (excluded) to the edge
+        self.rays = {d: [self._ray_mask(sq, d) for sq in range(self.size)] for d in DIAGONALS + LINES}
+
+    def _step_mask(self, sq, steps):
+        row, col = divmod(sq, self.cols)
+        mask = 0
+        for dx, dy in steps:
+            r, c = row + dx, col + dy
+            if 0 <= r < self.rows and 0 <= c < self.cols:
+                mask |= 1 << (r * self.cols + c)
+        return mask
+
+    def _ray_mask(self, sq, direction):
+        row, col = divmod(sq, self.cols)
+        dx, dy = direction
+        mask = 0
+        r, c = row + dx, col + dy
+        while 0 <= r < self.rows and 0 <= c < self.cols:
+            mask |= 1 << (r * self.cols + c)
+            r, c = r + dx, c + dy
+        return mask
+
+    def slide(self, sq, directions, stoppers):
+        # Squares reached along each ray, up to and including the first stopper
+        mask = 0
+        for d in directions:
+            ray = self.rays[d][sq]
+            blockers = ray & stoppers
+            if blockers:
+                # Square indices grow along (1, *) and (0, 1), shrink along the others
+                if d[0] > 0 or (d[0] == 0 and d[1] > 0):
+                    first = lowest_bit(blockers)
+                else:
+                    first = highest_bit(blockers)
+                ray ^= self.rays[d][first]
+            mask |= ray
+        return mask
+
+
+@lru_cache(maxsize=None)
+def get_tables(rows, cols):
+    return AttackTables(rows, cols)
+
+
+class BitboardRules:
+    # Same contract as Moves_rules, backed by bit sets.
+    # The position is a snapshot of a list-of-lists board: call load() again, or
+    # set_cell() for each changed square, whenever the board is modified.
+
+    def __init__(self, board=None):
+        self.rows = 0
+        self.cols = 0
+        self.tables = None
+        self.cells = []
+        self.playable = 0        # every square a pawn may end on (value != 0)
+        self.colors = [0] * 7    # one mask per tile color code, corners included
+        self.owners = [0, 0, 0]  # index 1 and 2: squares holding a pawn of that player
+
+        if board is not None:
+            self.load(board)
+
+    def load(self, board):
+        self.rows = len(board)
+        self.cols = len(board[0])
+        self.tables = get_tables(self.rows, self.cols)
+        self.cells = [value for row in board for value in row]
+        self.playable = 0
+        self.colors = [0] * 7
+        self.owners = [0, 0, 0]
+
+        for sq, value in enumerate(self.cells):
+            self._add(sq, value)
+        return self
+
+    def _add(self, sq, value):
+        bit = 1 << sq
+        if value != 0:
+            self.playable |= bit
+        self.colors[value // 10] |= bit
+        if value % 10:
+            self.owners[value % 10] |= bit
+
+    def _remove(self, sq, value):
+        bit = ~(1 << sq)
+        self.playable &= bit
+        self.colors[value // 10] &= bit
+        if value % 10:
+            self.owners[value % 10] &= bit
+
+    def set_cell(self, row, col, value):
+        sq = row * self.cols + col
+        self._remove(sq, self.cells[sq])
+        self.cells[sq] = value
+        self._add(sq, value)
+
+    def square(self, row, col):
+        return row * self.cols + col
+
+    def coords(self, sq):
+        return divmod(sq, self.cols)
+
+    def occupied(self):
+        return self.owners[1] | self.owners[2]
+
+    # Every playable square the tile color on sq can reach, whoever stands there
+    def attacks(self, sq, case_color=None):
+        color = (self.cells[sq] if case_color is None else case_color) // 10
+        tables = self.tables
+
+        if color == BLUE:
+            mask = tables.king[sq]
+        elif color == GREEN:
+            mask = tables.knight[sq]
+        elif color == YELLOW:
+            mask = tables.slide(sq, DIAGONALS, self.occupied() | self.colors[YELLOW])
+        elif color == RED:
+            mask = tables.slide(sq, LINES, self.occupied() | self.colors[RED])
+        else:
+            return 0
+        return mask & self.playable
+
+    # Attacks minus the squares held by the pawn's own side
+    def destinations(self, sq, case_color=None):
+        mask = self.attacks(sq, case_color)
+        owner = self.cells[sq] % 10
+        if owner:
+            mask &= ~self.owners[owner]
+        return mask
+
+    def legal_moves(self, x_start, y_start):
+        mask = self.destinations(self.square(x_start, y_start))
+        return [self.coords(sq) for sq in iter_bits(mask)]
+
+    # Drop-in replacement for Moves_rules.verify_move
+    def verify_move(self, case_color, x_start, y_start, x_end, y_end):
+        if not (0 <= x_end < self.rows and 0 <= y_end < self.cols):
+            return False
+        if (x_start, y_start) == (x_end, y_end):
+            # Moves_rules lets an empty square "move" onto itself with the king and sliding rules
+            value = self.cells[self.square(x_end, y_end)]
+            return value != 0 and value % 10 == 0 and case_color // 10 in (BLUE, YELLOW, RED)
+        mask = self.destinations(self.square(x_start, y_start), case_color)
+        return bool(mask >> self.square(x_end, y_end) & 1)
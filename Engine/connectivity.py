@@ -0,0 +1,100 @@
+# Incremental connectivity of each player's pawns (Congress victory condition).
+# Pawns of one player are grouped with a union-find over orthogonal neighbours and
+# the number of groups is kept up to date:
+#   - a pawn arriving on a square is unioned with its friendly neighbours,
+#   - a pawn leaving a square can split its group, so only that group is re-flooded
+#     from the neighbours of the vacated square.
+# A player is connected when all of their pawns form a single group.
+
+
+class ConnectivityTracker:
+
+    def __init__(self, board):
+        self.rows = len(board)
+        self.cols = len(board[0])
+        size = self.rows * self.cols
+
+        self.owner = [0] * size
+        self.parent = list(range(size))
+        self.components = [0, 0, 0]  # groups per player (index 1 and 2)
+        self.pawns = [0, 0, 0]
+
+        self.neighbours = []
+        for sq in range(size):
+            row, col = divmod(sq, self.cols)
+            self.neighbours.append([r * self.cols + c for r, c in ((row - 1, col), (row + 1, col), (row, col - 1), (row, col + 1))
+                                    if 0 <= r < self.rows and 0 <= c < self.cols])
+
+        for row in range(self.rows):
+            for col in range(self.cols):
+                player = board[row][col] % 10
+                if player:
+                    self._add(row * self.cols + col, player)
+
+    def _find(self, sq):
+        parent = self.parent
+        while parent[sq] != sq:
+            parent[sq] = parent[parent[sq]]
+            sq = parent[sq]
+        return sq
+
+    def _add(self, sq, player):
+        self.owner[sq] = player
+        self.parent[sq] = sq
+        self.pawns[player] += 1
+        self.components[player] += 1
+
+        for neighbour in self.neighbours[sq]:
+            if self.owner[neighbour] == player:
+                root, other = self._find(sq), self._find(neighbour)
+                if root != other:
+                    self.parent[other] = root
+                    self.components[player] -= 1
+
+    def _remove(self, sq):
+        player = self.owner[sq]
+        self.owner[sq] = 0
+        self.parent[sq] = sq
+        self.pawns[player] -= 1
+
+        # The group of sq is replaced by the groups found from its friendly neighbours
+        owner = self.owner
+        groups = 0
+        seen = set()
+        for start in self.neighbours[sq]:
+            if owner[start] != player or start in seen:
+                continue
+            groups += 1
+            seen.add(start)
+            self.parent[start] = start
+            stack = [start]
+            while stack:
+                current = stack.pop()
+                for neighbour in self.neighbours[current]:
+                    if owner[neighbour] == player and neighbour not in seen:
+                        seen.add(neighbour)
+                        self.parent[neighbour] = start
+                        stack.append(neighbour)
+        self.components[player] += groups - 1
+
+    def move(self, from_pos, to_pos):
+        # Pawn of whoever stands on from_pos moves to the free square to_pos
+        from_sq = from_pos[0] * self.cols + from_pos[1]
+        player = self.owner[from_sq]
+        self._remove(from_sq)
+        self._add(to_pos[0] * self.cols + to_pos[1], player)
+
+    def place(self, row, col, player):
+        self._add(row * self.cols + col, player)
+
+    def remove(self, row, col):
+        self._remove(row * self.cols + col)
+
+    def component_count(self, player):
+        return self.components[player]
+
+    def pawn_count(self, player):
+        return self.pawns[player]
+
+    def is_connected(self, player):
+        return self.pawns[player] > 0 and self.components[player] == 1
@@ -0,0 +1,44 @@
+# Compact board: one byte per cell (color * 10 + owner), row by row, with its hash.
+# The hash is the Zobrist hash of the list-of-lists board (Engine.zobrist.hash_cells), so
+# equal positions hash alike in both formats and a FlatBoard can key a dict or a set.
+# It is immutable: make one from a list-of-lists board or from stored bytes, get the
+# lists back to play on. GameState.snapshot() gives one; the self-play positions of
+# Tools.tournament.play_game are kept that way, and Tools.tune ships them between
+# processes as to_bytes().
+from Engine.zobrist import hash_cells
+
+
+class FlatBoard:
+    __slots__ = ("rows", "cols", "cells", "key")
+
+    def __init__(self, rows, cols, cells):
+        # cells: bytes of the rows * cols cell values, row by row
+        if len(cells) != rows * cols:
+            raise ValueError(f"A {rows}x{cols} board has {rows * cols} cells, not {len(cells)}")
+        self.rows = rows
+        self.cols = cols
+        self.cells = bytes(cells)
+        self.key = hash_cells(self.cells)
+
+    @classmethod
+    def from_lists(cls, board):
+        return cls(len(board), len(board[0]), bytes(value for row in board for value in row))
+
+    def to_lists(self):
+        cells, cols = self.cells, self.cols
+        return [list(cells[start:start + cols]) for start in range(0, self.rows * cols, cols)]
+
+    @classmethod
+    def from_bytes(cls, rows, cols, data):
+        # One byte per cell, row by row, holding color * 10 + owner
+        return cls(rows, cols, data)
+
+    def to_bytes(self):
+        return self.cells
+
+    def __eq__(self, other):
+        return (isinstance(other, FlatBoard) and self.key == other.key
+                and self.rows == other.rows and self.cells == other.cells)
+
+    def __hash__(self):
+        return self.key
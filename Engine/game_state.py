@@ -0,0 +1,280 @@
+# Headless game state for Katarenga, Congress and Isolation, with no pygame import.
+# A GameState owns a board in the color * 10 + owner encoding, the side to move and the
+# incremental helpers of its mode: a bitboard snapshot for move generation, the Zobrist
+# hash, the attack map (Isolation) and the pawn connectivity (Congress).
+# Moves are played with make_move and taken back with unmake_move, so AI search,
+# simulations and servers can run whole games without a display. Internally a move is
+# a packed int and the undo stack holds one int per move (movegen.encode_undo), so
+# taking moves back never copies the board; undo/redo for the games come with it. The pygame games and
+# the network session build on it.
+from array import array
+
+from Engine.bitboard import BitboardRules
+from Engine.attack_map import AttackMap
+from Engine.connectivity import ConnectivityTracker
+from Engine.zobrist import Zobrist
+from Engine.flat_board import FlatBoard
+from Engine import movegen
+from Engine.movegen import KATARENGA, CONGRESS, ISOLATION, NO_SQUARE, CAPTURE, PLACEMENT, CORNER
+from Engine.movegen import encode_undo, decode_undo
+
+CORNER_TILES = (5, 6)
+
+# Congress start: player 2 (black) and player 1 (white) pawns on the 8x8 board
+CONGRESS_PAWNS = {
+    2: [(0, 1), (0, 4), (1, 7), (3, 0), (4, 7), (6, 0), (7, 3), (7, 6)],
+    1: [(0, 3), (0, 6), (1, 0), (3, 7), (4, 0), (6, 7), (7, 1), (7, 4)],
+}
+
+
+def setup_katarenga(board):
+    # Copy of a 10x10 bordered board with player 2 on row 1 and player 1 on row 8
+    new_board = [row[:] for row in board]
+    last = len(new_board) - 2
+    for col in range(1, len(new_board[0]) - 1):
+        new_board[1][col] = new_board[1][col] // 10 * 10 + 2
+        new_board[last][col] = new_board[last][col] // 10 * 10 + 1
+    return new_board
+
+
+def setup_congress(board):
+    # Copy of an 8x8 board cleared of pawns, with the fixed Congress start
+    new_board = [[value // 10 * 10 for value in row] for row in board]
+    for player, squares in CONGRESS_PAWNS.items():
+        for row, col in squares:
+            if row < len(new_board) and col < len(new_board[0]):
+                new_board[row][col] = new_board[row][col] // 10 * 10 + player
+    return new_board
+
+
+def setup_board(game_type, board):
+    # Start position of a game mode from a board of tiles (Isolation starts empty)
+    if game_type == KATARENGA:
+        return setup_katarenga(board)
+    if game_type == CONGRESS:
+        return setup_congress(board)
+    return [row[:] for row in board]
+
+
+def katarenga_winner(bb):
+    # 0, or the player who eliminated the other side or holds both far corners
+    if not bb.owners[1]:
+        return 2
+    if not bb.owners[2]:
+        return 1
+    if bb.rows >= 10 and bb.cols >= 10:
+        cells = bb.cells
+        last = (bb.rows - 1) * bb.cols
+        if cells[last] % 10 == 2 and cells[last + bb.cols - 1] % 10 == 2:
+            return 2
+        if cells[0] % 10 == 1 and cells[bb.cols - 1] % 10 == 1:
+            return 1
+    return 0
+
+
+def congress_winner(connectivity):
+    # 0, or the first player whose pawns are all orthogonally connected
+    for player in (1, 2):
+        if connectivity.is_connected(player):
+            return player
+    return 0
+
+
+def isolation_winner(attack_map, mover):
+    # The player who placed last wins once no safe square is left
+    return 0 if attack_map.can_play() else mover
+
+
+class GameState:
+
+    def __init__(self, game_type, board, player=1):
+        # board is used as is (not copied): see new_game for a fresh start position
+        if game_type not in (KATARENGA, CONGRESS, ISOLATION):
+            raise ValueError(f"Unknown game type: {game_type}")
+        if not board:
+            raise ValueError("Board can't be None")
+
+        self.game_type = game_type
+        self.board = board
+        self.rows = len(board)
+        self.cols = len(board[0])
+        self.current_player = player
+
+        self.attack_map = AttackMap(board) if game_type == ISOLATION else None
+        self.connectivity = ConnectivityTracker(board) if game_type == CONGRESS else None
+        # Isolation shares the attack map's bitboards, which it keeps up to date
+        self.bb = self.attack_map.bb if self.attack_map else BitboardRules(board)
+        self.zobrist = Zobrist(board, player)
+
+        self.history = array('L')  # undo words of the moves played, see movegen.encode_undo
+        self.redo_stack = []       # packed moves taken back with undo
+        self.move_count = 0
+        self.winner = 0
+
+    @classmethod
+    def new_game(cls, game_type, board):
+        return cls(game_type, setup_board(game_type, board), 1)
+
+    def snapshot(self):
+        # Compact copy of the position (FlatBoard), for positions kept in memory or on disk
+        return FlatBoard.from_lists(self.board)
+
+    def copy(self):
+        # Independent state on a copy of the board (the undo history is not kept)
+        other = GameState(self.game_type, [row[:] for row in self.board], self.current_player)
+        other.move_count = self.move_count
+        other.winner = self.winner
+        return other
+
+    @property
+    def key(self):
+        return self.zobrist.value
+
+    @property
+    def last_move(self):
+        # (from_pos or None, to_pos) of the last move played, or None at the start
+        if not self.history:
+            return None
+        return movegen.unpack_move(decode_undo(self.history[-1])[0], self.cols)
+
+    def is_over(self):
+        return self.winner != 0
+
+    def packed_moves(self, moves=None):
+        # Legal moves as (from_sq << 8) | to_sq in an array('H'), see Engine.movegen;
+        # moves: array to refill, so search loops can reuse one buffer per ply
+        if self.winner:
+            if moves is None:
+                return array('H')
+            del moves[:]
+            return moves
+        return movegen.generate_moves(self.bb, self.game_type, self.current_player, moves)
+
+    def legal_moves(self):
+        # Legal moves as ((row, col) or None, (row, col))
+        return [movegen.unpack_move(move, self.cols) for move in self.packed_moves()]
+
+    def has_moves(self, player=None):
+        return movegen.has_moves(self.bb, self.game_type, player or self.current_player)
+
+    def pack(self, from_pos, to_pos):
+        from_sq = NO_SQUARE if from_pos is None else from_pos[0] * self.cols + from_pos[1]
+        return movegen.pack_move(from_sq, to_pos[0] * self.cols + to_pos[1])
+
+    def is_legal(self, from_pos, to_pos):
+        if self.winner:
+            return False
+        if self.game_type == ISOLATION:
+            return from_pos is None and self.attack_map.is_safe(*to_pos)
+        if from_pos is None:
+            return False
+        return self.pack(from_pos, to_pos) in self.packed_moves()
+
+    def make_move(self, from_pos, to_pos):
+        # Plays a legal move for the side to move, returns the winner (0 while the game goes on).
+        # A new move drops the moves that were undone.
+        self.redo_stack.clear()
+        return self.make(self.pack(from_pos, to_pos))
+
+    def unmake_move(self):
+        return self.unmake()
+
+    def make(self, move):
+        # Plays a packed legal move and pushes its undo word
+        player = self.current_player
+        board = self.board
+        from_sq, to_sq = move >> 8, move & 0xFF
+        to_row, to_col = divmod(to_sq, self.cols)
+        old_to = board[to_row][to_col]
+        captured = old_to % 10
+
+        flags = CAPTURE if captured else 0
+        if old_to // 10 in CORNER_TILES:
+            flags |= CORNER
+        if from_sq == NO_SQUARE:
+            flags |= PLACEMENT
+            from_pos = None
+        else:
+            from_pos = divmod(from_sq, self.cols)
+            old_from = board[from_pos[0]][from_pos[1]]
+            self._set_cell(from_pos[0], from_pos[1], old_from, old_from // 10 * 10)
+
+        new_to = old_to // 10 * 10 + player
+        if self.attack_map:
+            board[to_row][to_col] = new_to
+            self.zobrist.set_cell(to_row, to_col, old_to, new_to)
+            self.attack_map.place(to_row, to_col, player)
+        else:
+            self._set_cell(to_row, to_col, old_to, new_to)
+        if self.connectivity:
+            self.connectivity.move(from_pos, (to_row, to_col))
+
+        self.history.append(encode_undo(move, captured, flags, self.winner))
+        self.zobrist.switch_side()
+        self.current_player = 3 - player
+        self.move_count += 1
+        self.winner = self._winner(player)
+        return self.winner
+
+    def unmake(self):
+        # Takes back the last move, returns it packed
+        move, captured, flags, winner = decode_undo(self.history.pop())
+        player = 3 - self.current_player
+        board = self.board
+        to_row, to_col = divmod(move & 0xFF, self.cols)
+        old_to = board[to_row][to_col] // 10 * 10 + captured
+
+        if flags & PLACEMENT:
+            from_pos = None
+        else:
+            from_pos = divmod(move >> 8, self.cols)
+        if self.connectivity:
+            self.connectivity.move((to_row, to_col), from_pos)
+        if self.attack_map:
+            self.zobrist.set_cell(to_row, to_col, board[to_row][to_col], old_to)
+            board[to_row][to_col] = old_to
+            self.attack_map.remove(to_row, to_col)
+        else:
+            self._set_cell(to_row, to_col, board[to_row][to_col], old_to)
+        if from_pos is not None:
+            old_from = board[from_pos[0]][from_pos[1]]
+            self._set_cell(from_pos[0], from_pos[1], old_from, old_from + player)
+
+        self.zobrist.switch_side()
+        self.current_player = player
+        self.move_count -= 1
+        self.winner = winner
+        return move
+
+    def undo(self):
+        # Takes back the last move and keeps it for redo; False if there is none
+        if not self.history:
+            return False
+        self.redo_stack.append(self.unmake())
+        return True
+
+    def redo(self):
+        # Plays again the last move undone; False if there is none
+        if not self.redo_stack:
+            return False
+        self.make(self.redo_stack.pop())
+        return True
+
+    def _set_cell(self, row, col, old_value, new_value):
+        self.board[row][col] = new_value
+        self.bb.set_cell(row, col, new_value)
+        self.zobrist.set_cell(row, col, old_value, new_value)
+
+    def _winner(self, mover):
+        if self.game_type == ISOLATION:
+            return isolation_winner(self.attack_map, mover)
+
+        if self.game_type == KATARENGA:
+            winner = katarenga_winner(self.bb)
+        else:
+            winner = congress_winner(self.connectivity)
+        if winner:
+            return winner
+
+        # A side left without a legal move loses
+        return 0 if self.has_moves(3 - mover) else mover
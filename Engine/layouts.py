@@ -0,0 +1,92 @@
+# Board layouts outside the editor: four 4x4 squares from game_data.json assembled into
+# the 8x8 board (top left, top right, bottom left, bottom right), with the border and
+# corners added for Katarenga, and pawn moves played on a copy of a list-of-lists board.
+# Used by the command-line tools, the book, the tablebase and the AIs.
+import hashlib
+import json
+import os
+
+from Board.Board import Board
+from Engine.movegen import KATARENGA
+
+DATA_FILE = "game_data.json"
+QUADRANTS = ((0, 0), (0, 4), (4, 0), (4, 4))
+GAME_NAMES = {"katarenga": 1, "congress": 2, "isolation": 3}
+
+
+def load_squares(filename=DATA_FILE):
+    # name -> 4x4 square; the built-in defaults when the file is missing or empty
+    if os.path.exists(filename) and os.path.getsize(filename) > 0:
+        with open(filename, 'r') as f:
+            squares = json.load(f).get("square", {})
+        if squares:
+            return squares
+    return Board().get_square_list()
+
+
+def assemble(squares):
+    # 8x8 board of tiles from four 4x4 squares
+    board = [[0] * 8 for _ in range(8)]
+    for square, (top, left) in zip(squares, QUADRANTS):
+        for row in range(4):
+            for col in range(4):
+                board[top + row][left + col] = square[row][col] // 10 * 10
+    return board
+
+
+def game_board(game_type, board):
+    # Tiles of a game mode from an 8x8 board, without pawns: see Engine.game_state.setup_board
+    board = [row[:] for row in board]
+    if game_type == KATARENGA:
+        board = Board().add_border_and_corners(board)
+    return board
+
+
+def build_board(game_type, squares):
+    return game_board(game_type, assemble(squares))
+
+
+def play_move(board, move):
+    # Copy of board after the pawn move ((from_row, from_col), (to_row, to_col))
+    (from_row, from_col), (to_row, to_col) = move
+    board = [row[:] for row in board]
+    board[to_row][to_col] = board[to_row][to_col] // 10 * 10 + board[from_row][from_col] % 10
+    board[from_row][from_col] = board[from_row][from_col] // 10 * 10
+    return board
+
+
+def layout_id(tiles):
+    # Stable ID of an 8x8 board of tiles (pawns ignored), the same in every process and run
+    return hashlib.sha1(bytes(value // 10 for row in tiles for value in row)).hexdigest()[:16]
+
+
+def default_layout(square_list):
+    # "a,b,c,d" spec of the first four squares: the defaults of game_data.json, or the
+    # built-in ones ("default 1"...) when the file is missing
+    names = list(square_list)[:4]
+    if not names:
+        raise ValueError("No squares to build a layout from")
+    return ",".join(names)
+
+
+def parse_layout(spec, square_list):
+    # "a,b,c,d" names the four squares, a single name is used for all four
+    names = [name.strip() for name in spec.split(",")]
+    if len(names) == 1:
+        names *= 4
+    if len(names) != 4:
+        raise ValueError(f"A layout needs 1 or 4 square names, got {len(names)}")
+    for name in names:
+        if name not in square_list:
+            raise ValueError(f"Unknown square '{name}' (known: {', '.join(square_list)})")
+    return [square_list[name] for name in names]
+
+
+def parse_game(name):
+    # Game mode from a name or a number
+    key = str(name).lower()
+    if key in GAME_NAMES:
+        return GAME_NAMES[key]
+    if key in ("1", "2", "3"):
+        return int(key)
+    raise ValueError(f"Unknown game mode: {name}")
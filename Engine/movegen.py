@@ -0,0 +1,149 @@
+# Whole-position legal move generation for the three game modes.
+# All legal moves of one side come out of a single call on a BitboardRules snapshot:
+# each pawn contributes one destination mask, and Isolation placements are the free
+# squares minus the union of every pawn's attack mask.
+# Moves are packed as (from_sq << 8) | to_sq in an array('H'); placements use NO_SQUARE as source.
+# A played move is recorded as an undo word: the packed move plus the owner it captured,
+# flags and the winner before the move, which is all make/unmake needs to restore a position.
+from array import array
+
+from Engine.bitboard import BitboardRules, iter_bits
+
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    np = None
+    NUMPY_AVAILABLE = False
+
+KATARENGA = 1
+CONGRESS = 2
+ISOLATION = 3
+
+NO_SQUARE = 0xFF
+
+# Undo word flags
+CAPTURE = 1
+PLACEMENT = 2
+CORNER = 4
+
+
+def pack_move(from_sq, to_sq):
+    return (from_sq << 8) | to_sq
+
+
+def encode_undo(move, captured, flags, winner):
+    # 16-bit move | captured owner (2 bits) | flags (3 bits) | previous winner (2 bits)
+    return move | captured << 16 | flags << 18 | winner << 21
+
+
+def decode_undo(word):
+    # (move, captured owner, flags, previous winner)
+    return word & 0xFFFF, word >> 16 & 3, word >> 18 & 7, word >> 21 & 3
+
+
+def unpack_move(move, cols):
+    # Packed move -> ((row, col) or None, (row, col)), the format used by NetworkGameLogic
+    from_sq, to_sq = move >> 8, move & 0xFF
+    from_pos = None if from_sq == NO_SQUARE else divmod(from_sq, cols)
+    return from_pos, divmod(to_sq, cols)
+
+
+def corner_entries(bb, player):
+    # Katarenga: a pawn on the last row before the opponent's side may step into either corner
+    if bb.rows < 10 or bb.cols < 10:
+        return 0, 0
+    if player == 1:
+        row, corners = 1, (bb.square(0, 0), bb.square(0, bb.cols - 1))
+    else:
+        row, corners = bb.rows - 2, (bb.square(bb.rows - 1, 0), bb.square(bb.rows - 1, bb.cols - 1))
+
+    entry_row = 0
+    for col in range(1, bb.cols - 1):
+        entry_row |= 1 << bb.square(row, col)
+    return entry_row, (1 << corners[0]) | (1 << corners[1])
+
+
+def attacked_squares(bb):
+    # Union of the attack masks of every pawn on the board, both colors included
+    attacked = 0
+    for sq in iter_bits(bb.occupied()):
+        attacked |= bb.attacks(sq)
+    return attacked
+
+
+def placement_mask(bb):
+    # Isolation: free tiles that no pawn attacks (borders and corners excluded)
+    free = bb.playable & ~bb.occupied() & ~bb.colors[5] & ~bb.colors[6]
+    return free & ~attacked_squares(bb)
+
+
+def destination_masks(bb, game_type, player):
+    # Yields (from_sq, destination mask) for every pawn of player with at least one move
+    own = bb.owners[player]
+    empty = bb.playable & ~bb.occupied()
+
+    if game_type == KATARENGA:
+        entry_row, corners = corner_entries(bb, player)
+        corners &= ~own
+    else:
+        entry_row = corners = 0
+
+    for sq in iter_bits(own):
+        mask = bb.destinations(sq)
+        if game_type == CONGRESS:
+            mask &= empty  # Congress has no captures
+        elif entry_row >> sq & 1:
+            mask |= corners
+        if mask:
+            yield sq, mask
+
+
+def generate_moves(bb, game_type, player, moves=None):
+    # moves: array('H') to refill instead of allocating a new one
+    if moves is None:
+        moves = array('H')
+    else:
+        del moves[:]
+    if game_type == ISOLATION:
+        for sq in iter_bits(placement_mask(bb)):
+            moves.append(pack_move(NO_SQUARE, sq))
+    elif game_type in (KATARENGA, CONGRESS):
+        for from_sq, mask in destination_masks(bb, game_type, player):
+            for to_sq in iter_bits(mask):
+                moves.append(pack_move(from_sq, to_sq))
+    return moves
+
+
+def count_moves(bb, game_type, player):
+    if game_type == ISOLATION:
+        return bin(placement_mask(bb)).count("1")
+    return sum(bin(mask).count("1") for _, mask in destination_masks(bb, game_type, player))
+
+
+def has_moves(bb, game_type, player):
+    if game_type == ISOLATION:
+        return placement_mask(bb) != 0
+    return next(destination_masks(bb, game_type, player), None) is not None
+
+
+def legal_move_mask(bb, game_type, player):
+    # NumPy boolean view of the legal moves: (size, size) from/to matrix,
+    # or a flat (size,) placement mask for Isolation
+    if not NUMPY_AVAILABLE:
+        raise RuntimeError("NumPy is required for legal_move_mask")
+
+    size = bb.rows * bb.cols
+    moves = np.frombuffer(generate_moves(bb, game_type, player), dtype=np.uint16)
+    if game_type == ISOLATION:
+        mask = np.zeros(size, dtype=bool)
+        mask[moves & 0xFF] = True
+    else:
+        mask = np.zeros((size, size), dtype=bool)
+        mask[moves >> 8, moves & 0xFF] = True
+    return mask
+
+
+def legal_moves_from_board(board, game_type, player):
+    bb = BitboardRules(board)
+    return [unpack_move(move, bb.cols) for move in generate_moves(bb, game_type, player)]
@@ -0,0 +1,122 @@
+# Opening book: the best move found offline (Tools.opening_book) for the early positions
+# of a layout, looked up before the AI searches.
+# Positions are keyed by symmetry.canonical_position: the Zobrist hash of the position
+# turned to its canonical orientation for the game mode. The hash covers the tiles, so
+# it identifies the canonical layout as well as the pawns and the side to move, and one
+# file can hold the books of many layouts; mirrored layouts share entries. Moves are
+# stored in the canonical orientation and turned back on lookup.
+# File: a 16-byte header (magic, version, entry count) then fixed 12-byte entries
+# (key, packed move, score) sorted by key. The file is memory-mapped and searched by
+# bisection, so opening it costs nothing and processes share the pages.
+import mmap
+import os
+import struct
+
+from Engine.layouts import play_move
+from Engine.symmetry import canonical_position, transform_move, inverse
+
+BOOK_FILE = "opening_book.bin"
+MAGIC = b"KBOOK\0"
+VERSION = 1
+HEADER = struct.Struct("<6sHQ")
+ENTRY = struct.Struct("<QHh")
+SCORE_LIMIT = 32767
+
+
+def pack_move(move, cols):
+    (from_row, from_col), (to_row, to_col) = move
+    return (from_row * cols + from_col) << 8 | (to_row * cols + to_col)
+
+
+def unpack_move(packed, cols):
+    return divmod(packed >> 8, cols), divmod(packed & 0xFF, cols)
+
+
+def write_book(entries, filename=BOOK_FILE):
+    # entries: {key: (packed move, score)}; replaces the file in one step
+    temp = filename + ".tmp"
+    with open(temp, "wb") as f:
+        f.write(HEADER.pack(MAGIC, VERSION, len(entries)))
+        for key in sorted(entries):
+            move, score = entries[key]
+            f.write(ENTRY.pack(key, move, max(-SCORE_LIMIT, min(SCORE_LIMIT, int(score)))))
+    os.replace(temp, filename)
+
+
+class OpeningBook:
+
+    def __init__(self, filename=BOOK_FILE):
+        self.filename = filename
+        self.count = 0
+        self.data = None
+        self.hits = 0
+        self.misses = 0
+        with open(filename, "rb") as f:
+            if os.path.getsize(filename) > HEADER.size:
+                self.data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if self.data is not None:
+            magic, version, self.count = HEADER.unpack_from(self.data, 0)
+            if magic != MAGIC or version != VERSION:
+                raise ValueError(f"'{filename}' is not an opening book of version {VERSION}")
+            if HEADER.size + self.count * ENTRY.size > len(self.data):
+                raise ValueError(f"'{filename}' is truncated")
+
+    @classmethod
+    def open_existing(cls, filename=BOOK_FILE):
+        # The book, or None when there is no usable file
+        if not os.path.exists(filename):
+            return None
+        try:
+            return cls(filename)
+        except (OSError, ValueError) as e:
+            print(f"Opening book not loaded: {e}")
+            return None
+
+    def close(self):
+        if self.data is not None:
+            self.data.close()
+            self.data = None
+
+    def __len__(self):
+        return self.count
+
+    def entry(self, index):
+        return ENTRY.unpack_from(self.data, HEADER.size + index * ENTRY.size)
+
+    def probe_key(self, key):
+        # (packed move, score) stored for key, or None
+        low, high = 0, self.count
+        while low < high:
+            middle = (low + high) // 2
+            if self.entry(middle)[0] < key:
+                low = middle + 1
+            else:
+                high = middle
+        if low < self.count:
+            entry_key, move, score = self.entry(low)
+            if entry_key == key:
+                return move, score
+        return None
+
+    def probe(self, board, player, game_type):
+        # Book move for player on a list-of-lists board, as ((from_row, from_col), (to_row, to_col)), or None
+        key, transform = canonical_position(board, player, game_type)
+        entry = self.probe_key(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        rows, cols = len(board), len(board[0])
+        return transform_move(unpack_move(entry[0], cols), rows, cols, inverse(transform))
+
+    def probe_reply(self, board, player, game_type, move):
+        # Book answer of the opponent once player played move, or None
+        return self.probe(play_move(board, move), 3 - player, game_type)
+
+    def items(self):
+        for index in range(self.count):
+            key, move, score = self.entry(index)
+            yield key, (move, score)
+
+    def get_stats(self):
+        return {"entries": self.count, "hits": self.hits, "misses": self.misses}
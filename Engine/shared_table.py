@@ -0,0 +1,157 @@
+# Transposition table in shared memory, for search processes working on the same position.
+# Same layout and replacement as Engine.transposition (two-slot buckets: slot 0 keeps the
+# deepest entry, slot 1 the last one stored), but the values are KatarengaAI's search
+# results, (score, flag, packed move or None), packed into fixed-size entries:
+#   check word  key ^ data, 64 bits
+#   data word   move (16 bits) | score + 2^31 (32 bits) | depth (8 bits) | flag (2 bits) | used bit
+# There are no locks. Two processes writing the same entry at once can leave the check
+# word of one and the data word of the other; the entry then fails key == check ^ data
+# and reads as a miss, so a torn entry is never returned for the wrong position.
+# The creating process owns the memory block and unlinks it on close; the others
+# attach to it by name (SharedTranspositionTable.attach) and only close their view.
+# Hit/miss/store counters are per process. The entries in use can only be counted by
+# reading the whole block, so len() is O(capacity) and get_stats leaves it out unless asked.
+import struct
+from multiprocessing import shared_memory
+
+ENTRY = struct.Struct("<QQ")
+ENTRY_SIZE = ENTRY.size
+KEY_MASK = (1 << 64) - 1
+NO_MOVE = 0xFFFF
+SCORE_BIAS = 1 << 31
+MAX_DEPTH = 0xFF
+USED = 1 << 63
+
+
+def pack_entry(score, flag, move, depth):
+    return (NO_MOVE if move is None else move) | (int(score) + SCORE_BIAS) << 16 \
+        | min(max(depth, 0), MAX_DEPTH) << 48 | flag << 56 | USED
+
+
+def unpack_entry(data):
+    # (depth, (score, flag, move))
+    move = data & 0xFFFF
+    score = (data >> 16 & 0xFFFFFFFF) - SCORE_BIAS
+    return data >> 48 & MAX_DEPTH, (score, data >> 56 & 3, None if move == NO_MOVE else move)
+
+
+class SharedTranspositionTable:
+
+    def __init__(self, buckets=1 << 16, name=None):
+        # A new table of buckets two-slot buckets, or the existing one called name
+        self.buckets = buckets
+        self.owner = name is None
+        if self.owner:
+            self.memory = shared_memory.SharedMemory(create=True, size=2 * buckets * ENTRY_SIZE)
+        else:
+            self.memory = shared_memory.SharedMemory(name=name)
+            if self.memory.size < 2 * buckets * ENTRY_SIZE:
+                self.memory.close()
+                raise ValueError(f"Shared table '{name}' is smaller than {buckets} buckets")
+        self.name = self.memory.name
+        self.buffer = self.memory.buf
+
+        self.hits = 0
+        self.misses = 0
+        self.stores = 0
+        self.replacements = 0
+
+    @classmethod
+    def attach(cls, name, buckets):
+        return cls(buckets, name)
+
+    def _read(self, index):
+        # (key, data) of an entry, (0, 0) when it is empty
+        check, data = ENTRY.unpack_from(self.buffer, index * ENTRY_SIZE)
+        return (check ^ data, data) if data & USED else (0, 0)
+
+    def _write(self, index, key, data):
+        ENTRY.pack_into(self.buffer, index * ENTRY_SIZE, key ^ data, data)
+
+    def _find(self, key):
+        # Data word stored for key, 0 if none
+        slot = (key % self.buckets) * 2
+        for index in (slot, slot + 1):
+            stored, data = self._read(index)
+            if data and stored == key:
+                return data
+        return 0
+
+    def probe_entry(self, key):
+        # (depth, (score, flag, move)) stored for key, or None
+        data = self._find(key & KEY_MASK)
+        if not data:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return unpack_entry(data)
+
+    def probe(self, key, default=None):
+        entry = self.probe_entry(key)
+        return default if entry is None else entry[1]
+
+    def store(self, key, value, depth=0):
+        key &= KEY_MASK
+        slot = (key % self.buckets) * 2
+        data = pack_entry(*value, depth)
+        first_key, first = self._read(slot)
+        second_key, second = self._read(slot + 1)
+        self.stores += 1
+
+        # Same position already stored: update it in place
+        if first and first_key == key:
+            if depth >= first >> 48 & MAX_DEPTH:
+                self._write(slot, key, data)
+            return
+        if second and second_key == key:
+            self._write(slot + 1, key, data)
+            return
+
+        if not first:
+            self._write(slot, key, data)
+            return
+        if second:
+            self.replacements += 1
+        if depth >= first >> 48 & MAX_DEPTH:
+            # Deeper result: it takes the depth-preferred slot, the old one moves down
+            self._write(slot + 1, first_key, first)
+            self._write(slot, key, data)
+        else:
+            self._write(slot + 1, key, data)
+
+    def __contains__(self, key):
+        return bool(self._find(key & KEY_MASK))
+
+    def __len__(self):
+        entries = self.buffer[:2 * self.buckets * ENTRY_SIZE]
+        return sum(1 for _, data in ENTRY.iter_unpack(entries) if data & USED)
+
+    def clear(self):
+        self.buffer[:] = bytes(len(self.buffer))
+        self.hits = self.misses = self.stores = self.replacements = 0
+
+    def close(self):
+        # Release this process's view; the owner also frees the memory
+        if self.buffer is None:
+            return
+        self.buffer = None
+        self.memory.close()
+        if self.owner:
+            self.memory.unlink()
+
+    def hit_rate(self):
+        probes = self.hits + self.misses
+        return self.hits / probes if probes else 0.0
+
+    def get_stats(self, entries=False):
+        stats = {
+            'capacity': 2 * self.buckets,
+            'hits': self.hits,
+            'misses': self.misses,
+            'stores': self.stores,
+            'replacements': self.replacements,
+            'hit_rate': self.hit_rate(),
+        }
+        if entries:
+            stats['entries'] = len(self)
+        return stats
@@ -0,0 +1,141 @@
+# Symmetries of squares and boards: the eight orientations of the dihedral group D4.
+# A transform is an int 0-7: bit 2 flips the board horizontally first (Board.flip_horizontal),
+# then the board turns (transform % 4) quarter turns clockwise (Board.rotate_right).
+# The canonical form of a board is the smallest of its transformed copies, compared as
+# tuples of rows; it comes back with the transform that produced it so moves and squares
+# can be mapped between the two. Results are cached by board contents.
+# Not every orientation keeps a game the same: the starting rows, the corners and the
+# side that moves first are tied to the board. GAME_GROUPS lists the orientations that
+# keep each mode's start position, so canonical_position only merges true transpositions:
+#   Katarenga  left-right mirror (the pawn rows and the corner pairs stay in place)
+#   Congress   the four rotations (the start position turns into itself)
+#   Isolation  all eight (the board starts empty)
+# Squares in the catalog can be placed in any orientation, so squares always use D4.
+from functools import lru_cache
+
+from Engine.movegen import KATARENGA, CONGRESS, ISOLATION
+from Engine.zobrist import hash_cells
+
+IDENTITY = 0
+FLIP = 4
+D4 = tuple(range(8))
+ROTATIONS = (0, 1, 2, 3)
+MIRROR = (IDENTITY, FLIP)
+GAME_GROUPS = {KATARENGA: MIRROR, CONGRESS: ROTATIONS, ISOLATION: D4}
+TRANSFORM_NAMES = ("identity", "rotate 90", "rotate 180", "rotate 270",
+                   "flip", "flip + rotate 90", "flip + rotate 180", "flip + rotate 270")
+
+CACHE_SIZE = 1 << 14
+
+
+def inverse(transform):
+    # Rotations undo each other, every flipped transform is a reflection and undoes itself
+    return transform if transform & FLIP else (4 - transform) % 4
+
+
+def compose(first, second):
+    # Transform equal to applying first, then second
+    coords = [(0, 0), (0, 1), (1, 1)]  # no symmetry of a 3x3 grid keeps all three
+    target = [transform_coords(*transform_coords(row, col, 3, 3, first), 3, 3, second) for row, col in coords]
+    for transform in D4:
+        if [transform_coords(row, col, 3, 3, transform) for row, col in coords] == target:
+            return transform
+
+
+def transform_coords(row, col, rows, cols, transform):
+    # Position of (row, col) once the rows x cols board is transformed
+    if transform & FLIP:
+        col = cols - 1 - col
+    for _ in range(transform % 4):
+        row, col = col, rows - 1 - row
+        rows, cols = cols, rows
+    return row, col
+
+
+@lru_cache(maxsize=None)
+def permutation(rows, cols, transform):
+    # perm[i] = flat index (row * cols + col) of the cell that lands on flat index i
+    if transform % 2 and rows != cols:
+        raise ValueError("Only square boards can be turned a quarter turn")
+    perm = [0] * (rows * cols)
+    for row in range(rows):
+        for col in range(cols):
+            new_row, new_col = transform_coords(row, col, rows, cols, transform)
+            perm[new_row * cols + new_col] = row * cols + col
+    return tuple(perm)
+
+
+def transform_board(board, transform):
+    # Transformed copy of a list-of-lists board, as lists
+    rows, cols = len(board), len(board[0])
+    cells = [value for row in board for value in row]
+    flat = [cells[index] for index in permutation(rows, cols, transform)]
+    return [flat[row * cols:(row + 1) * cols] for row in range(rows)]
+
+
+def _freeze(board):
+    return tuple(tuple(row) for row in board)
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def _canonical(board, group):
+    rows, cols = len(board), len(board[0])
+    cells = [value for row in board for value in row]
+    best, best_transform = None, IDENTITY
+    for transform in group:
+        if transform % 2 and rows != cols:
+            continue
+        flat = tuple(cells[index] for index in permutation(rows, cols, transform))
+        if best is None or flat < best:
+            best, best_transform = flat, transform
+    return tuple(best[row * cols:(row + 1) * cols] for row in range(rows)), best_transform
+
+
+def canonical_form(board, group=D4):
+    # (canonical board as a tuple of row tuples, transform taking board to it)
+    return _canonical(_freeze(board), tuple(group))
+
+
+def canonical_square(square):
+    # 4x4 square of the catalog under all eight orientations
+    return canonical_form(square, D4)
+
+
+def canonical_layout(board, game_type=None):
+    # Board of tiles under the orientations that keep game_type the same (all eight without one)
+    return canonical_form(board, GAME_GROUPS.get(game_type, D4))
+
+
+def layout_orientations(board, game_type):
+    # One copy of the board per orientation that plays differently in game_type: a board
+    # stored once per D4 orbit (Tools.layout_index) stands for up to 8 / len(group) games
+    boards = {}
+    for transform in D4:
+        if transform % 2 and len(board) != len(board[0]):
+            continue
+        turned = transform_board(board, transform)
+        boards.setdefault(canonical_layout(turned, game_type)[0], turned)
+    return list(boards.values())
+
+
+def same_square(first, second):
+    return canonical_square(first)[0] == canonical_square(second)[0]
+
+
+def canonical_position(board, player, game_type):
+    # (Zobrist hash of the canonical position, transform), for tables shared between
+    # positions that are orientations of each other; map moves back with inverse(transform)
+    canonical, transform = canonical_layout(board, game_type)
+    return hash_cells([value for row in canonical for value in row], player), transform
+
+
+def transform_move(move, rows, cols, transform):
+    # ((from_row, from_col) or None, (to_row, to_col)) on the transformed board
+    from_pos, to_pos = move
+    if from_pos is not None:
+        from_pos = transform_coords(*from_pos, rows, cols, transform)
+    return from_pos, transform_coords(*to_pos, rows, cols, transform)
+
+
+def cache_info():
+    return _canonical.cache_info()
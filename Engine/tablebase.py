@@ -0,0 +1,232 @@
+# Katarenga endgame tablebase: the exact result of every position with few pawns left on
+# a layout, built offline by retrograde analysis (Tools.tablebase) and read here.
+# An entry holds the result for the side to move (WIN, LOSS or DRAW: neither side can
+# force a win) and the distance to the win in plies: how long the winner needs with the
+# loser holding out, 1 when the next move wins.
+# Positions are grouped by material (pawns of player 1, pawns of player 2). Within one,
+# a position is numbered by the sets of squares of each side, ranked as combinations of
+# the 68 squares a pawn can stand on (inner 8x8 and corners), and the side to move:
+#   index = (rank(player 1 squares) * C(68, n2) + rank(player 2 squares)) * 2 + player - 1
+# Numbers where both sides share a square are unused (UNKNOWN).
+# One file per layout, named after the layout ID of the board in its canonical Katarenga
+# orientation (Engine.symmetry); a mirrored board reads the same file with its squares
+# mirrored. File: header (magic, version, largest pawn count, layout ID, material count),
+# one record per material (pawns of each side, bits per entry, entry count, data offset),
+# then the entries of each material bit-packed (result in the 2 low bits, distance above).
+# The file is memory-mapped, so opening it costs nothing and probing reads a few bytes.
+import mmap
+import os
+import struct
+from math import comb
+
+from Engine.bitboard import iter_bits
+from Engine.layouts import layout_id, play_move
+from Engine.movegen import KATARENGA
+from Engine.symmetry import canonical_layout, transform_coords
+
+TABLEBASE_DIR = "tablebases"
+MAGIC = b"KTBASE"
+VERSION = 1
+HEADER = struct.Struct("<6sHB16sH")
+MATERIAL = struct.Struct("<BBBxQQ")
+
+UNKNOWN, WIN, LOSS, DRAW = 0, 1, 2, 3
+RESULT_NAMES = {UNKNOWN: "unknown", WIN: "win", LOSS: "loss", DRAW: "draw"}
+SIZE = 10  # Katarenga board with its border
+
+
+def board_squares(board):
+    # Flat indexes (row * 10 + col) of the squares a pawn can stand on, in row order
+    return [row * SIZE + col for row in range(SIZE) for col in range(SIZE) if board[row][col] != 0]
+
+
+def combination_rank(indexes):
+    # Rank of a sorted list of distinct square numbers among the combinations of its size
+    return sum(comb(index, position + 1) for position, index in enumerate(indexes))
+
+
+def material_size(n1, n2, squares):
+    return comb(squares, n1) * comb(squares, n2) * 2
+
+
+def position_index(p1, p2, player, squares):
+    # p1, p2: sorted square numbers (positions in board_squares) of each side's pawns
+    return (combination_rank(p1) * comb(squares, len(p2)) + combination_rank(p2)) * 2 + player - 1
+
+
+def tiles_of(board):
+    return [[value // 10 * 10 for value in row] for row in board]
+
+
+def tablebase_key(board):
+    # (layout ID, transform) of a 10x10 Katarenga board: its canonical orientation
+    interior = [row[1:SIZE - 1] for row in tiles_of(board)[1:SIZE - 1]]
+    canonical, transform = canonical_layout(interior, KATARENGA)
+    return layout_id(canonical), transform
+
+
+def tablebase_path(board, directory=TABLEBASE_DIR):
+    return os.path.join(directory, tablebase_key(board)[0] + ".tb")
+
+
+class Tablebase:
+
+    def __init__(self, filename, board):
+        # board: a 10x10 board of the layout, in the orientation the probes will use
+        self.filename = filename
+        self.data = None
+        self.materials = {}  # (n1, n2): (bits, count, offset)
+        self.hits = 0
+        with open(filename, "rb") as f:
+            self.data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if len(self.data) < HEADER.size:
+            raise ValueError(f"'{filename}' is truncated")
+        magic, version, self.max_pawns, key, count = HEADER.unpack_from(self.data, 0)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"'{filename}' is not a tablebase of version {VERSION}")
+        self.layout = key.decode("ascii")
+        for i in range(count):
+            n1, n2, bits, entries, offset = MATERIAL.unpack_from(self.data, HEADER.size + i * MATERIAL.size)
+            if offset + (entries * bits + 7) // 8 > len(self.data):
+                raise ValueError(f"'{filename}' is truncated")
+            self.materials[n1, n2] = (bits, entries, offset)
+
+        layout, transform = tablebase_key(board)
+        if layout != self.layout:
+            raise ValueError(f"'{filename}' is the tablebase of another layout")
+        # Square number of each flat index of board (None off the board): the place
+        # of the square among those of the canonical board
+        images = {}
+        for sq in board_squares(board):
+            row, col = transform_coords(sq // SIZE, sq % SIZE, SIZE, SIZE, transform)
+            images[sq] = row * SIZE + col
+        numbers = {image: number for number, image in enumerate(sorted(images.values()))}
+        self.square_map = [None] * (SIZE * SIZE)
+        for sq, image in images.items():
+            self.square_map[sq] = numbers[image]
+        self.square_count = len(images)
+
+    @classmethod
+    def open_for_board(cls, board, directory=TABLEBASE_DIR):
+        # Tablebase of the layout of a 10x10 board, or None when none was built
+        filename = tablebase_path(board, directory)
+        if not os.path.exists(filename):
+            return None
+        try:
+            return cls(filename, board)
+        except (OSError, ValueError) as e:
+            print(f"Tablebase not loaded: {e}")
+            return None
+
+    def close(self):
+        if self.data is not None:
+            self.data.close()
+            self.data = None
+
+    def entry(self, n1, n2, index):
+        # (result, distance) of a position number of a material
+        bits, count, offset = self.materials[n1, n2]
+        position = index * bits
+        start = offset + (position >> 3)
+        value = int.from_bytes(self.data[start:start + 4], "little") >> (position & 7) & ((1 << bits) - 1)
+        return value & 3, value >> 2
+
+    def probe_squares(self, p1, p2, player):
+        # (result, distance) for player to move with pawns on the flat indexes p1 and p2,
+        # or None when the material is not in the table
+        if (len(p1), len(p2)) not in self.materials:
+            return None
+        square_map = self.square_map
+        first = sorted(square_map[sq] for sq in p1 if square_map[sq] is not None)
+        second = sorted(square_map[sq] for sq in p2 if square_map[sq] is not None)
+        if len(first) != len(p1) or len(second) != len(p2):
+            return None  # a pawn off the squares of the table
+        self.hits += 1
+        return self.entry(len(p1), len(p2), position_index(first, second, player, self.square_count))
+
+    def probe_masks(self, masks, player):
+        # Same from the owner bit sets of the search board (bit = flat index)
+        return self.probe_squares(list(iter_bits(masks[1])), list(iter_bits(masks[2])), player)
+
+    def probe(self, board, player):
+        # (result, distance) of a list-of-lists position, or None
+        p1, p2 = [], []
+        for row in range(SIZE):
+            for col in range(SIZE):
+                owner = board[row][col] % 10
+                if owner == 1:
+                    p1.append(row * SIZE + col)
+                elif owner == 2:
+                    p2.append(row * SIZE + col)
+        return self.probe_squares(p1, p2, player)
+
+    def covers(self, board):
+        pawns = sum(1 for row in board for value in row if value % 10)
+        return pawns <= self.max_pawns
+
+    def best_move(self, board, player, moves):
+        # (move, result, distance) of the best of moves (((from_row, from_col), (to_row, to_col))
+        # legal for player) by the table, result and distance for player; None if a child is missing.
+        # A win picks the shortest, a loss the longest, a move that wins at once comes first.
+        best, best_rank = None, None
+        for move in moves:
+            child = play_move(board, move)
+            if winner_of(child, player):
+                return move, WIN, 1
+            entry = self.probe(child, 3 - player)
+            if entry is None or entry[0] == UNKNOWN:
+                return None
+            result, distance = entry
+            if result == LOSS:
+                rank = (2, -distance)
+                result = WIN
+            elif result == DRAW:
+                rank = (1, 0)
+            else:
+                rank = (0, distance)
+                result = LOSS
+            if best_rank is None or rank > best_rank:
+                best, best_rank = (move, result, distance + 1 if result != DRAW else 0), rank
+        return best
+
+    def get_stats(self):
+        return {"materials": len(self.materials), "max_pawns": self.max_pawns, "hits": self.hits}
+
+
+def winner_of(board, mover):
+    # mover if they won on a list-of-lists Katarenga board by holding both far corners
+    # or taking the last opposing pawn (a position with no reply is in the table)
+    row = 0 if mover == 1 else SIZE - 1
+    if board[row][0] % 10 == mover and board[row][SIZE - 1] % 10 == mover:
+        return mover
+    if not any(value % 10 == 3 - mover for line in board for value in line):
+        return mover
+    return 0
+
+
+def write_tablebase(filename, layout, max_pawns, tables):
+    # tables: {(n1, n2): array of entries (result | distance << 2)}; replaces the file in one step
+    records = []
+    offset = HEADER.size + len(tables) * MATERIAL.size
+    chunks = []
+    for (n1, n2), values in sorted(tables.items()):
+        bits = 2 + max(1, (max(values) >> 2).bit_length())
+        data = bytearray((len(values) * bits + 7) // 8 + 4)  # 4 spare bytes for the reader
+        position = 0
+        for value in values:
+            if value:
+                start = position >> 3
+                shifted = value << (position & 7)
+                for i in range(4):
+                    data[start + i] |= shifted >> (8 * i) & 0xFF
+            position += bits
+        records.append(MATERIAL.pack(n1, n2, bits, len(values), offset))
+        chunks.append(data)
+        offset += len(data)
+
+    temp = filename + ".tmp"
+    with open(temp, "wb") as f:
+        f.write(HEADER.pack(MAGIC, VERSION, max_pawns, layout.encode("ascii"), len(tables)))
+        f.writelines(records)
+        f.writelines(chunks)
+    os.replace(temp, filename)
@@ -0,0 +1,102 @@
+# Bounded transposition table keyed by Zobrist hashes.
+# The table has a fixed number of two-slot buckets, so memory never grows during a game or a search:
+#   slot 0 keeps the deepest entry seen for the bucket (depth-preferred),
+#   slot 1 takes whatever was stored last (always-replace).
+# Values are opaque: search results for the AI, move lists for the legal-move cache,
+# game records for the archive. Hit/miss/store counters are kept for tuning, and the
+# number of slots in use as they fill, so len() is free.
+
+
+class TranspositionTable:
+
+    def __init__(self, buckets=1 << 16):
+        self.buckets = buckets
+        self.keys = [None] * (2 * buckets)
+        self.depths = [0] * (2 * buckets)
+        self.values = [None] * (2 * buckets)
+        self.used = 0  # slots holding an entry
+
+        self.hits = 0
+        self.misses = 0
+        self.stores = 0
+        self.replacements = 0  # stores that evicted a different position
+
+    def _slot(self, key):
+        return (key % self.buckets) * 2
+
+    def probe_entry(self, key):
+        # (depth, value) stored for key, or None
+        slot = self._slot(key)
+        for index in (slot, slot + 1):
+            if self.keys[index] == key:
+                self.hits += 1
+                return self.depths[index], self.values[index]
+        self.misses += 1
+        return None
+
+    def probe(self, key, default=None):
+        entry = self.probe_entry(key)
+        return default if entry is None else entry[1]
+
+    def store(self, key, value, depth=0):
+        slot = self._slot(key)
+        keys = self.keys
+
+        # Same position already stored: update it in place
+        for index in (slot, slot + 1):
+            if keys[index] == key:
+                if index == slot + 1 or depth >= self.depths[index]:
+                    self.depths[index] = depth
+                    self.values[index] = value
+                self.stores += 1
+                return
+
+        if keys[slot] is None:
+            self._write(slot, key, depth, value)
+        else:
+            # Either way the always-replace entry is the one that gets dropped
+            if keys[slot + 1] is not None:
+                self.replacements += 1
+            if depth >= self.depths[slot]:
+                # Deeper result: it takes the depth-preferred slot, the old one moves down
+                self._write(slot + 1, keys[slot], self.depths[slot], self.values[slot])
+                self._write(slot, key, depth, value)
+            else:
+                self._write(slot + 1, key, depth, value)
+        self.stores += 1
+
+    def _write(self, index, key, depth, value):
+        if self.keys[index] is None:
+            self.used += 1
+        self.keys[index] = key
+        self.depths[index] = depth
+        self.values[index] = value
+
+    def __contains__(self, key):
+        slot = self._slot(key)
+        return self.keys[slot] == key or self.keys[slot + 1] == key
+
+    def __len__(self):
+        return self.used
+
+    def clear(self):
+        self.keys = [None] * (2 * self.buckets)
+        self.depths = [0] * (2 * self.buckets)
+        self.values = [None] * (2 * self.buckets)
+        self.used = 0
+        self.hits = self.misses = self.stores = self.replacements = 0
+
+    def hit_rate(self):
+        probes = self.hits + self.misses
+        return self.hits / probes if probes else 0.0
+
+    def get_stats(self):
+        return {
+            'capacity': 2 * self.buckets,
+            'entries': len(self),
+            'hits': self.hits,
+            'misses': self.misses,
+            'stores': self.stores,
+            'replacements': self.replacements,
+            'hit_rate': self.hit_rate(),
+        }
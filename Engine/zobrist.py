@@ -0,0 +1,54 @@
+# Zobrist hashing of positions in the color * 10 + owner encoding.
+# Every (square, tile color) and (square, owner) pair gets a random 64-bit key and the
+# hash of a position is the XOR of the keys of its cells, plus SIDE_KEY when player 2
+# is to move. Changing one cell is two XORs, so a move updates the hash in O(1).
+# The keys come from a fixed seed: hashes agree between processes, runs and saved files.
+import random
+
+ZOBRIST_SEED = 0x4B415441
+MAX_SQUARES = 128   # enough for the 10x10 Katarenga board
+COLOR_CODES = 7     # 0 border, 1-4 tiles, 5-6 corners
+OWNER_CODES = 3     # 0 empty, 1 and 2 players
+
+_rng = random.Random(ZOBRIST_SEED)
+COLOR_KEYS = [[_rng.getrandbits(64) for _ in range(COLOR_CODES)] for _ in range(MAX_SQUARES)]
+OWNER_KEYS = [[0] + [_rng.getrandbits(64) for _ in range(OWNER_CODES - 1)] for _ in range(MAX_SQUARES)]
+SIDE_KEY = _rng.getrandbits(64)
+
+# CELL_KEYS[sq][value] = key of a cell holding value (color * 10 + owner) on square sq
+CELL_KEYS = [[COLOR_KEYS[sq][value // 10] ^ OWNER_KEYS[sq][value % 10] if value % 10 < OWNER_CODES else 0
+              for value in range(COLOR_CODES * 10)]
+             for sq in range(MAX_SQUARES)]
+
+
+def hash_cells(cells, player=1):
+    # cells: flat list of cell values, square = row * cols + col
+    key = SIDE_KEY if player == 2 else 0
+    for sq, value in enumerate(cells):
+        key ^= CELL_KEYS[sq][value]
+    return key
+
+
+def hash_board(board, player=1):
+    return hash_cells([value for row in board for value in row], player)
+
+
+class Zobrist:
+    # Running hash of one game, updated by the game's make_move
+
+    def __init__(self, board, player=1):
+        self.cols = len(board[0])
+        self.player = player  # side to move
+        self.value = hash_board(board, player)
+
+    def set_cell(self, row, col, old_value, new_value):
+        sq = row * self.cols + col
+        self.value ^= CELL_KEYS[sq][old_value] ^ CELL_KEYS[sq][new_value]
+
+    def switch_side(self):
+        self.player = 2 if self.player == 1 else 1
+        self.value ^= SIDE_KEY
+
+    def key_for(self, player):
+        # Hash of the same cells with player to move
+        return self.value if player == self.player else self.value ^ SIDE_KEY
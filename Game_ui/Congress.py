@@ -1,12 +1,12 @@
 import pygame
-import copy
-from collections import deque
-import random
 
 from UI_tools.BaseUi import BaseUI
 from Board.Board_draw_tools import Board_draw_tools
-from Game_ui.move_rules import Moves_rules
+from Engine.game_state import GameState, setup_congress, CONGRESS
+from AI.congress_ai import CongressAI
+from Engine.opening_book import OpeningBook
 from UI_tools.win_screen import WinScreen
+from UI_tools.ai_worker import Ponderer, AI_MOVE_EVENT
 
 class Congress(BaseUI):
     def __init__(self, ai, board, title="Congress"):
@@ -15,8 +15,8 @@ class Congress(BaseUI):
         if board is None:
             raise ValueError("Board cannot be None")
 
-        # Create a deep copy of the initial board to avoid modifying the original
-        self.base_board = copy.deepcopy(board)
+        # Copy the initial board to avoid modifying the original
+        self.base_board = [row[:] for row in board]
 
         # Board and UI dimensions
         self.cell_size = 60
@@ -33,44 +33,37 @@ class Congress(BaseUI):
         # Back button rectangle for navigation
         self.back_button_rect = pygame.Rect(20, 20, 120, 40)
 
-        # Initialize the game board with pawns placed according to Congress rules
-        self.board = self.place_pawn_congress(self.base_board)
-
-        # Tools for board drawing and move validation
+        # Tools for board drawing
         self.board_ui = Board_draw_tools()
-        self.moves_rules = Moves_rules(self.board)
+
+        # Initialize the game board with pawns placed according to Congress rules
+        self.set_board(self.place_pawn_congress(self.base_board))
 
         # Game state variables
-        self.current_player = 1
         self.selected_pawn = None
         self.info_font = pygame.font.SysFont(None, 36)
 
         self.__ai = ai  # AI player flag or instance
+        self.ai_player = CongressAI(time_limit=1.0, book=OpeningBook.open_existing(), verbose=True) if ai else None  # MCTS over a process pool
+        self.ai_job = None  # AI move being computed in the background
+        self.ponderer = Ponderer(self.ai_player) if ai else None  # searches during the player's turn
         
         # Flags pour la gestion de la victoire
         self.network_mode = False
         self.victory_callback = None  # Callback pour le mode réseau
 
     def place_pawn_congress(self, base_board):
-        new_board = copy.deepcopy(base_board)
-        for i in range(self.grid_dim):
-            for j in range(self.grid_dim):
-                color_code = new_board[i][j] // 10
-                new_board[i][j] = color_code * 10  # Clear pawns, keep base color
-
-        # Direct placement of pawns
-        black_pawns = [(0, 1), (0, 4), (1, 7), (3, 0), (4, 7), (6, 0), (7, 3), (7, 6)]
-        white_pawns = [(0, 3), (0, 6), (1, 0), (3, 7), (4, 0), (6, 7), (7, 1), (7, 4)]
-
-        for r, c in black_pawns:
-            color = new_board[r][c] // 10
-            new_board[r][c] = color * 10 + 2
-
-        for r, c in white_pawns:
-            color = new_board[r][c] // 10
-            new_board[r][c] = color * 10 + 1
-
-        return new_board
+        # Copy of the board cleared of pawns, with the fixed Congress start position
+        return setup_congress(base_board)
+
+    def set_board(self, board, player=1):
+        # Play on board (with pawns) from now on: rebuilds the game state around it
+        self.state = GameState(CONGRESS, board, player)
+        self.board = self.state.board
+        self.base_board = [[value // 10 * 10 for value in row] for row in board]
+        self.zobrist = self.state.zobrist  # position hash
+        self.connectivity = self.state.connectivity  # pawn groups per player
+        self.current_player = self.state.current_player
 
     def set_network_mode(self, network_mode=True, victory_callback=None):
         self.network_mode = network_mode
@@ -85,8 +78,15 @@ class Congress(BaseUI):
             self.clock.tick(60)
 
             # If AI is active and it is AI's turn (player 2)
-            if self.__ai and self.current_player == 2:
-                self.congress_ai()
+            if self.__ai and self.current_player == 2 and self.ai_job is None and self.running:
+                self.ai_job = self.ponderer.answer(self.state.last_move, self.board, self.current_player)
+
+        # Stop the AI search and its worker processes with the game
+        self.cancel_ai()
+        if self.ponderer is not None:
+            print(f"Pondering: {self.ponderer.get_stats()}")
+        if self.ai_player:
+            self.ai_player.close()
 
     def handle_events(self):
         #Event handler for quitting, back button, and board clicks.
@@ -98,9 +98,18 @@ class Congress(BaseUI):
                     self.running = False
                 else:
                     self.handle_board_click(event.pos)
+            elif event.type == pygame.KEYDOWN and event.key == pygame.K_u:
+                self.undo_move()  # take back the last move
+            elif event.type == pygame.KEYDOWN and event.key == pygame.K_r:
+                self.redo_move()  # play again the move taken back
+            elif event.type == AI_MOVE_EVENT and event.job is self.ai_job:
+                self.ai_job = None
+                self.congress_ai(event.move)  # AI move ready
 
     def handle_board_click(self, pos):
         #Handles clicks inside the board grid, converting pixel to grid coordinates.
+        if self.ai_job is not None:
+            return  # the AI is thinking
         x, y = pos
         if (self.left_offset <= x < self.left_offset + self.grid_size and
             self.top_offset <= y < self.top_offset + self.grid_size):
@@ -158,49 +167,52 @@ class Congress(BaseUI):
                 print(f"Victory detected in local mode: Player {winner}")
                 self.trigger_victory_local(winner)
 
+    def cancel_ai(self):
+        # Drop the AI move being computed and the pondering, if any
+        if self.ai_job is not None:
+            self.ai_job.cancel()
+            self.ai_job = None
+        if self.ponderer is not None:
+            self.ponderer.cancel()
+
+    def undo_move(self):
+        # Against the AI, the AI's answer is taken back too so it is the player's turn again
+        self.cancel_ai()
+        plies = 2 if self.__ai and self.state.current_player == 1 else 1
+        for _ in range(plies):
+            self.state.undo()
+        self.selected_pawn = None
+        self.current_player = self.state.current_player
+
+    def redo_move(self):
+        self.cancel_ai()
+        plies = 2 if self.__ai else 1
+        for _ in range(plies):
+            self.state.redo()
+        self.selected_pawn = None
+        self.current_player = self.state.current_player
+
     def is_valid_move(self, fr, fc, tr, tc):
-        #Checks if move is valid by delegating to move rules verifier.
-        case_color = self.board[fr][fc]
-        return self.moves_rules.verify_move(case_color, fr, fc, tr, tc)
+        #Checks if move is valid against the legal moves of the game state.
+        return self.state.is_legal((fr, fc), (tr, tc))
 
     def make_move(self, fr, fc, tr, tc):
-        #Executes move on board: clears origin cell, places pawn on target cell.
-        dest_color = self.base_board[tr][tc] // 10
-        orig_color = self.base_board[fr][fc] // 10
-        self.board[fr][fc] = orig_color * 10  # Clear origin cell
-        self.board[tr][tc] = dest_color * 10 + self.current_player  # Place pawn at destination
+        #Executes move on board: the game state moves the pawn and updates hash and connectivity.
+        self.state.make_move((fr, fc), (tr, tc))
         print(f"Moved from ({fr}, {fc}) to ({tr}, {tc})")
 
     def switch_player(self):
-        #Switch current player between 1 and 2.
-        self.current_player = 2 if self.current_player == 1 else 1
+        #Switch current player between 1 and 2 (the game state already did on make_move).
+        self.current_player = self.state.current_player
         print(f"Player {self.current_player}'s turn")
 
     def check_victory(self, player):
-        
-        positions = [(i, j) for i in range(self.grid_dim) for j in range(self.grid_dim)
-                     if self.board[i][j] % 10 == player]
-        if not positions:
-            return False
-        visited = set([positions[0]])
-        queue = deque([positions[0]])
-        while queue:
-            x, y = queue.popleft()
-            for dx, dy in [(-1,0), (1,0), (0,-1), (0,1)]:
-                nx, ny = x + dx, y + dy
-                if (0 <= nx < self.grid_dim and 0 <= ny < self.grid_dim and
-                    (nx, ny) not in visited and self.board[nx][ny] % 10 == player):
-                    visited.add((nx, ny))
-                    queue.append((nx, ny))
         # Victory if all player's pawns are connected
-        return len(visited) == len(positions)
+        return self.connectivity.is_connected(player)
 
     def check_all_players_victory(self):
-        
-        for player in [1, 2]:
-            if self.check_victory(player):
-                return player
-        return None
+        # Connected pawns, or an opponent left without a legal move
+        return self.state.winner or None
 
     def trigger_victory_local(self, winner):
         
@@ -266,23 +278,19 @@ class Congress(BaseUI):
         player_text = self.info_font.render(f"Player {self.current_player}'s turn", True, (255, 255, 255))
         screen.blit(player_text, (20, self.get_height() - 50))
 
-    def congress_ai(self):
-        #Simple AI for player 2: randomly selects a pawn and attempts random valid moves.
-        pawns = [(r, c) for r in range(self.grid_dim) for c in range(self.grid_dim)
-                 if self.board[r][c] % 10 == 2]
-
-        random.shuffle(pawns)
-        for r, c in pawns:
-            for dr, dc in [(1,0), (-1,0), (0,1), (0,-1)]:
-                nr, nc = r + dr, c + dc
-                if 0 <= nr < self.grid_dim and 0 <= nc < self.grid_dim:
-                    if self.board[nr][nc] % 10 == 0 and self.is_valid_move(r, c, nr, nc):
-                        self.make_move(r, c, nr, nc)
-                        
-                        # Toujours vérifier la victoire après un mouvement de l'IA
-                        self.check_and_handle_victory()
-                        
-                        # Si pas de victoire, changer de joueur
-                        if self.running:  # Le jeu continue
-                            self.switch_player()
-                        return
\ No newline at end of file
+    def congress_ai(self, move):
+        #AI for player 2: plays the move found by Monte Carlo Tree Search in the background.
+        if move is None:
+            print("AI has no valid move")
+            return
+
+        (r, c), (nr, nc) = move
+        self.make_move(r, c, nr, nc)
+
+        # Toujours vérifier la victoire après un mouvement de l'IA
+        self.check_and_handle_victory()
+
+        # Si pas de victoire, changer de joueur
+        if self.running:  # Le jeu continue
+            self.switch_player()
+            self.ponderer.start(self.board, 2)  # think about the answer to the expected reply
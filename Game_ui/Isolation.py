@@ -1,17 +1,20 @@
 
 import pygame
-import random
-import time
 from UI_tools.BaseUi import BaseUI
 from Board.Board_draw_tools import Board_draw_tools
-from Game_ui.move_rules import Moves_rules
 from UI_tools.win_screen import WinScreen
+from Engine.game_state import GameState, ISOLATION
+from AI.isolation_ai import IsolationAI
+from UI_tools.ai_worker import AIJob, AI_MOVE_EVENT
+
+AI_MIN_TIME = 2.0  # seconds before the AI's placement shows
 
 class Isolation(BaseUI):
     def __init__(self, ai, board, title="Isolation"):
         super().__init__(title)
+        self.state = GameState(ISOLATION, board)  # headless game state, shares board
         self.board = board
-        self.rules = Moves_rules(board)
+        self.attack_map = self.state.attack_map  # attacked squares, updated on each placement
         self.board_ui = Board_draw_tools()
 
         self.cell_size = 60
@@ -27,11 +30,14 @@ class Isolation(BaseUI):
 
         self.back_button_rect = pygame.Rect(20, 20, 120, 40)
 
-        self.current_player = 1
+        self.current_player = self.state.current_player
+        self.zobrist = self.state.zobrist  # position hash
         self.total_moves = 0
         self.max_moves = self.grid_dim * self.grid_dim
 
         self.__AI = ai  # AI opponent enabled if True
+        self.ai_player = IsolationAI() if ai else None
+        self.ai_job = None  # AI move being computed in the background
 
     def run(self):
         self.running = True
@@ -41,10 +47,11 @@ class Isolation(BaseUI):
             pygame.display.flip()
             self.clock.tick(60)
 
-            # If AI is player 2, make AI move after a short delay
-            if self.__AI and self.current_player == 2 and self.running:
-                time.sleep(2)
-                self.play_ai_move()
+            # If AI is player 2, compute its move in the background; it shows after AI_MIN_TIME
+            if self.__AI and self.current_player == 2 and self.ai_job is None and self.running:
+                self.ai_job = AIJob(self.ai_player, self.board, self.current_player, AI_MIN_TIME).start()
+
+        self.cancel_ai()  # stop a search still running when the game is left
 
     def handle_events(self):
         for event in pygame.event.get():
@@ -55,6 +62,13 @@ class Isolation(BaseUI):
                     self.running = False
                 else:
                     self.handle_click(event.pos)
+            elif event.type == pygame.KEYDOWN and event.key == pygame.K_u:
+                self.undo_move()  # take back the last move
+            elif event.type == pygame.KEYDOWN and event.key == pygame.K_r:
+                self.redo_move()  # play again the move taken back
+            elif event.type == AI_MOVE_EVENT and event.job is self.ai_job:
+                self.ai_job = None
+                self.play_ai_move(event.move)  # AI move ready
 
     def handle_click(self, pos):
         if self.__AI and self.current_player == 2:
@@ -69,9 +83,7 @@ class Isolation(BaseUI):
             case = self.board[row][col]
             # Check if the cell is free and not under threat
             if case % 10 == 0 and not self.in_prise(row, col):
-                color = case // 10
-                self.board[row][col] = color * 10 + self.current_player
-                self.total_moves += 1
+                self.make_move(row, col)
                 # Check for game end conditions
                 if self.total_moves >= self.max_moves or not self.can_play():
                     print(f"Player {self.current_player} wins!")
@@ -79,26 +91,43 @@ class Isolation(BaseUI):
                     self.running = False
                 else:
                     # Switch player
-                    self.current_player = 2 if self.current_player == 1 else 1
+                    self.current_player = self.state.current_player
+
+    def make_move(self, row, col):
+        # Place a pawn of the current player: the game state updates the attacked squares and the hash
+        self.state.make_move(None, (row, col))
+        self.total_moves += 1
+
+    def cancel_ai(self):
+        # Drop the AI move being computed, if any
+        if self.ai_job is not None:
+            self.ai_job.cancel()
+            self.ai_job = None
+
+    def undo_move(self):
+        # Against the AI, the AI's answer is taken back too so it is the player's turn again
+        self.cancel_ai()
+        plies = 2 if self.__AI and self.state.current_player == 1 else 1
+        for _ in range(plies):
+            self.state.undo()
+        self.current_player = self.state.current_player
+        self.total_moves = self.state.move_count
+
+    def redo_move(self):
+        self.cancel_ai()
+        plies = 2 if self.__AI else 1
+        for _ in range(plies):
+            self.state.redo()
+        self.current_player = self.state.current_player
+        self.total_moves = self.state.move_count
 
     def in_prise(self, x, y):
-        # Check if the move at (x,y) is under attack by any opponent move
-        for i in range(self.grid_dim):
-            for j in range(self.grid_dim):
-                case = self.board[i][j]
-                if case % 10 != 0:
-                    if self.rules.verify_move(case, i, j, x, y):
-                        return True
-        return False
+        # Check if the move at (x,y) is under attack by any pawn on the board
+        return self.attack_map.is_attacked(x, y)
 
     def can_play(self):
         # Check if current player has any valid moves left
-        for i in range(self.grid_dim):
-            for j in range(self.grid_dim):
-                case = self.board[i][j]
-                if case not in (0, 50, 60) and case % 10 == 0 and not self.in_prise(i, j):
-                    return True
-        return False
+        return self.attack_map.can_play()
 
     def draw(self):
         #Draw the full game screen: background, board grid, pawns, UI elements.
@@ -137,16 +166,10 @@ class Isolation(BaseUI):
         back_text = pygame.font.SysFont(None, 36).render("Back", True, (255, 255, 255))
         screen.blit(back_text, back_text.get_rect(center=self.back_button_rect.center))
 
-    def play_ai_move(self):
-        possibles = []
-        # Collect all possible moves for AI player
-        for i in range(self.grid_dim):
-            for j in range(self.grid_dim):
-                case = self.board[i][j]
-                if case not in (0, 50, 60) and case % 10 == 0 and not self.in_prise(i, j):
-                    possibles.append((i, j))
+    def play_ai_move(self, move):
+        # Exact solver once few safe squares remain, heuristic placement before that
 
-        if not possibles:
+        if move is None:
             print("AI can't move, Player 1 wins!")
             try:
                 WinScreen("Player 1")
@@ -155,12 +178,8 @@ class Isolation(BaseUI):
             self.running = False
             return
 
-        # Random pick valid move
-        i, j = random.choice(possibles)
-        case = self.board[i][j]
-        color = case // 10
-        self.board[i][j] = color * 10 + 2
-        self.total_moves += 1
+        i, j = move
+        self.make_move(i, j)
 
         
         if self.total_moves >= self.max_moves or not self.can_play():
@@ -171,4 +190,4 @@ class Isolation(BaseUI):
                 print(f"Error showing win screen: {e}")
             self.running = False
         else:
-            self.current_player = 1
\ No newline at end of file
+            self.current_player = self.state.current_player
\ No newline at end of file
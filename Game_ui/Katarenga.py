@@ -1,11 +1,14 @@
 import pygame
-import copy
-import time
-import random
 from UI_tools.win_screen import WinScreen
 from UI_tools.BaseUi import BaseUI
 from Board.Board_draw_tools import Board_draw_tools
-from Game_ui.move_rules import Moves_rules
+from Engine.game_state import GameState, setup_katarenga, KATARENGA
+from AI.katarenga_ai import KatarengaAI
+from Engine.opening_book import OpeningBook
+from Engine.tablebase import Tablebase
+from UI_tools.ai_worker import Ponderer, AI_MOVE_EVENT
+
+AI_MIN_TIME = 1.0  # seconds before the AI's move shows, so the player sees their own first
 
 
 class Katarenga(BaseUI):
@@ -15,9 +18,9 @@ class Katarenga(BaseUI):
         if board is None:
             raise ValueError("Board can't be None")  # check input
 
-        self.board = self.place_pawn_katarenga(board)  # setup pawns
+        self.state = GameState(KATARENGA, self.place_pawn_katarenga(board))  # setup pawns
+        self.board = self.state.board  # shared with the game state
         self.board_ui = Board_draw_tools()  # drawing helper
-        self.moves_rules = Moves_rules(self.board)  # move rules
 
         self.cell_size = 60  # size of one cell
         self.grid_dim = 10  # 10x10 grid
@@ -32,20 +35,18 @@ class Katarenga(BaseUI):
 
         self.back_button_rect = pygame.Rect(20, 20, 120, 40)  # back button
 
-        self.current_player = 1  # player 1 starts
+        self.current_player = self.state.current_player  # player 1 starts
         self.selected_pawn = None  # no pawn selected
+        self.zobrist = self.state.zobrist  # position hash
 
         self.__ai = ai  # AI mode on/off
+        self.ai_player = KatarengaAI(level="medium", time_limit=1.0, book=OpeningBook.open_existing(),
+                                     tablebase=Tablebase.open_for_board(self.board), verbose=True) if ai else None  # alpha-beta search
+        self.ai_job = None  # AI move being computed in the background
+        self.ponderer = Ponderer(self.ai_player, AI_MIN_TIME) if ai else None  # searches during the player's turn
 
         self.info_font = pygame.font.SysFont(None, 36)  # font for info text
-
-        # Movement directions by pawn color
-        self.directions = {
-            1: [(dx, dy) for dx in [-1,0,1] for dy in [-1,0,1] if dx != 0 or dy != 0],  # blue = all around
-            2: [(2,1),(1,2),(-1,2),(-2,1),(-2,-1),(-1,-2),(1,-2),(2,-1)],  # green = knight moves
-            3: [(-1,-1),(-1,1),(1,-1),(1,1)],  # yellow = diagonals
-            4: [(-1,0),(1,0),(0,-1),(0,1)]  # red = straight lines
-        }
+        self.undo_hint = True  # U/R keys shown; off for online games, which have no undo
 
     def run(self):
         while self.running:
@@ -54,9 +55,12 @@ class Katarenga(BaseUI):
             pygame.display.flip()
             self.clock.tick(60)
 
-            if self.__ai and self.current_player == 2:
-                time.sleep(1)
-                self.play_ai_turn()
+            if self.__ai and self.current_player == 2 and self.ai_job is None and self.running:
+                self.ai_job = self.ponderer.answer(self.state.last_move, self.board, self.current_player)
+
+        self.cancel_ai()  # stop a search still running when the game is left
+        if self.ponderer is not None:
+            print(f"Pondering: {self.ponderer.get_stats()}")
 
     def handle_events(self):
         for event in pygame.event.get():
@@ -67,8 +71,17 @@ class Katarenga(BaseUI):
                     self.running = False  # back clicked
                 else:
                     self.handle_board_click(event.pos)  # board clicked
+            elif event.type == pygame.KEYDOWN and event.key == pygame.K_u:
+                self.undo_move()  # take back the last move
+            elif event.type == pygame.KEYDOWN and event.key == pygame.K_r:
+                self.redo_move()  # play again the move taken back
+            elif event.type == AI_MOVE_EVENT and event.job is self.ai_job:
+                self.ai_job = None
+                self.play_ai_turn(event.move)  # AI move ready
 
     def handle_board_click(self, pos):
+        if self.ai_job is not None:
+            return  # the AI is thinking
         x, y = pos
         if (self.left_offset <= x < self.left_offset + self.grid_size and
             self.top_offset <= y < self.top_offset + self.grid_size):
@@ -80,19 +93,8 @@ class Katarenga(BaseUI):
                 self.process_move(row, col)
 
     def place_pawn_katarenga(self, board):
-        new_board = copy.deepcopy(board)  # copy board to avoid mutation
-
-        # Player 2 pawns top row
-        for col in range(1, 9):
-            color = new_board[1][col] // 10
-            new_board[1][col] = color * 10 + 2
-
-        # Player 1 pawns bottom row
-        for col in range(1, 9):
-            color = new_board[8][col] // 10
-            new_board[8][col] = color * 10 + 1
-
-        return new_board
+        # Copy of the board with player 2 on the top row and player 1 on the bottom row
+        return setup_katarenga(board)
 
     def process_move(self, row, col):
         cell_value = self.board[row][col]
@@ -112,19 +114,7 @@ class Katarenga(BaseUI):
                 self.selected_pawn = (row, col)
                 print(f"Nouveau pion sélectionné à ({row}, {col})")
             else:
-                if self.current_player == 1 and 1 <= selected_col <= 9 and selected_row == 1 and (row, col) in [(0, 0), (0, 9)]:
-                    self.make_move(selected_row, selected_col, row, col)
-                    self.selected_pawn = None
-                    winner = self.check_victory()
-                    if winner == 0:
-                        self.switch_player()
-                elif self.current_player == 2 and 1 <= selected_col <= 9 and selected_row == 8 and (row, col) in [(9, 0), (9, 9)]:
-                    self.make_move(selected_row, selected_col, row, col)
-                    self.selected_pawn = None 
-                    winner = self.check_victory()
-                    if winner == 0:
-                        self.switch_player()
-                elif self.is_valid_move(selected_row, selected_col, row, col):
+                if self.is_valid_move(selected_row, selected_col, row, col):
                     self.make_move(selected_row, selected_col, row, col)
                     self.selected_pawn = None
                     winner = self.check_victory()
@@ -133,48 +123,44 @@ class Katarenga(BaseUI):
                 else:
                     print("invalid movement")
 
+    def cancel_ai(self):
+        # Drop the AI move being computed and the pondering, if any
+        if self.ai_job is not None:
+            self.ai_job.cancel()
+            self.ai_job = None
+        if self.ponderer is not None:
+            self.ponderer.cancel()
+
+    def undo_move(self):
+        # Against the AI, the AI's answer is taken back too so it is the player's turn again
+        self.cancel_ai()
+        plies = 2 if self.__ai and self.state.current_player == 1 else 1
+        for _ in range(plies):
+            self.state.undo()
+        self.selected_pawn = None
+        self.current_player = self.state.current_player
+
+    def redo_move(self):
+        self.cancel_ai()
+        plies = 2 if self.__ai else 1
+        for _ in range(plies):
+            self.state.redo()
+        self.selected_pawn = None
+        self.current_player = self.state.current_player
+
     def is_valid_move(self, fr, fc, tr, tc):
-        case_color = self.board[fr][fc]
-        return self.moves_rules.verify_move(case_color, fr, fc, tr, tc)
+        # Tile moves and corner entries from the last row, as generated by the game state
+        return self.state.is_legal((fr, fc), (tr, tc))
 
     def make_move(self, fr, fc, tr, tc):
-        dest_color = self.board[tr][tc] // 10
-        origin_color = self.board[fr][fc] // 10
-        self.board[fr][fc] = origin_color * 10  # empty old spot
-        self.board[tr][tc] = dest_color * 10 + self.current_player  # place pawn
+        # The game state updates the board, the position hash and the winner
+        self.state.make_move((fr, fc), (tr, tc))
         print(f"Moved from ({fr},{fc}) to ({tr},{tc})")
 
     def switch_player(self):
-        self.current_player = 2 if self.current_player == 1 else 1
+        self.current_player = self.state.current_player
         print(f"Player {self.current_player}'s turn")
 
-    def play_ai_turn(self):
-        # Simple AI for local mode
-        player_pawns = []
-        for row in range(self.grid_dim):
-            for col in range(self.grid_dim):
-                if self.board[row][col] % 10 == 2:
-                    player_pawns.append((row, col))
-        
-        if not player_pawns:
-            return
-        
-        random.shuffle(player_pawns)
-        for from_row, from_col in player_pawns:
-            possible_moves = []
-            for to_row in range(self.grid_dim):
-                for to_col in range(self.grid_dim):
-                    if self.is_valid_move(from_row, from_col, to_row, to_col):
-                        possible_moves.append((to_row, to_col))
-            
-            if possible_moves:
-                to_row, to_col = random.choice(possible_moves)
-                self.make_move(from_row, from_col, to_row, to_col)
-                
-                if self.check_victory() == 0:
-                    self.switch_player()
-                return
-
     def draw_pawn(self, screen, rect, player_code):
         center = rect.center
         radius = self.cell_size // 3
@@ -266,6 +252,8 @@ class Katarenga(BaseUI):
             instruction = "Click a case to move the selected pawn"
         else:
             instruction = "Click on a pawn to select it, then click a case to move it"
+        if self.undo_hint:
+            instruction += " (U: undo, R: redo)"
         
         instruction_surface = pygame.font.SysFont(None, 24).render(instruction, True, (200, 200, 200))
         instruction_rect = instruction_surface.get_rect()
@@ -273,90 +261,31 @@ class Katarenga(BaseUI):
         screen.blit(instruction_surface, instruction_rect)
 
     def count_pawns(self):
-        player1_count = 0
-        player2_count = 0
-        
-        for row in range(10):
-            for col in range(10):
-                player = self.board[row][col] % 10
-                if player == 1:
-                    player1_count += 1
-                elif player == 2:
-                    player2_count += 1
-        
-        return player1_count, player2_count
+        owners = self.state.bb.owners
+        return bin(owners[1]).count("1"), bin(owners[2]).count("1")
     
     def check_victory(self):
-        player1_count, player2_count = self.count_pawns()
-        
-        if player1_count == 0:
-            print("The player 2 has won (no pawns left for player 1)!")
-            self.running = False
-            WinScreen("Player 2")
-            return 2
-        if player2_count == 0:
-            print("The player 1 has won (no pawns left for player 2)!")
-            WinScreen("Player 1")
+        # Elimination, both far corners, or an opponent left without a legal move
+        winner = self.state.winner
+        if winner:
+            print(f"The player {winner} has won!")
+            WinScreen(f"Player {winner}")
             self.running = False
-            return 1
-
-        if self.board[9][0] % 10 == 2 and self.board[9][9] % 10 == 2:
-            print("The player 1 has won (occupied the corners bottom left and right)!")
-            WinScreen("Player 1")   
-            self.running = False
-            return 1
-
-        if self.board[0][0] % 10 == 1 and self.board[0][9] % 10 == 1:
-            print("the player 2 has won (occupied the corners top left and right)!")
-            WinScreen("Player 2")
-            self.running = False
-            return 2
-
-        return 0
+        return winner
     
-    def play_ai_turn(self):
-        from random import choice, shuffle
-
+    def play_ai_turn(self, move):
         if self.current_player != 2:
             return
 
-        pawns = []
-        for x in range(10):
-            for y in range(10):
-                if self.board[x][y] % 10 == 2:
-                    pawns.append((x, y))
-
-        shuffle(pawns)
-
-        for x, y in pawns:
-            couleur = self.board[x][y] // 10
-            dir_list = self.directions.get(couleur, [])
-            shuffle(dir_list)
-
-            for dx, dy in dir_list:
-                steps = 1
-                while True:
-                    new_x = x + dx * steps
-                    new_y = y + dy * steps
-
-                    if not (0 <= new_x < 10 and 0 <= new_y < 10):
-                        break
-
-                    if self.moves_rules.verify_move(self.board[x][y], x, y, new_x, new_y):
-                        self.make_move(x, y, new_x, new_y)
-                        print(f"IA a joué de ({x}, {y}) à ({new_x}, {new_y})")
-
-                        winner = self.check_victory()
-                        if winner == 0:
-                            self.switch_player()
-                        return
-
-                    if couleur in [1, 2]:
-                        break
-
-                    if self.board[new_x][new_y] != 0:
-                        break
+        if move is None:
+            print("L'IA n'a pas trouvé de coup valide.")
+            return
 
-                    steps += 1
+        (fr, fc), (tr, tc) = move
+        self.make_move(fr, fc, tr, tc)
+        print(f"IA a joué de ({fr}, {fc}) à ({tr}, {tc})")
 
-        print("L'IA n'a pas trouvé de coup valide.")
\ No newline at end of file
+        winner = self.check_victory()
+        if winner == 0:
+            self.switch_player()
+            self.ponderer.start(self.board, 2)  # think about the answer to the expected reply
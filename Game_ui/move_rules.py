@@ -1,9 +1,29 @@
 # Class that defines movement rules depending on the color of the board case.
 # Each movement method checks if a move is allowed based on chess-like rules
 # adapted to colored tiles: blue (king), green (knight), yellow (bishop), red (rook).
+# verify_move answers from a bitboard copy of the board (Engine.bitboard), kept in step
+# with refresh() for the squares a move changed, or set_board() for a new board.
+# The per-color methods walk the nested lists: walk_move is the reference Tools.perft
+# checks the bitboard backend against.
+from Engine.bitboard import BitboardRules
+
+
 class Moves_rules:
     def __init__(self, board):
         self.__board = board  # Board is expected to be a 2D list
+        self.__bitboards = BitboardRules(board)
+
+    # New board, or the same one changed in many places
+    def set_board(self, board):
+        self.__board = board
+        self.__bitboards.load(board)
+
+    # Squares (row, col) of the board that changed since the last refresh
+    def refresh(self, *positions):
+        for position in positions:
+            if position is not None:
+                row, col = position
+                self.__bitboards.set_cell(row, col, self.__board[row][col])
 
     # Yellow tile: diagonal movement (bishop-like)
     def yellow_case_move(self, x_start, y_start, x_end, y_end):
@@ -82,8 +102,12 @@ class Moves_rules:
 
         return end_piece == 0 or end_piece != current_player
 
-    # Selects the appropriate rule based on the tile color
+    # Is (x_end, y_end) a legal destination for a pawn on a case_color tile at (x_start, y_start)
     def verify_move(self, case_color, x_start, y_start, x_end, y_end):
+        return self.__bitboards.verify_move(case_color, x_start, y_start, x_end, y_end)
+
+    # Same answer from the nested lists: selects the appropriate rule based on the tile color
+    def walk_move(self, case_color, x_start, y_start, x_end, y_end):
         couleur = case_color // 10
 
         if couleur == 1:
@@ -95,4 +119,12 @@ class Moves_rules:
         elif couleur == 4:
             return self.red_case_move(x_start, y_start, x_end, y_end)
         else:
-            return False
\ No newline at end of file
+            return False
+
+    # Returns every legal destination of the pawn on (x_start, y_start) in one call
+    def get_legal_moves(self, x_start, y_start):
+        return self.__bitboards.legal_moves(x_start, y_start)
+
+    # Bitboards of the current board, for callers asking many questions at once
+    def get_bitboards(self):
+        return self.__bitboards
@@ -2,9 +2,10 @@
 from UI_tools.win_screen import WinScreen
 from UI_tools.win_screen import WinScreen
 import json
-import copy
 from Game_ui.move_rules import Moves_rules
 from Online.NetworkGameLogic import NetworkGameLogic
+from Engine.game_state import GameState
+from Engine.transposition import TranspositionTable
 
 try:
     NETWORK_LOGIC_AVAILABLE = True
@@ -26,6 +27,12 @@ class GameSession:
         # Movement rules
         self.moves_rules = None
         
+        # Headless game state (hash, attack map, connectivity), hashes of every position
+        # reached, and legal moves cached by hash
+        self.state = None
+        self.position_history = []
+        self.move_cache = TranspositionTable(1 << 10)
+        
         # Game logic handler
         if NETWORK_LOGIC_AVAILABLE:
             self.game_logic = NetworkGameLogic()
@@ -48,9 +55,10 @@ class GameSession:
         self.on_game_end = game_end
     
     def set_board(self, board_data):
-        self.board = copy.deepcopy(board_data)
+        self.board = [row[:] for row in board_data]
         # Initialize movement rules with new board
         self.moves_rules = Moves_rules(self.board)
+        self._reset_state()
         
         if self.is_host:
             # Send board data to client
@@ -94,9 +102,9 @@ class GameSession:
         # Validate and apply move using game logic
         if self.game_logic and self.game_logic.validate_move(
             self.board, self.moves_rules, self.game_type, 
-            self.current_player, from_pos, to_pos
+            self.current_player, from_pos, to_pos, self.state.attack_map
         ):
-            self._apply_move(from_pos, to_pos)
+            winner = self._apply_move(from_pos, to_pos)
             
             # Send move to opponent
             message = {
@@ -108,12 +116,6 @@ class GameSession:
             self.network.send_message(json.dumps(message))
             
             self._switch_player()
-            
-            winner = None
-            if self.game_logic:
-                winner = self.game_logic.check_victory(self.board, self.game_type, self.current_player)
-
-            self._switch_player()
 
             if winner:
                 self._end_game(winner)
@@ -148,6 +150,7 @@ class GameSession:
                 self.game_type = data['game_type']
                 # Initialize rules with received board
                 self.moves_rules = Moves_rules(self.board)
+                self._reset_state()
                 if self.on_board_update:
                     self.on_board_update(self.board)
             
@@ -163,16 +166,11 @@ class GameSession:
                 player = data['player']
                 
                 # Apply opponent's move WITHOUT switching player first
-                self._apply_move(from_pos, to_pos)
+                winner = self._apply_move(from_pos, to_pos)
                 
                 # NOW switch player
                 self._switch_player()
                 
-                winner = None
-                if self.game_logic:
-                    winner = self.game_logic.check_victory(
-                        self.board, self.game_type, self.current_player
-                    )
                 if winner:
                     self._end_game(winner)
             
@@ -192,84 +190,40 @@ class GameSession:
             self._end_game("Disconnection")
     
     def _apply_move(self, from_pos, to_pos):
+        # Plays the move on the game state, returns the winner (0 or None while the game goes on)
         if not self.board:
-            return
-        
-        to_row, to_col = to_pos
-        
-        if self.game_type == 3:  # Isolation
-            # For Isolation, just place the piece
-            dest_color = self.board[to_row][to_col] // 10
-            self.board[to_row][to_col] = dest_color * 10 + self.current_player
+            return None
         
-        else:  # Katarenga and Congress
+        if self.game_type != 3:  # Katarenga and Congress
             if from_pos is None:
                 print("Error : from is None")
-                return
-            
-            from_row, from_col = from_pos
+                return None
             
             # Verify source has correct player piece
-            piece = self.board[from_row][from_col]
-            if piece % 10 != self.current_player:
-                return
-            
-            # Clear source square
-            source_color = piece // 10
-            self.board[from_row][from_col] = source_color * 10
-            
-            # Place piece at destination
-            dest_color = self.board[to_row][to_col] // 10
-            self.board[to_row][to_col] = dest_color * 10 + self.current_player
+            from_row, from_col = from_pos
+            if self.board[from_row][from_col] % 10 != self.current_player:
+                return None
         
-        # Update move rules with new board state
+        # The state updates the board, hash, attack map or connectivity, and the winner
+        winner = self.state.make_move(from_pos, to_pos)
+        self.position_history.append(self.state.key)
+        
+        # Update move rules with the squares the move changed
         if self.moves_rules:
-            self.moves_rules._Moves_rules__board = self.board
+            self.moves_rules.refresh(from_pos, to_pos)
         
         if self.on_board_update:
             self.on_board_update(self.board)
+        return winner
     
-    def _handle_disconnect(self):
-        if not self.game_finished:
-            self._end_game("Disconnection")
+    def _reset_state(self):
+        self.state = GameState(self.game_type, self.board, 1) if self.board else None
+        self.position_history = [self.state.key] if self.state else []
+        self.move_cache.clear()
     
-    def _apply_move(self, from_pos, to_pos):
-        if not self.board:
-            return
-        
-        to_row, to_col = to_pos
-        
-        if self.game_type == 3:  # Isolation
-            # For Isolation, just place the piece
-            dest_color = self.board[to_row][to_col] // 10
-            self.board[to_row][to_col] = dest_color * 10 + self.current_player
-        
-        else:  # Katarenga and Congress
-            if from_pos is None:
-                print("Error : from is None")
-                return
-            
-            from_row, from_col = from_pos
-            
-            # Verify source has correct player piece
-            piece = self.board[from_row][from_col]
-            if piece % 10 != self.current_player:
-                return
-            
-            # Clear source square
-            source_color = piece // 10
-            self.board[from_row][from_col] = source_color * 10
-            
-            # Place piece at destination
-            dest_color = self.board[to_row][to_col] // 10
-            self.board[to_row][to_col] = dest_color * 10 + self.current_player
-        
-        # Update move rules with new board state
-        if self.moves_rules:
-            self.moves_rules._Moves_rules__board = self.board
-        
-        if self.on_board_update:
-            self.on_board_update(self.board)
+    def get_position_key(self):
+        # Zobrist hash of the current position, shared key for caches and the game archive
+        return self.state.key if self.state else None
     
     def _switch_player(self):
         self.current_player = 2 if self.current_player == 1 else 1
@@ -316,11 +270,30 @@ class GameSession:
         return None
     
     def get_valid_moves(self):
+        if self.state:
+            key = self.state.key
+            moves = self.move_cache.probe(key)
+            if moves is None:
+                moves = self.state.legal_moves()
+                self.move_cache.store(key, moves)
+            return list(moves)
+        return []
+    
+    def get_valid_move_mask(self):
         if self.board and self.game_logic:
-            return self.game_logic.get_valid_moves(
-                self.board, self.moves_rules, self.game_type, self.current_player
+            return self.game_logic.get_valid_move_mask(
+                self.board, self.game_type, self.current_player
             )
-        return []
+        return None
+    
+    def is_game_over(self):
+        if self.state:
+            if self.state.winner:
+                return True, self.state.winner
+            if not self.state.has_moves():
+                # No valid moves, opponent wins
+                return True, 3 - self.state.current_player
+        return False, None
     
     def _end_game_received(self, winner):
         
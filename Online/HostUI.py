@@ -4,7 +4,7 @@ from Online.NetworkManager import NetworkManager
 from Online.GameSession import GameSession
 from Editor.Square_selector.SquareSelectorUi import SquareSelectorUi
 from Online.NetworkGameAdapter import NetworkGameAdapter
-import copy
+from Engine.game_state import setup_katarenga, setup_congress
 import time
 class HostUI(BaseUI):
 
@@ -180,50 +180,12 @@ class HostUI(BaseUI):
             network_game.run()
     
     def _place_pawns_katarenga(self, board):
-        new_board = copy.deepcopy(board)
-        
-        # First row, columns 1 to 8 (top of the board) - Player 2
-        for col in range(1, 9):
-            if col < len(new_board[0]):
-                color = new_board[1][col] // 10
-                new_board[1][col] = color * 10 + 2  # Player 2
-        
-        # Last row, columns 1 to 8 - Player 1
-        for col in range(1, 9):
-            if col < len(new_board[0]) and len(new_board) > 8:
-                color = new_board[8][col] // 10
-                new_board[8][col] = color * 10 + 1  # Player 1
-        
-        return new_board
+        # Player 2 on the first row, player 1 on the last row (columns 1 to 8)
+        return setup_katarenga(board)
     
     def _place_pawns_congress(self, board):
         """Place pawns for Congress on 8x8 board"""
-        new_board = copy.deepcopy(board)
-        grid_dim = len(new_board)  # Should be 8 for Congress
-        
-        # Clean board first
-        for i in range(grid_dim):
-            for j in range(grid_dim):
-                color_code = new_board[i][j] // 10
-                new_board[i][j] = color_code * 10
-        
-        # Positions directes pour plateau 8x8 (sans décalage)
-        black_pawns = [(0, 1), (0, 4), (1, 7), (3, 0), (4, 7), (6, 0), (7, 3), (7, 6)]
-        white_pawns = [(0, 3), (0, 6), (1, 0), (3, 7), (4, 0), (6, 7), (7, 1), (7, 4)]
-        
-        # Place black pawns (Player 2)
-        for r, c in black_pawns:
-            if r < grid_dim and c < grid_dim:
-                color = new_board[r][c] // 10
-                new_board[r][c] = color * 10 + 2  # Player 2
-        
-        # Place white pawns (Player 1) 
-        for r, c in white_pawns:
-            if r < grid_dim and c < grid_dim:
-                color = new_board[r][c] // 10
-                new_board[r][c] = color * 10 + 1  # Player 1
-        
-        return new_board
+        return setup_congress(board)
     
     def draw(self):
         screen = self.get_screen()
@@ -1,8 +1,8 @@
 import pygame
 from UI_tools.BaseUi import BaseUI
 from Board.Board_draw_tools import Board_draw_tools
-from Game_ui.move_rules import Moves_rules
 from UI_tools.win_screen import WinScreen
+from Engine.attack_map import AttackMap
 
 from Game_ui.Katarenga import Katarenga
 from Game_ui.Congress import Congress
@@ -41,13 +41,14 @@ class NetworkGameAdapter(BaseUI):
         ai_disabled = False
         
         if self.game_type == 1:
-            return Katarenga(ai_disabled, self.board)
+            katarenga_instance = Katarenga(ai_disabled, self.board)
+            katarenga_instance.undo_hint = False  # no undo/redo in network games
+            return katarenga_instance
         elif self.game_type == 2:
             # Pour Congress, on utilise le fichier original mais on configure le mode réseau
             congress_instance = Congress(ai_disabled, self.board)
             # Remplacer le plateau généré par celui du réseau
-            congress_instance.board = self.board
-            congress_instance.base_board = self._extract_base_board(self.board)
+            congress_instance.set_board(self.board)
             # IMPORTANT: Configurer le mode réseau avec callback
             congress_instance.set_network_mode(True, victory_callback=self._handle_local_victory)
             return congress_instance
@@ -62,19 +63,6 @@ class NetworkGameAdapter(BaseUI):
         # Déclencher immédiatement l'affichage de victoire
         self._trigger_victory(winner)
     
-    def _extract_base_board(self, board_with_pawns):
-        """Extrait le plateau de base (sans pions) à partir du plateau avec pions"""
-        import copy
-        base_board = copy.deepcopy(board_with_pawns)
-        
-        for i in range(len(base_board)):
-            for j in range(len(base_board[0])):
-                # Garde seulement la couleur de base (retire les pions)
-                color_code = base_board[i][j] // 10
-                base_board[i][j] = color_code * 10
-        
-        return base_board
-    
     def run(self):
         self.session.start_game()
         
@@ -216,9 +204,9 @@ class NetworkGameAdapter(BaseUI):
         self.board = new_board
         self.game_instance.board = new_board  # Sync with game instance
         
-        # Pour Congress, on met aussi à jour le base_board
-        if self.game_type == 2 and hasattr(self.game_instance, 'base_board'):
-            self.game_instance.base_board = self._extract_base_board(new_board)
+        # Pour Congress, on reconstruit aussi l'état de jeu (base_board, connectivité)
+        if self.game_type == 2 and hasattr(self.game_instance, 'set_board'):
+            self.game_instance.set_board(new_board)
         
         # Vérifier les conditions de victoire après chaque mise à jour du plateau
         # SEULEMENT pour Katarenga et Isolation (Congress gère via callback)
@@ -324,32 +312,19 @@ class NetworkGameAdapter(BaseUI):
     
     def _can_play_isolation(self, current_player):
         """Vérifie si le joueur peut encore jouer en Isolation"""
-        for i in range(len(self.board)):
-            for j in range(len(self.board[0])):
-                case = self.board[i][j]
-                # Ignorer les coins et cases déjà occupées
-                if case in (0, 50, 60) or case % 10 != 0:
-                    continue
-                
-                # Vérifier si la case n'est pas "en prise" (sous attaque)
-                if not self._is_square_under_attack(i, j):
-                    return True
-        return False
+        return self._get_attack_map().can_play()
     
     def _is_square_under_attack(self, x, y):
         """Vérifie si une case est sous attaque"""
-        for i in range(len(self.board)):
-            for j in range(len(self.board[0])):
-                case = self.board[i][j]
-                if case % 10 != 0:  # Il y a un pion ici
-                    try:
-                        # Utiliser les règles de mouvement pour vérifier l'attaque
-                        if hasattr(self.game_instance, 'moves_rules'):
-                            if self.game_instance.moves_rules.verify_move(case, i, j, x, y):
-                                return True
-                    except:
-                        continue
-        return False
+        return self._get_attack_map().is_attacked(x, y)
+    
+    def _get_attack_map(self):
+        """Carte des cases attaquées, maintenue par la session ou reconstruite depuis le plateau"""
+        state = getattr(self.session, 'state', None)
+        attack_map = state.attack_map if state else None
+        if attack_map is None:
+            attack_map = AttackMap(self.board)
+        return attack_map
     
     def on_player_change(self, new_player):
         self.current_player = new_player
@@ -1,10 +1,13 @@
-from collections import deque
-from UI_tools.win_screen import WinScreen
+from Engine.bitboard import BitboardRules
+from Engine.attack_map import AttackMap
+from Engine.connectivity import ConnectivityTracker
+from Engine import movegen
+from Engine.game_state import katarenga_winner, congress_winner
 
 class NetworkGameLogic:
     
     
-    def validate_move(self, board, moves_rules, game_type, current_player, from_pos, to_pos):
+    def validate_move(self, board, moves_rules, game_type, current_player, from_pos, to_pos, attack_map=None):
         
         if not moves_rules or not board:
             return False
@@ -16,7 +19,7 @@ class NetworkGameLogic:
             return False
         
         if game_type == 3:  # Isolation
-            return self._validate_isolation_move(board, moves_rules, current_player, from_pos, to_pos)
+            return self._validate_isolation_move(board, moves_rules, current_player, from_pos, to_pos, attack_map)
         elif game_type == 1:  # Katarenga
             return self._validate_katarenga_move(board, moves_rules, current_player, from_pos, to_pos)
         elif game_type == 2:  # Congress
@@ -24,7 +27,7 @@ class NetworkGameLogic:
         
         return False
     
-    def _validate_isolation_move(self, board, moves_rules, current_player, from_pos, to_pos):
+    def _validate_isolation_move(self, board, moves_rules, current_player, from_pos, to_pos, attack_map=None):
        
         to_row, to_col = to_pos
         
@@ -42,7 +45,9 @@ class NetworkGameLogic:
             return False
         
         # Check square is not "en prise" = under attack
-        if self._is_square_under_attack(board, moves_rules, to_row, to_col):
+        if attack_map is None:
+            attack_map = AttackMap(board)
+        if attack_map.is_attacked(to_row, to_col):
             return False
         
         return True
@@ -64,6 +69,10 @@ class NetworkGameLogic:
         if case_color % 10 != current_player:
             return False
 
+        # A pawn never lands on one of its own pawns, corners included
+        if board[to_row][to_col] % 10 == current_player:
+            return False
+
         # Correction : victoire Joueur 1 = depuis ligne 1 vers (0,0) ou (0,9)
         if (current_player == 1 and from_row == 1 and 1 <= from_col <= 8 
             and (to_row, to_col) in [(0, 0), (0, 9)]):
@@ -93,97 +102,43 @@ class NetworkGameLogic:
         if case_color % 10 != current_player:
             return False
         
+        # No captures in Congress: the destination must be free
+        if board[to_pos[0]][to_pos[1]] % 10 != 0:
+            return False
+        
         # Use existing movement rules
         return moves_rules.verify_move(case_color, from_row, from_col, to_pos[0], to_pos[1])
     
-    def check_victory(self, board, game_type, current_player):
+    def check_victory(self, board, game_type, current_player, attack_map=None, connectivity=None):
         
         if game_type == 1:  # Katarenga
-            print("coucou")
             return self._check_katarenga_victory(board)
         elif game_type == 2:  # Congress
-            return self._check_congress_victory(board)
+            return self._check_congress_victory(board, connectivity)
         elif game_type == 3:  # Isolation
-            return self._check_isolation_victory(board, current_player)
+            return self._check_isolation_victory(board, current_player, attack_map)
         
         return None
     
     def _check_katarenga_victory(self, board):
-        
-        player1_count = 0
-        player2_count = 0
-        print("la fonction est appeller")
-        
-        # Count pawns for each player
-        for row in range(len(board)):
-            for col in range(len(board[0])):
-                player = board[row][col] % 10
-                if player == 1:
-                    player1_count += 1
-                elif player == 2:
-                    player2_count += 1
-        
-        print("les joueur sont comptés")
-        # Victory by elimination
-        if player1_count == 0:
-            print("gagnant")
-            return 2
-        if player2_count == 0:
-            print("gagnant")
-            return 1
-        
-        # Victory by corner occupation 
-        if len(board) >= 10 and len(board[0]) >= 10:
-            # Player 2 wins if occupies both bottom corners
-            if board[9][0] % 10 == 2 and board[9][9] % 10 == 2:
-                return 2
-            
-            # Player 1 wins if occupies both top corners  
-            if board[0][0] % 10 == 1 and board[0][9] % 10 == 1:
-                return 1
-        
-        return None
+        # Victory by elimination or by occupying both far corners
+        return katarenga_winner(BitboardRules(board)) or None
     
-    def _check_congress_victory(self, board):
-       
-        grid_dim = len(board)
-        
-        for player in [1, 2]:
-            # Find all positions of current player
-            positions = [(i, j) for i in range(grid_dim) for j in range(grid_dim)
-                        if board[i][j] % 10 == player]
-            
-            if not positions:
-                continue
-            
-            # Check if all pawns are connected using BFS
-            visited = set([positions[0]])
-            queue = deque([positions[0]])
-            
-            while queue:
-                x, y = queue.popleft()
-                for dx, dy in [(-1,0), (1,0), (0,-1), (0,1)]:
-                    nx, ny = x + dx, y + dy
-                    if (0 <= nx < grid_dim and 0 <= ny < grid_dim and
-                        (nx, ny) not in visited and board[nx][ny] % 10 == player):
-                        visited.add((nx, ny))
-                        queue.append((nx, ny))
-            
-            # If all pawns are connected, player wins
-            if len(visited) == len(positions):
-                return player
+    def _check_congress_victory(self, board, connectivity=None):
+        # connectivity: incrementally maintained ConnectivityTracker of board, built here if missing
+        if connectivity is None:
+            connectivity = ConnectivityTracker(board)
         
-        return None
+        # If all pawns of a player are connected, that player wins
+        return congress_winner(connectivity) or None
     
-    def _check_isolation_victory(self, board, current_player):
-       
-        # Count total moves made
-        total_moves = 0
-        for row in range(len(board)):
-            for col in range(len(board[0])):
-                if board[row][col] % 10 != 0:
-                    total_moves += 1
+    def _check_isolation_victory(self, board, current_player, attack_map=None):
+        # attack_map: incrementally maintained AttackMap of board, built here if missing
+        if attack_map is None:
+            attack_map = AttackMap(board)
         
+        # Count total moves made
+        total_moves = bin(attack_map.bb.occupied()).count("1")
         max_moves = len(board) * len(board[0])
         
         # Game ends if board is full
@@ -191,7 +146,7 @@ class NetworkGameLogic:
             return  current_player  # Last player to move wins
         
         # Check if current player can still play
-        if not self.can_play_isolation(board, current_player):
+        if not attack_map.can_play():
             # Current player cannot play, opponent wins
             winner = 2 if current_player == 1 else 1
             return winner
@@ -199,63 +154,29 @@ class NetworkGameLogic:
         
         return None
     
-    def can_play_isolation(self, board, current_player):
-        
-        for i in range(len(board)):
-            for j in range(len(board[0])):
-                case = board[i][j]
-                # Skip corners and already occupied squares
-                if case in (0, 50, 60) or case % 10 != 0:
-                    continue
-                
-                # Check if square is not "en prise" (under attack)
-                if not self.is_square_under_attack(board, None, i, j):
-                    return True
-        return False
+    def can_play_isolation(self, board, current_player, attack_map=None):
+        
+        if attack_map is None:
+            attack_map = AttackMap(board)
+        return attack_map.can_play()
     
     def is_square_under_attack(self, board, moves_rules, x, y):
-       
-        # Create temporary moves_rules if not provided
-        if moves_rules is None:
-            from Game_ui.move_rules import Moves_rules
-            moves_rules = Moves_rules(board)
-        
-        for i in range(len(board)):
-            for j in range(len(board[0])):
-                case = board[i][j]
-                if case % 10 != 0:  # There's a piece here
-                    try:
-                        if moves_rules.verify_move(case, i, j, x, y):
-                            return True
-                    except:
-                        # Handle any errors in move verification
-                        continue
-        return False
+        
+        return AttackMap(board).is_attacked(x, y)
     
     def get_valid_moves(self, board, moves_rules, game_type, current_player):
-        
-        valid_moves = []
-        
-        if game_type == 3:  # Isolation
-            # Check all empty squares
-            for row in range(len(board)):
-                for col in range(len(board[0])):
-                    if self.validate_move(board, moves_rules, game_type, current_player, None, (row, col)):
-                        valid_moves.append((None, (row, col)))
-        
-        else:  # Katarenga and Congress
-            # Check all player's pieces
-            for from_row in range(len(board)):
-                for from_col in range(len(board[0])):
-                    if board[from_row][from_col] % 10 == current_player:
-                        # Check all possible destinations
-                        for to_row in range(len(board)):
-                            for to_col in range(len(board[0])):
-                                if self.validate_move(board, moves_rules, game_type, current_player, 
-                                                    (from_row, from_col), (to_row, to_col)):
-                                    valid_moves.append(((from_row, from_col), (to_row, to_col)))
-        
-        return valid_moves
+        # All legal moves in one pass over a bitboard snapshot, as ((row, col) or None, (row, col))
+        if not board:
+            return []
+        return movegen.legal_moves_from_board(board, game_type, current_player)
+    
+    def get_packed_moves(self, board, game_type, current_player):
+        # Same moves as get_valid_moves, packed as (from_sq << 8) | to_sq in an array('H')
+        return movegen.generate_moves(BitboardRules(board), game_type, current_player)
+    
+    def get_valid_move_mask(self, board, game_type, current_player):
+        # NumPy boolean from/to matrix (flat placement mask for Isolation)
+        return movegen.legal_move_mask(BitboardRules(board), game_type, current_player)
     
     def is_game_over(self, board, game_type, current_player):
         
@@ -265,8 +186,7 @@ class NetworkGameLogic:
             return True, winner
         
         # Check if current player has valid moves
-        valid_moves = self.get_valid_moves(board, None, game_type, current_player)
-        if not valid_moves:
+        if not movegen.has_moves(BitboardRules(board), game_type, current_player):
             # No valid moves, opponent wins
             opponent = 2 if current_player == 1 else 1
             return True, opponent
@@ -291,7 +211,7 @@ class NetworkGameLogic:
             info['connectivity'] = self._get_congress_connectivity(board)
         elif game_type == 3:  # Isolation
             info['board_fill_percentage'] = (info['total_pieces'] / (info['board_size'][0] * info['board_size'][1])) * 100
-            info['valid_moves_count'] = len(self.get_valid_moves(board, None, game_type, current_player))
+            info['valid_moves_count'] = movegen.count_moves(BitboardRules(board), game_type, current_player)
         
         return info
     
@@ -310,41 +230,13 @@ class NetworkGameLogic:
     def _get_congress_connectivity(self, board):
         
         connectivity = {}
+        tracker = ConnectivityTracker(board)
         
         for player in [1, 2]:
-            positions = [(i, j) for i in range(len(board)) for j in range(len(board[0]))
-                        if board[i][j] % 10 == player]
-            
-            if positions:
-                # Count connected components
-                visited = set()
-                components = 0
-                
-                for pos in positions:
-                    if pos not in visited:
-                        components += 1
-                        
-                        queue = deque([pos])
-                        visited.add(pos)
-                        
-                        while queue:
-                            x, y = queue.popleft()
-                            for dx, dy in [(-1,0), (1,0), (0,-1), (0,1)]:
-                                nx, ny = x + dx, y + dy
-                                if ((nx, ny) in positions and (nx, ny) not in visited):
-                                    visited.add((nx, ny))
-                                    queue.append((nx, ny))
-                
-                connectivity[f'player_{player}'] = {
-                    'total_pieces': len(positions),
-                    'connected_components': components,
-                    'is_fully_connected': components == 1
-                }
-            else:
-                connectivity[f'player_{player}'] = {
-                    'total_pieces': 0,
-                    'connected_components': 0,
-                    'is_fully_connected': False
-                }
-        
-        return connectivity
\ No newline at end of file
+            connectivity[f'player_{player}'] = {
+                'total_pieces': tracker.pawn_count(player),
+                'connected_components': tracker.component_count(player),
+                'is_fully_connected': tracker.is_connected(player)
+            }
+        
+        return connectivity
@@ -0,0 +1,131 @@
+# Balance analysis: does a board favor the player who moves first?
+#   python -m Tools.balance --layout default1,default2,default3,default4 --games 100
+#   python -m Tools.balance --index layout_index.db --sample 50 --game katarenga --games 40
+# The same computer player takes both sides of every game, so any difference between
+# the two win rates comes from the board and the first move. Games run headless on a
+# process pool (Tools.tournament.play_game) and their results are added to the balance
+# store (Engine.balance_store); running again plays more games and tightens the interval.
+# Game i of a layout gets a seed derived from --seed, the layout and i, and a layout's
+# games continue the sequence of those already stored, so no game is played twice.
+# The players are deterministic, so a few random opening moves (--random-plies) make
+# the games differ. The index keeps one board per orbit of the eight orientations, but
+# a mode only merges those in its own group (Engine.symmetry), so every index entry is
+# analyzed in each of its orientations that plays differently.
+import argparse
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from AI.players import make_player
+from Engine.balance_store import BalanceStore, balance_key, describe_balance, STORE_FILE
+from Engine.layouts import load_squares, parse_layout, default_layout, assemble, game_board, DATA_FILE, GAME_NAMES
+from Engine.movegen import KATARENGA, CONGRESS, ISOLATION
+from Engine.symmetry import layout_orientations
+from Tools.layout_index import LayoutIndex
+from Tools.tournament import play_game, game_seed, MAX_PLIES
+
+DEFAULT_PLAYERS = {KATARENGA: "alphabeta:easy", CONGRESS: "mcts:50", ISOLATION: "solver"}
+DEFAULT_RANDOM_PLIES = 2
+MODE_NAMES = {game_type: name for name, game_type in GAME_NAMES.items()}
+
+
+def _play(game_type, board, player, seed, max_plies, random_plies):
+    # Pool entry point: (winner or 0, plies) of one game
+    winner, plies, _ = play_game(game_type, game_board(game_type, board), (player, player), seed,
+                                 max_plies, random_plies)
+    return winner, plies
+
+
+def analyze(layouts, game_types, games, store, players=None, seed=0, workers=None,
+            max_plies=MAX_PLIES, random_plies=DEFAULT_RANDOM_PLIES, orientations=False):
+    # Plays the given number of new games on each (8x8 board, game mode) and adds them to the store.
+    # orientations: also every other orientation of each board that plays differently in the mode.
+    # Returns {(key, game_type): stats} of the analyzed layouts.
+    players = players or DEFAULT_PLAYERS
+    jobs = {}
+    for layout in layouts:
+        for game_type in game_types:
+            for board in layout_orientations(layout, game_type) if orientations else [layout]:
+                key = balance_key(board, game_type)
+                if (key, game_type) not in jobs:
+                    jobs[key, game_type] = board
+
+    summary = {}
+    with ProcessPoolExecutor(max_workers=workers or os.cpu_count() or 1) as executor:
+        futures = {}
+        for (key, game_type), board in jobs.items():
+            player = players[game_type]
+            first = store.games_played(key, game_type, player)
+            for index in range(first, first + games):
+                seed_i = game_seed(seed ^ int(key, 16), index)
+                future = executor.submit(_play, game_type, board, player, seed_i, max_plies, random_plies)
+                futures[future] = (key, game_type)
+
+        pending = {job: games for job in jobs}
+        results = {job: [] for job in jobs}
+        for future in as_completed(futures):
+            job = futures[future]
+            results[job].append(future.result())
+            pending[job] -= 1
+            if pending[job] == 0:
+                key, game_type = job
+                store.add(key, game_type, players[game_type], results.pop(job))
+                summary[job] = store.get(key, game_type, players[game_type])
+                print(f"{key} {MODE_NAMES[game_type]:<10} {describe_balance(summary[job])}"
+                      f"  {summary[job]['mean_plies']:.1f} plies", flush=True)
+    return summary
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Measure the first-player advantage of boards with computer self-play.")
+    parser.add_argument("--game", default="all", help="katarenga, congress, isolation or all")
+    parser.add_argument("--layout", default=None,
+                        help="four square names (top left, top right, bottom left, bottom right) or one")
+    parser.add_argument("--data", default=DATA_FILE, help="file holding the squares")
+    parser.add_argument("--index", default=None, help="analyze the layouts of this index (Tools.layout_index)")
+    parser.add_argument("--sample", type=int, default=0, help="only N random layouts of the index")
+    parser.add_argument("--games", type=int, default=20, help="new games per layout and game mode")
+    parser.add_argument("--player", default=None, help="player spec for both sides (default depends on the mode)")
+    parser.add_argument("--store", default=STORE_FILE, help="results file")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--max-plies", type=int, default=MAX_PLIES)
+    parser.add_argument("--random-plies", type=int, default=DEFAULT_RANDOM_PLIES)
+    args = parser.parse_args(argv)
+
+    try:
+        game_types = list(MODE_NAMES) if args.game == "all" else [GAME_NAMES[args.game]]
+    except KeyError:
+        parser.error(f"Unknown game mode: {args.game}")
+    players = dict(DEFAULT_PLAYERS)
+    try:
+        if args.player:
+            players = {game_type: args.player for game_type in game_types}
+        for game_type in game_types:
+            make_player(players[game_type], game_type)
+        if args.index:
+            index = LayoutIndex(args.index)
+            entries = index.sample(args.sample, args.seed) if args.sample else index.select()
+            index.close()
+            layouts = [entry["board"] for entry in entries]
+        else:
+            squares = load_squares(args.data)
+            spec = args.layout or default_layout(squares)
+            layouts = [assemble(parse_layout(spec, squares))]
+    except ValueError as e:
+        parser.error(str(e))
+
+    store = BalanceStore(args.store)
+    start = time.perf_counter()
+    try:
+        summary = analyze(layouts, game_types, args.games, store, players, args.seed, args.workers,
+                          args.max_plies, args.random_plies, orientations=bool(args.index))
+    finally:
+        store.close()
+    print(f"{len(summary)} layouts analyzed in {time.perf_counter() - start:.1f}s, results in '{args.store}'.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
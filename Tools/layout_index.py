@@ -0,0 +1,266 @@
+# Index of every board the square catalog can build.
+#   python -m Tools.layout_index                     build or update layout_index.db
+#   python -m Tools.layout_index --sample 5 --seed 1 print five layouts
+#   python -m Tools.layout_index --show <id>
+# A board is four squares of game_data.json, each in one of its eight orientations (a
+# square may be used more than once), as in SquareSelectorUi. Boards that are rotations
+# or mirror images of each other are stored once, in their canonical orientation
+# (Engine.symmetry, all of D4). The layout ID is a hash of the canonical tiles, so it
+# does not depend on the catalog order, the square names or the run.
+# Stored with each layout:
+#   squares     the four (square name, orientation) that build the canonical board
+#   orbit       how many distinct boards the entry stands for (1 to 8)
+#   histograms  blue, green, yellow, red counts of each quadrant
+#   mobility    legal moves of each player from the start position (Katarenga and
+#               Congress), measured on the canonical orientation
+# Enumeration works on squares, not cells: a board symmetry moves the quadrants and
+# turns each square, so an orbit is found from four square indexes. Each worker of the
+# process pool takes the boards with one square in the top left quadrant.
+# Updates are incremental: adding squares only enumerates the boards that use one of
+# them. Changing or removing a square rebuilds the index.
+import argparse
+import json
+import os
+import random
+import sqlite3
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from Engine.layouts import load_squares, assemble, game_board, layout_id, QUADRANTS, DATA_FILE
+from Engine.movegen import KATARENGA, CONGRESS, legal_moves_from_board
+from Engine.game_state import setup_board
+from Engine.symmetry import D4, canonical_form, canonical_square, transform_board, transform_coords
+
+INDEX_FILE = "layout_index.db"
+INDEX_VERSION = 1
+COLORS = (1, 2, 3, 4)
+FEATURE_COLUMNS = ("katarenga_p1", "katarenga_p2", "congress_p1", "congress_p2", "orbit")
+
+
+def oriented_squares(squares):
+    # (name, orientation, 4x4 square) for every distinct orientation of every distinct square.
+    # A square that is an orientation of an earlier one adds nothing.
+    result = []
+    seen = set()
+    for name, square in squares.items():
+        tiles = [[value // 10 * 10 for value in row] for row in square]
+        canonical = canonical_square(tiles)[0]
+        if canonical in seen:
+            continue
+        seen.add(canonical)
+        boards = set()
+        for transform in D4:
+            oriented = transform_board(tiles, transform)
+            key = tuple(tuple(row) for row in oriented)
+            if key not in boards:
+                boards.add(key)
+                result.append((name, transform, oriented))
+    return result
+
+
+def orientation_table(oriented):
+    # table[index][transform] = index of the oriented square turned by transform
+    index_of = {tuple(tuple(row) for row in square): index for index, (_, _, square) in enumerate(oriented)}
+    return [[index_of[tuple(tuple(row) for row in transform_board(square, transform))] for transform in D4]
+            for _, _, square in oriented]
+
+
+# QUADRANT_MOVES[transform][p] = quadrant that quadrant p goes to
+QUADRANT_MOVES = [[QUADRANTS.index(tuple(4 * value for value in transform_coords(top // 4, left // 4, 2, 2, transform)))
+                   for top, left in QUADRANTS]
+                  for transform in D4]
+
+
+def transform_layout(layout, table, transform):
+    # Four oriented square indexes of the board turned by transform
+    result = [0] * 4
+    for quadrant, index in enumerate(layout):
+        result[QUADRANT_MOVES[transform][quadrant]] = table[index][transform]
+    return tuple(result)
+
+
+def features(oriented, table, layout):
+    # Index row of the board built from four oriented square indexes
+    orbit = {transform_layout(layout, table, transform) for transform in D4}
+    board = assemble([oriented[index][2] for index in layout])
+    tiles, transform = canonical_form(board)
+    canonical_layout = transform_layout(layout, table, transform)
+
+    histograms = []
+    for top, left in QUADRANTS:
+        cells = [tiles[top + row][left + col] // 10 for row in range(4) for col in range(4)]
+        histograms.append([cells.count(color) for color in COLORS])
+
+    mobility = []
+    for game_type in (KATARENGA, CONGRESS):
+        start = setup_board(game_type, game_board(game_type, [list(row) for row in tiles]))
+        mobility += [len(legal_moves_from_board(start, game_type, player)) for player in (1, 2)]
+
+    squares = [[oriented[index][0], oriented[index][1]] for index in canonical_layout]
+    return (layout_id(tiles), bytes(value // 10 for row in tiles for value in row), json.dumps(squares),
+            len(orbit), json.dumps(histograms), *mobility)
+
+
+def _enumerate_first(first, oriented, table, new_names):
+    # Pool entry point: index rows of the orbits whose smallest member has first in the top left
+    count = len(oriented)
+    rows = []
+    for second in range(count):
+        for third in range(count):
+            for fourth in range(count):
+                layout = (first, second, third, fourth)
+                if new_names and not any(oriented[index][0] in new_names for index in layout):
+                    continue
+                if all(transform_layout(layout, table, transform) >= layout for transform in D4):
+                    rows.append(features(oriented, table, layout))
+    return rows
+
+
+class LayoutIndex:
+
+    def __init__(self, filename=INDEX_FILE):
+        self.filename = filename
+        self.db = sqlite3.connect(filename)
+        self.db.executescript("""
+            CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT);
+            CREATE TABLE IF NOT EXISTS squares (name TEXT PRIMARY KEY, cells TEXT);
+            CREATE TABLE IF NOT EXISTS layouts (
+                id TEXT PRIMARY KEY, tiles BLOB, squares TEXT, orbit INTEGER, histograms TEXT,
+                katarenga_p1 INTEGER, katarenga_p2 INTEGER, congress_p1 INTEGER, congress_p2 INTEGER);
+        """)
+        version = self.db.execute("SELECT value FROM meta WHERE key = 'version'").fetchone()
+        if version is not None and int(version[0]) != INDEX_VERSION:
+            print(f"Index '{filename}' has version {version[0]}, rebuilding.")
+            self.clear()
+
+    def close(self):
+        self.db.close()
+
+    def clear(self):
+        with self.db:
+            self.db.execute("DELETE FROM layouts")
+            self.db.execute("DELETE FROM squares")
+            self.db.execute("INSERT OR REPLACE INTO meta VALUES ('version', ?)", (str(INDEX_VERSION),))
+
+    def indexed_squares(self):
+        return {name: json.loads(cells) for name, cells in self.db.execute("SELECT name, cells FROM squares")}
+
+    def update(self, squares, workers=None, rebuild=False):
+        # Brings the index up to date with the catalog; returns the number of layouts added
+        tiles_of = {name: [[value // 10 * 10 for value in row] for row in square] for name, square in squares.items()}
+        indexed = self.indexed_squares()
+        if rebuild or any(name not in tiles_of or tiles_of[name] != cells for name, cells in indexed.items()):
+            self.clear()
+            indexed = {}
+        new_names = {name for name in tiles_of if name not in indexed}
+        if not new_names:
+            return 0
+
+        oriented = oriented_squares(tiles_of)
+        table = orientation_table(oriented)
+        only_new = new_names if indexed else None
+        added = 0
+        with ProcessPoolExecutor(max_workers=workers or os.cpu_count() or 1) as executor:
+            futures = [executor.submit(_enumerate_first, first, oriented, table, only_new)
+                       for first in range(len(oriented))]
+            for future in futures:
+                rows = future.result()
+                with self.db:
+                    before = self.db.total_changes
+                    self.db.executemany("INSERT OR IGNORE INTO layouts VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)", rows)
+                    added += self.db.total_changes - before
+        with self.db:
+            self.db.executemany("INSERT OR REPLACE INTO squares VALUES (?, ?)",
+                                [(name, json.dumps(tiles_of[name])) for name in new_names])
+            self.db.execute("INSERT OR REPLACE INTO meta VALUES ('version', ?)", (str(INDEX_VERSION),))
+        return added
+
+    def count(self):
+        return self.db.execute("SELECT COUNT(*) FROM layouts").fetchone()[0]
+
+    def _entry(self, row):
+        layout_id, tiles, squares, orbit, histograms, *mobility = row
+        return {
+            "id": layout_id,
+            "board": [[value * 10 for value in tiles[row * 8:(row + 1) * 8]] for row in range(8)],
+            "squares": json.loads(squares),
+            "orbit": orbit,
+            "histograms": json.loads(histograms),
+            "mobility": {"katarenga": mobility[:2], "congress": mobility[2:]},
+        }
+
+    def get(self, layout_id):
+        row = self.db.execute("SELECT * FROM layouts WHERE id = ?", (layout_id,)).fetchone()
+        return None if row is None else self._entry(row)
+
+    def find(self, board):
+        # Entry of any orientation of an 8x8 board, or None
+        return self.get(layout_id(canonical_form([[value // 10 * 10 for value in row] for row in board])[0]))
+
+    def select(self, ranges=None, limit=None):
+        # Entries whose features lie in ranges: {column: (low, high)}, bounds included
+        clauses, params = [], []
+        for column, (low, high) in (ranges or {}).items():
+            if column not in FEATURE_COLUMNS:
+                raise ValueError(f"Unknown feature: {column} (known: {', '.join(FEATURE_COLUMNS)})")
+            clauses.append(f"{column} BETWEEN ? AND ?")
+            params += [low, high]
+        query = "SELECT * FROM layouts" + (" WHERE " + " AND ".join(clauses) if clauses else "") + " ORDER BY id"
+        if limit is not None:
+            query += " LIMIT ?"
+            params.append(limit)
+        return [self._entry(row) for row in self.db.execute(query, params)]
+
+    def sample(self, count, seed=None):
+        # count entries drawn uniformly without replacement; the same seed gives the same draw
+        ids = [row[0] for row in self.db.execute("SELECT id FROM layouts ORDER BY id")]
+        chosen = random.Random(seed).sample(ids, min(count, len(ids)))
+        return [self.get(layout_id) for layout_id in chosen]
+
+
+def describe(entry):
+    lines = [f"{entry['id']}  orbit {entry['orbit']}  squares "
+             + ", ".join(f"{name}/{transform}" for name, transform in entry["squares"])]
+    lines.append(f"  mobility katarenga {entry['mobility']['katarenga']}  congress {entry['mobility']['congress']}"
+                 f"  quadrant colors (b, g, y, r) {entry['histograms']}")
+    for row in entry["board"]:
+        lines.append("  " + " ".join(str(value // 10) for value in row))
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Build, update and query the index of boards the square catalog can build.")
+    parser.add_argument("--data", default=DATA_FILE, help="file holding the squares")
+    parser.add_argument("--index", default=INDEX_FILE, help="index file")
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--rebuild", action="store_true", help="enumerate everything again")
+    parser.add_argument("--sample", type=int, default=0, help="print N random layouts")
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--show", default=None, help="print one layout by ID")
+    args = parser.parse_args(argv)
+
+    index = LayoutIndex(args.index)
+    try:
+        if args.show:
+            entry = index.get(args.show)
+            if entry is None:
+                print(f"No layout '{args.show}' in '{args.index}'.")
+                return 1
+            print(describe(entry))
+            return 0
+        if args.sample:
+            for entry in index.sample(args.sample, args.seed):
+                print(describe(entry))
+            return 0
+
+        start = time.perf_counter()
+        added = index.update(load_squares(args.data), args.workers, args.rebuild)
+        print(f"{added} layouts added in {time.perf_counter() - start:.1f}s, {index.count()} in '{args.index}'.")
+    finally:
+        index.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
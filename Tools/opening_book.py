@@ -0,0 +1,160 @@
+# Builds the opening book read by the Katarenga and Congress AIs (Engine.opening_book).
+#   python -m Tools.opening_book --game katarenga --layout default1,default2,default3,default4 --depth 4
+#   python -m Tools.opening_book --game all --index layout_index.db --sample 20
+# From the start position of each layout, positions are searched one ply at a time on a
+# process pool with a deep search: KatarengaAI at --level, CongressAI with --iterations
+# playouts. Every position of the first --branch plies is expanded with all its moves,
+# later ones only with their book move, so the book covers any opening of the player
+# and then follows its own line. Positions are merged by canonical key, so mirrored
+# layouts and transpositions are searched once. New entries are merged into the file.
+import argparse
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from AI.katarenga_ai import KatarengaAI, LEVELS
+from AI.congress_ai import CongressAI
+from Engine.game_state import GameState, setup_board
+from Engine.layouts import load_squares, parse_layout, default_layout, assemble, game_board, DATA_FILE
+from Engine.movegen import KATARENGA, CONGRESS
+from Engine.opening_book import OpeningBook, write_book, pack_move, unpack_move, BOOK_FILE
+from Engine.symmetry import canonical_position, transform_move, inverse
+from Tools.layout_index import LayoutIndex
+
+BOOK_GAMES = {"katarenga": KATARENGA, "congress": CONGRESS}
+
+
+def _search(game_type, board, player, level, time_limit, iterations, seed):
+    # Pool entry point: (move, score) of a deep search; score from player's side
+    if game_type == KATARENGA:
+        ai = KatarengaAI(level=level, time_limit=time_limit)
+        move = ai.choose_move(board, player)
+        return move, ai.last_stats.get("score", 0)
+    ai = CongressAI(workers=1, time_limit=None, seed=seed, max_iterations=iterations)
+    move = ai.choose_move(board, player)
+    return move, int(ai.last_stats.get("win_rate", 0.5) * 1000)
+
+
+def children(game_type, board, player, moves):
+    # (board, player) after each of moves, for the games that go on
+    state = GameState(game_type, [row[:] for row in board], player)
+    result = []
+    for move in moves:
+        state.make_move(*move)
+        if not state.winner:
+            result.append(([row[:] for row in state.board], state.current_player))
+        state.unmake_move()
+    return result
+
+
+def build_book(boards, game_types, entries, depth=4, branch=2, level="expert", time_limit=2.0,
+               iterations=5000, workers=None, seed=0):
+    # Adds the openings of every 8x8 board to entries ({key: (packed move, score)}).
+    # Returns the number of positions searched.
+    searched = 0
+    with ProcessPoolExecutor(max_workers=workers or os.cpu_count() or 1) as executor:
+        for game_type in game_types:
+            frontier = {}
+            for board in boards:
+                start = setup_board(game_type, game_board(game_type, board))
+                frontier.setdefault(canonical_position(start, 1, game_type)[0], (start, 1))
+
+            for ply in range(depth):
+                futures = {}
+                for key, (board, player) in frontier.items():
+                    if key not in entries:
+                        futures[key] = executor.submit(_search, game_type, board, player, level, time_limit,
+                                                       iterations, seed + searched + len(futures))
+                for key, future in futures.items():
+                    move, score = future.result()
+                    if move is None:
+                        continue
+                    board, _ = frontier[key]
+                    rows, cols = len(board), len(board[0])
+                    transform = canonical_position(board, frontier[key][1], game_type)[1]
+                    entries[key] = (pack_move(transform_move(move, rows, cols, transform), cols), score)
+                searched += len(futures)
+                print(f"{ply + 1}/{depth} plies: {len(futures)} positions searched, {len(entries)} in the book",
+                      flush=True)
+
+                if ply + 1 == depth:
+                    break
+                next_frontier = {}
+                for key, (board, player) in frontier.items():
+                    if ply < branch:
+                        moves = GameState(game_type, [row[:] for row in board], player).legal_moves()
+                    elif key in entries:
+                        moves = [book_move(entries[key], board, player, game_type)]
+                    else:
+                        continue
+                    for child, child_player in children(game_type, board, player, moves):
+                        next_frontier.setdefault(canonical_position(child, child_player, game_type)[0],
+                                                 (child, child_player))
+                frontier = next_frontier
+    return searched
+
+
+def book_move(entry, board, player, game_type):
+    # Stored move turned back to the orientation of board
+    rows, cols = len(board), len(board[0])
+    transform = canonical_position(board, player, game_type)[1]
+    return transform_move(unpack_move(entry[0], cols), rows, cols, inverse(transform))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Build or extend the opening book of the AIs.")
+    parser.add_argument("--game", default="all", help="katarenga, congress or all")
+    parser.add_argument("--layout", default=None,
+                        help="four square names (top left, top right, bottom left, bottom right) or one")
+    parser.add_argument("--data", default=DATA_FILE, help="file holding the squares")
+    parser.add_argument("--index", default=None, help="build for the layouts of this index (Tools.layout_index)")
+    parser.add_argument("--sample", type=int, default=0, help="only N random layouts of the index")
+    parser.add_argument("--book", default=BOOK_FILE, help="book file, extended if it exists")
+    parser.add_argument("--depth", type=int, default=4, help="plies covered from the start position")
+    parser.add_argument("--branch", type=int, default=2, help="plies where every move is expanded")
+    parser.add_argument("--level", default="expert", help="KatarengaAI level of the search")
+    parser.add_argument("--time", type=float, default=2.0, help="KatarengaAI seconds per position")
+    parser.add_argument("--iterations", type=int, default=5000, help="CongressAI playouts per position")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--workers", type=int, default=None)
+    args = parser.parse_args(argv)
+
+    if args.game == "all":
+        game_types = list(BOOK_GAMES.values())
+    elif args.game in BOOK_GAMES:
+        game_types = [BOOK_GAMES[args.game]]
+    else:
+        parser.error(f"No opening book for game mode: {args.game}")
+    if args.level not in LEVELS:
+        parser.error(f"Unknown AI level: {args.level}")
+    try:
+        if args.index:
+            index = LayoutIndex(args.index)
+            layouts = index.sample(args.sample, args.seed) if args.sample else index.select()
+            index.close()
+            boards = [layout["board"] for layout in layouts]
+        else:
+            squares = load_squares(args.data)
+            spec = args.layout or default_layout(squares)
+            boards = [assemble(parse_layout(spec, squares))]
+    except ValueError as e:
+        parser.error(str(e))
+
+    entries = {}
+    book = OpeningBook.open_existing(args.book)
+    if book is not None:
+        entries = dict(book.items())
+        book.close()
+
+    start = time.perf_counter()
+    searched = build_book(boards, game_types, entries, args.depth, args.branch, args.level, args.time,
+                          args.iterations, args.workers, args.seed)
+    write_book(entries, args.book)
+    print(f"{searched} positions searched in {time.perf_counter() - start:.1f}s, "
+          f"{len(entries)} entries in '{args.book}'.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,232 @@
+# Perft: number of move sequences of a given length from the start position.
+#   python -m Tools.perft --game katarenga --layout default1 --depth 3 --backend both
+# Counting every leaf of the full move tree checks move generation (a wrong move
+# anywhere changes the total) and measures its speed. Isolation counts sequences of
+# placements. A won position has no moves, so games that end early add no leaves.
+# Two backends:
+#   reference  NetworkGameLogic.validate_move tried on every (from, to) pair and the
+#              board copied for each move, the way the games worked before the engine
+#   bitboard   GameState: movegen on incremental bitboards with make/unmake
+# perft_fixtures.json holds the counts for each default square of Board on all four
+# quadrants; --check compares a backend with them after any engine change.
+import argparse
+from array import array
+import json
+import os
+import sys
+import time
+
+from Board.Board import Board
+from Engine.movegen import ISOLATION
+from Engine.game_state import GameState, setup_board
+from Engine.layouts import load_squares, parse_layout, default_layout, build_board, parse_game, DATA_FILE, GAME_NAMES
+from Game_ui.move_rules import Moves_rules
+from Online.NetworkGameLogic import NetworkGameLogic
+
+FIXTURES_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "perft_fixtures.json")
+FIXTURE_DEPTHS = {"katarenga": 4, "congress": 4, "isolation": 3}
+BACKENDS = ("reference", "bitboard")
+
+
+def perft_state(state, depth, buffers=None):
+    # buffers: one move array per remaining depth, reused across the whole tree
+    if depth == 0:
+        return 1
+    if buffers is None:
+        buffers = [array('H') for _ in range(depth + 1)]
+    moves = state.packed_moves(buffers[depth])
+    if depth == 1:
+        return len(moves)
+
+    total = 0
+    for move in moves:
+        state.make(move)
+        total += perft_state(state, depth - 1, buffers)
+        state.unmake()
+    return total
+
+
+class ListMovesRules(Moves_rules):
+    # Moves_rules answering from the nested lists, the way the games checked moves before the engine
+
+    def verify_move(self, case_color, x_start, y_start, x_end, y_end):
+        return self.walk_move(case_color, x_start, y_start, x_end, y_end)
+
+
+class ReferencePerft:
+
+    def __init__(self, game_type):
+        self.game_type = game_type
+        self.logic = NetworkGameLogic()
+
+    def moves(self, board, player):
+        rules = ListMovesRules(board)
+        targets = [(row, col) for row in range(len(board)) for col in range(len(board[0]))]
+        if self.game_type == ISOLATION:
+            sources = [None]
+        else:
+            sources = [pos for pos in targets if board[pos[0]][pos[1]] % 10 == player]
+        return [(from_pos, to_pos) for from_pos in sources for to_pos in targets
+                if self.logic.validate_move(board, rules, self.game_type, player, from_pos, to_pos)]
+
+    def play(self, board, player, from_pos, to_pos):
+        new_board = [row[:] for row in board]
+        if from_pos is not None:
+            new_board[from_pos[0]][from_pos[1]] = board[from_pos[0]][from_pos[1]] // 10 * 10
+        new_board[to_pos[0]][to_pos[1]] = board[to_pos[0]][to_pos[1]] // 10 * 10 + player
+        return new_board
+
+    def count(self, board, player, depth, finished=False):
+        if depth == 0:
+            return 1
+        if finished:
+            return 0
+        moves = self.moves(board, player)
+        if depth == 1:
+            return len(moves)
+
+        total = 0
+        for from_pos, to_pos in moves:
+            new_board = self.play(board, player, from_pos, to_pos)
+            finished = bool(self.logic.check_victory(new_board, self.game_type, 3 - player))
+            total += self.count(new_board, 3 - player, depth - 1, finished)
+        return total
+
+
+def perft(backend, game_type, board, depth):
+    # Leaf count from the start position of board (tiles only)
+    start_board = setup_board(game_type, board)
+    if backend == "bitboard":
+        return perft_state(GameState(game_type, start_board), depth)
+    if backend == "reference":
+        return ReferencePerft(game_type).count(start_board, 1, depth)
+    raise ValueError(f"Unknown backend: {backend}")
+
+
+def divide(backend, game_type, board, depth):
+    # Leaf count below each root move, to find the move where two backends disagree
+    state = GameState(game_type, setup_board(game_type, board))
+    result = {}
+    for from_pos, to_pos in state.legal_moves():
+        state.make_move(from_pos, to_pos)
+        if backend == "bitboard":
+            result[(from_pos, to_pos)] = perft_state(state, depth - 1)
+        else:
+            count = ReferencePerft(game_type).count(state.board, state.current_player, depth - 1, bool(state.winner))
+            result[(from_pos, to_pos)] = count
+        state.unmake_move()
+    return result
+
+
+def timed_perft(backend, game_type, board, depth):
+    start = time.perf_counter()
+    nodes = perft(backend, game_type, board, depth)
+    return nodes, time.perf_counter() - start
+
+
+def fixture_cases():
+    # (game name, square name, board) for every default square of Board on the four quadrants
+    squares = Board().get_square_list()
+    for game_name, game_type in GAME_NAMES.items():
+        for square_name in squares:
+            yield game_name, square_name, build_board(game_type, parse_layout(square_name, squares))
+
+
+def load_fixtures(filename=FIXTURES_FILE):
+    with open(filename, "r") as f:
+        return json.load(f)
+
+
+def update_fixtures(filename=FIXTURES_FILE):
+    # Recomputes every count with both backends; refuses to write if they disagree
+    fixtures = {}
+    for game_name, square_name, board in fixture_cases():
+        game_type = GAME_NAMES[game_name]
+        counts = []
+        for depth in range(1, FIXTURE_DEPTHS[game_name] + 1):
+            reference = perft("reference", game_type, board, depth)
+            bitboard = perft("bitboard", game_type, board, depth)
+            if reference != bitboard:
+                raise RuntimeError(f"{game_name} {square_name} depth {depth}: "
+                                   f"reference {reference} != bitboard {bitboard}")
+            counts.append(reference)
+        fixtures.setdefault(game_name, {})[square_name] = counts
+        print(f"{game_name:<10} {square_name:<10} {counts}")
+
+    with open(filename, "w") as f:
+        json.dump(fixtures, f, indent=4)
+    print(f"Fixtures saved to '{filename}'.")
+
+
+def check_fixtures(backend="bitboard", filename=FIXTURES_FILE):
+    # True if backend reproduces every stored count
+    fixtures = load_fixtures(filename)
+    ok = True
+    for game_name, square_name, board in fixture_cases():
+        expected = fixtures.get(game_name, {}).get(square_name)
+        if expected is None:
+            print(f"{game_name:<10} {square_name:<10} no fixture")
+            continue
+        for depth, count in enumerate(expected, 1):
+            nodes, elapsed = timed_perft(backend, GAME_NAMES[game_name], board, depth)
+            status = "ok" if nodes == count else f"FAILED (expected {count})"
+            ok = ok and nodes == count
+            print(f"{game_name:<10} {square_name:<10} depth {depth}: {nodes:>10} {status}  {nodes / elapsed if elapsed > 0 else 0:,.0f} nodes/s")
+    return ok
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Count move sequences to check and time move generation.")
+    parser.add_argument("--game", default="katarenga", help="katarenga, congress or isolation")
+    parser.add_argument("--layout", default=None,
+                        help="four square names (top left, top right, bottom left, bottom right) or one")
+    parser.add_argument("--data", default=DATA_FILE, help="file holding the squares")
+    parser.add_argument("--depth", type=int, default=3)
+    parser.add_argument("--backend", choices=BACKENDS + ("both",), default="bitboard")
+    parser.add_argument("--divide", action="store_true", help="leaf count below each root move")
+    parser.add_argument("--check", action="store_true", help="compare the backend with the stored fixtures")
+    parser.add_argument("--update-fixtures", action="store_true", help="recompute the fixtures with both backends")
+    args = parser.parse_args(argv)
+
+    if args.update_fixtures:
+        update_fixtures()
+        return 0
+    if args.check:
+        return 0 if check_fixtures("bitboard" if args.backend == "both" else args.backend) else 1
+
+    try:
+        game_type = parse_game(args.game)
+        squares = load_squares(args.data)
+        board = build_board(game_type, parse_layout(args.layout or default_layout(squares), squares))
+    except ValueError as e:
+        parser.error(str(e))
+
+    backends = BACKENDS if args.backend == "both" else (args.backend,)
+    if args.divide:
+        results = [divide(backend, game_type, board, args.depth) for backend in backends]
+        for move in results[0]:
+            counts = [result[move] for result in results]
+            mark = "" if len(set(counts)) == 1 else "  <- differs"
+            print(f"{move}: {' '.join(str(count) for count in counts)}{mark}")
+        return 0
+
+    counts = {}
+    for backend in backends:
+        for depth in range(1, args.depth + 1):
+            nodes, elapsed = timed_perft(backend, game_type, board, depth)
+            rate = nodes / elapsed if elapsed > 0 else 0
+            print(f"{backend:<10} depth {depth}: {nodes:>12} nodes  {elapsed:8.3f}s  {rate:12,.0f} nodes/s")
+            counts[backend, depth] = (nodes, elapsed)
+
+    if len(backends) == 2:
+        nodes_ref, time_ref = counts["reference", args.depth]
+        nodes_bb, time_bb = counts["bitboard", args.depth]
+        if nodes_ref != nodes_bb:
+            print(f"MISMATCH at depth {args.depth}: reference {nodes_ref}, bitboard {nodes_bb}")
+            return 1
+        print(f"counts agree, bitboard {time_ref / time_bb if time_bb else 0:.1f}x faster")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,114 @@
+# Forced wins in Katarenga with proof-number search (AI.proof_search): analysis and puzzles.
+#   python -m Tools.proof --p1 "1,2 1,7 5,5" --p2 "8,2 6,6" --turn 1
+#   python -m Tools.proof --puzzles 10 --games 40 --out puzzles.jsonl
+# The first form proves or refutes a forced win for the side to move and prints the
+# winning line. The second looks for puzzles in self-play games (Tools.tournament.play_game):
+# every position where the side to move has a proven forced win of at least --min-plies
+# plies is one, and each goes to --out as a JSON line (pawns of each side, side to move,
+# solution line).
+import argparse
+import json
+import sys
+import time
+
+from AI.proof_search import ProofSearch, PROVEN, DISPROVEN, DEFAULT_MAX_NODES, DEFAULT_MAX_PLIES
+from Engine.layouts import load_squares, parse_layout, default_layout, assemble, game_board, DATA_FILE
+from Engine.movegen import KATARENGA
+from Tools.tablebase import parse_squares, place_pawns
+from Tools.tournament import play_game, game_seed
+
+RESULT_TEXT = {PROVEN: "forced win", DISPROVEN: "no forced win"}
+DEFAULT_PLAYER = "alphabeta:easy"
+
+
+def analyze(board, player, max_nodes=DEFAULT_MAX_NODES, max_plies=DEFAULT_MAX_PLIES):
+    # (result, line as coords, search statistics) for the side to move
+    prover = ProofSearch(max_nodes, max_plies)
+    result, _ = prover.prove(board, player)
+    return result, prover.principal_line(), prover.last_stats
+
+
+def pawns(board, owner):
+    return [(row, col) for row, values in enumerate(board) for col, value in enumerate(values) if value % 10 == owner]
+
+
+def find_puzzles(board, count, games, min_plies=3, player=DEFAULT_PLAYER, seed=0, max_nodes=20000,
+                 max_plies=DEFAULT_MAX_PLIES):
+    # Up to count puzzles from the positions of games self-play games: the longest
+    # proven line of each game, one per game to keep them varied
+    puzzles = []
+    seen = set()
+    for index in range(games):
+        positions = []
+        play_game(KATARENGA, board, (player, player), game_seed(seed, index), random_plies=4, positions=positions)
+        best = None
+        for snapshot, to_move in positions:
+            if (snapshot, to_move) in seen:
+                continue
+            seen.add((snapshot, to_move))
+            position = snapshot.to_lists()
+            result, line, stats = analyze(position, to_move, max_nodes, max_plies)
+            if result == PROVEN and len(line) >= min_plies and (best is None or len(line) > len(best["solution"])):
+                best = {"p1": pawns(position, 1), "p2": pawns(position, 2), "turn": to_move,
+                        "solution": line, "nodes": stats["nodes"]}
+        if best is not None:
+            puzzles.append(best)
+            print(f"Game {index}: player {best['turn']} wins in {len(best['solution'])} plies", flush=True)
+        if len(puzzles) >= count:
+            break
+    return puzzles
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Prove forced Katarenga wins, or collect puzzles from self-play.")
+    parser.add_argument("--layout", default=None,
+                        help="four square names (top left, top right, bottom left, bottom right) or one")
+    parser.add_argument("--data", default=DATA_FILE, help="file holding the squares")
+    parser.add_argument("--p1", default="", help="player 1 pawns, as \"row,col row,col\" on the 10x10 board")
+    parser.add_argument("--p2", default="", help="player 2 pawns")
+    parser.add_argument("--turn", type=int, default=1, help="player to move")
+    parser.add_argument("--nodes", type=int, default=DEFAULT_MAX_NODES, help="node budget of one proof")
+    parser.add_argument("--max-plies", type=int, default=DEFAULT_MAX_PLIES, help="longest forced win looked for")
+    parser.add_argument("--puzzles", type=int, default=0, help="collect this many puzzles instead")
+    parser.add_argument("--games", type=int, default=20, help="self-play games searched for puzzles")
+    parser.add_argument("--min-plies", type=int, default=3, help="shortest solution of a puzzle")
+    parser.add_argument("--player", default=DEFAULT_PLAYER, help="self-play player spec")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--out", default=None, help="JSON lines file for the puzzles")
+    args = parser.parse_args(argv)
+
+    if args.turn not in (1, 2):
+        parser.error("--turn must be 1 or 2")
+    try:
+        squares = load_squares(args.data)
+        spec = args.layout or default_layout(squares)
+        board = game_board(KATARENGA, assemble(parse_layout(spec, squares)))
+        if not args.puzzles:
+            position = place_pawns(board, parse_squares(args.p1), parse_squares(args.p2))
+    except ValueError as e:
+        parser.error(str(e))
+
+    start = time.perf_counter()
+    if args.puzzles:
+        puzzles = find_puzzles(board, args.puzzles, args.games, args.min_plies, args.player, args.seed,
+                               args.nodes, args.max_plies)
+        if args.out:
+            with open(args.out, "a", encoding="utf-8") as f:
+                for puzzle in puzzles:
+                    f.write(json.dumps(puzzle) + "\n")
+        print(f"{len(puzzles)} puzzles found in {time.perf_counter() - start:.1f}s"
+              + (f", added to '{args.out}'." if args.out else "."))
+        return 0
+
+    result, line, stats = analyze(position, args.turn, args.nodes, args.max_plies)
+    print(f"Player {args.turn} to move: {RESULT_TEXT.get(result, 'unknown within the node budget')}"
+          + (f" in {len(line)} plies" if result == PROVEN else "")
+          + (f" within {args.max_plies} plies" if result == DISPROVEN else "")
+          + f" ({stats['nodes']} nodes, {stats['time']:.2f}s)")
+    for ply, (from_pos, to_pos) in enumerate(line):
+        print(f"  {ply + 1}. player {args.turn if ply % 2 == 0 else 3 - args.turn}: {from_pos} -> {to_pos}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
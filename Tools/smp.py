@@ -0,0 +1,147 @@
+# Lazy SMP search of KatarengaAI on one position, and how it scales with the number of workers.
+#   python -m Tools.smp --workers 8 --time 10 --p1 "1,2 1,7 5,5" --p2 "8,2 6,6" --turn 1
+#   python -m Tools.smp --bench --workers 8 --depth 6 --positions 6
+# The first form searches a position (the starting one when no pawns are given) on --workers
+# processes for --time seconds and prints the move, the depth reached and the speed.
+# The second takes positions from a self-play game (Tools.tournament.play_game) and searches
+# each to --depth with 1, 2, ... --workers workers, a cleared table every time. It prints,
+# per worker count, the time to reach the depth, the nodes searched by all processes, the
+# speedup over one worker and how often the move matched the one-worker move. Lazy SMP
+# gains through the shared table, so the time to depth is the figure that counts; worker
+# counts above the number of cores only show the overhead.
+# Both use the expert level without its proof-number search, which stays single-process.
+import argparse
+import os
+import sys
+import time
+
+from AI.katarenga_ai import KatarengaAI, SearchBoard
+from Engine.game_state import GameState
+from Engine.layouts import load_squares, parse_layout, default_layout, assemble, game_board, DATA_FILE
+from Engine.movegen import KATARENGA
+from Tools.tablebase import parse_squares, place_pawns
+from Tools.tournament import play_game, game_seed
+
+LEVEL = "expert"
+MAX_NODES = 10 ** 9  # searches end at the time or depth given, not at the level's node budget
+DEFAULT_PLAYER = "alphabeta:easy"
+
+
+def make_ai(workers, time_limit=None, depth=None, table_size=1 << 16):
+    ai = KatarengaAI(LEVEL, time_limit, table_size=table_size, workers=workers)
+    ai.proof_nodes = 0
+    ai.max_nodes = MAX_NODES
+    if depth is not None:
+        ai.max_depth = depth
+    return ai
+
+
+def timed_search(ai, board, player):
+    # (move, seconds, search statistics)
+    start = time.perf_counter()
+    move = ai.choose_move(board, player)
+    return move, time.perf_counter() - start, ai.last_stats
+
+
+def bench_positions(board, count, seed=0, player=DEFAULT_PLAYER):
+    # count positions spread over self-play games, each with moves for the side to move
+    positions = []
+    index = 0
+    while len(positions) < count and index < 10 * count:
+        game = []
+        play_game(KATARENGA, board, (player, player), game_seed(seed, index), random_plies=4, positions=game)
+        game = [(snapshot.to_lists(), to_move) for snapshot, to_move in game[4:]]
+        game = [(position, to_move) for position, to_move in game if SearchBoard(position, to_move).generate_moves()]
+        step = max(1, len(game) // count)
+        positions.extend(game[::step][:count - len(positions)])
+        index += 1
+    return positions
+
+
+def benchmark(positions, max_workers, depth, table_size=1 << 16):
+    # One row per worker count: workers, seconds, nodes, nodes/s, speedup, same moves
+    rows = []
+    reference = None
+    for workers in range(1, max_workers + 1):
+        ai = make_ai(workers, depth=depth, table_size=table_size)
+        try:
+            ai.max_depth = 1
+            timed_search(ai, *positions[0])  # starts the helper processes
+            ai.max_depth = depth
+            moves, seconds, nodes = [], 0.0, 0
+            for board, player in positions:
+                ai.table.clear()
+                move, elapsed, stats = timed_search(ai, board, player)
+                moves.append(move)
+                seconds += elapsed
+                nodes += stats["nodes"]
+        finally:
+            ai.close()
+        if reference is None:
+            reference = (seconds, moves)
+        rows.append({"workers": workers, "time": seconds, "nodes": nodes,
+                     "nps": int(nodes / seconds) if seconds > 0 else 0,
+                     "speedup": reference[0] / seconds if seconds > 0 else 0.0,
+                     "same": sum(move == first for move, first in zip(moves, reference[1]))})
+        print(f"{workers:3d} workers  {seconds:8.2f}s  {nodes:10d} nodes  {rows[-1]['nps']:8d} nodes/s  "
+              f"speedup {rows[-1]['speedup']:5.2f}  same move {rows[-1]['same']}/{len(positions)}", flush=True)
+    return rows
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Lazy SMP Katarenga search on several processes.")
+    parser.add_argument("--layout", default=None,
+                        help="four square names (top left, top right, bottom left, bottom right) or one")
+    parser.add_argument("--data", default=DATA_FILE, help="file holding the squares")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="search processes")
+    parser.add_argument("--table", type=int, default=1 << 16, help="buckets of the shared table")
+    parser.add_argument("--p1", default="", help="player 1 pawns, as \"row,col row,col\" on the 10x10 board")
+    parser.add_argument("--p2", default="", help="player 2 pawns")
+    parser.add_argument("--turn", type=int, default=1, help="player to move")
+    parser.add_argument("--time", type=float, default=10.0, help="seconds of search on the position")
+    parser.add_argument("--bench", action="store_true", help="measure the scaling from 1 to --workers workers")
+    parser.add_argument("--depth", type=int, default=6, help="depth of the benchmark searches")
+    parser.add_argument("--positions", type=int, default=6, help="benchmark positions")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    if args.workers < 1:
+        parser.error("--workers must be at least 1")
+    if args.turn not in (1, 2):
+        parser.error("--turn must be 1 or 2")
+    try:
+        squares = load_squares(args.data)
+        spec = args.layout or default_layout(squares)
+        board = game_board(KATARENGA, assemble(parse_layout(spec, squares)))
+        if args.p1 or args.p2:
+            position = place_pawns(board, parse_squares(args.p1), parse_squares(args.p2))
+        else:
+            position = GameState.new_game(KATARENGA, board).board
+    except ValueError as e:
+        parser.error(str(e))
+
+    if args.bench:
+        positions = bench_positions(board, args.positions, args.seed)
+        print(f"{len(positions)} positions to depth {args.depth}, {os.cpu_count()} cores")
+        benchmark(positions, args.workers, args.depth, args.table)
+        return 0
+
+    ai = make_ai(args.workers, args.time, table_size=args.table)
+    try:
+        move, elapsed, stats = timed_search(ai, position, args.turn)
+        reply = ai.predicted_reply
+        used = len(ai.table)  # counted before close() frees the shared table
+    finally:
+        ai.close()
+    if move is None:
+        print(f"Player {args.turn} has no legal move.")
+        return 0
+    print(f"Player {args.turn} plays {move[0]} -> {move[1]}, score {stats['score']}"
+          + (f", expected reply {reply[0]} -> {reply[1]}" if reply else ""))
+    print(f"Depth {stats['depth']}, {stats['nodes']} nodes in {elapsed:.2f}s ({stats['nps']} nodes/s)"
+          + f" on {args.workers} workers, {used} of {stats['table']['capacity']} table entries used")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,309 @@
+# Builds the Katarenga endgame tablebase of a layout (Engine.tablebase), or looks up a position.
+#   python -m Tools.tablebase --layout default1,default2,default3,default4 --pawns 3
+#   python -m Tools.tablebase --layout default1,default2,default3,default4 --probe --p1 "8,3" --p2 "2,5 1,1"
+# Retrograde analysis, one material (pawns of each side) at a time from the smallest:
+# every position of the material and its moves are generated once with the engine's
+# move rules; a move that captures leads to a smaller material, already solved. Then
+# results spread backwards from the decided positions in order of distance: a position
+# with a move to a lost position is won one ply later, a position whose moves all lead
+# to won positions is lost one ply after the longest of them. What is left undecided
+# is a draw. Tables are built on the canonical orientation of the layout, so a mirrored
+# layout uses the same file.
+# Sizes: 3 pawns is about 630 000 positions and takes 30 to 45 seconds; every further
+# pawn multiplies that by about 30, so 4 pawns takes hours in pure Python.
+import argparse
+import os
+import sys
+import time
+from array import array
+from collections import defaultdict
+from itertools import combinations
+from math import comb
+
+from Engine.bitboard import BitboardRules, iter_bits
+from Engine.game_state import GameState
+from Engine.layouts import load_squares, parse_layout, default_layout, assemble, game_board, DATA_FILE
+from Engine.movegen import KATARENGA, destination_masks
+from Engine.symmetry import canonical_layout
+from Engine.tablebase import (Tablebase, write_tablebase, board_squares, material_size, tablebase_key,
+                              tablebase_path, TABLEBASE_DIR, UNKNOWN, WIN, LOSS, DRAW, RESULT_NAMES, SIZE)
+from Tools.layout_index import LayoutIndex
+
+DEFAULT_PAWNS = 3
+MAX_LINE = 200
+
+
+def canonical_board(board):
+    # 10x10 tiles of the canonical orientation of a board's layout
+    interior = [row[1:SIZE - 1] for row in board[1:SIZE - 1]]
+    canonical = canonical_layout([[value // 10 * 10 for value in row] for row in interior], KATARENGA)[0]
+    return game_board(KATARENGA, [list(row) for row in canonical])
+
+
+def materials(max_pawns):
+    # (n1, n2) with at least one pawn a side, smallest first
+    return [(n1, total - n1) for total in range(2, max_pawns + 1) for n1 in range(1, total)]
+
+
+class Generator:
+
+    def __init__(self, board):
+        # board: 10x10 tiles in the canonical orientation
+        self.tiles = [value for row in board for value in row]
+        self.squares = board_squares(board)
+        self.count = len(self.squares)
+        self.number = {sq: number for number, sq in enumerate(self.squares)}
+        self.bb = BitboardRules(board)
+        # binomial[k][n] = C(n, k), for ranking combinations without calls
+        self.binomial = [[comb(n, k) for n in range(self.count + 1)] for k in range(8)]
+        self.targets = [None, (0, SIZE - 1), (SIZE * (SIZE - 1), SIZE * SIZE - 1)]
+        self.tables = {}  # (n1, n2): array('I') of entries (result | distance << 2)
+
+    def rank(self, numbers):
+        binomial = self.binomial
+        return sum(binomial[position + 1][number] for position, number in enumerate(numbers))
+
+    def index(self, p1, p2, player):
+        return (self.rank(p1) * self.binomial[len(p2)][self.count] + self.rank(p2)) * 2 + player - 1
+
+    def place(self, numbers, owner):
+        for number in numbers:
+            sq = self.squares[number]
+            self.bb.set_cell(sq // SIZE, sq % SIZE, self.tiles[sq] + owner)
+
+    def solve(self, max_pawns):
+        for n1, n2 in materials(max_pawns):
+            start = time.perf_counter()
+            values = self.solve_material(n1, n2)
+            self.tables[n1, n2] = values
+            counts = defaultdict(int)
+            for value in values:
+                counts[value & 3] += 1
+            print(f"{n1} vs {n2}: {counts[WIN]} wins, {counts[LOSS]} losses, {counts[DRAW]} draws, "
+                  f"longest win {max(values) >> 2} plies, {time.perf_counter() - start:.1f}s", flush=True)
+        return self.tables
+
+    def solve_material(self, n1, n2):
+        size = material_size(n1, n2, self.count)
+        value = bytearray(size)             # UNKNOWN until the position is generated, then DRAW until decided
+        distance = array('H', bytes(2 * size))
+        remaining = array('H', bytes(2 * size))  # moves not yet known to lead to a won position
+        parents, children = array('I'), array('I')  # moves inside the material
+        edges = defaultdict(list)      # distance: (position, child lost) of moves to decided children
+        decided = defaultdict(list)    # distance: positions decided at that distance
+
+        for p1 in combinations(range(self.count), n1):
+            self.place(p1, 1)
+            for p2 in combinations(range(self.count), n2):
+                if set(p1) & set(p2):
+                    continue
+                self.place(p2, 2)
+                for player in (1, 2):
+                    index = self.index(p1, p2, player)
+                    self.expand(index, p1, p2, player, value, distance, remaining, parents, children,
+                                edges, decided)
+                self.place(p2, 0)
+            self.place(p1, 0)
+
+        # Predecessors of each position, grouped by child
+        first = array('I', bytes(4 * (size + 1)))
+        for child in children:
+            first[child + 1] += 1
+        for index in range(size):
+            first[index + 1] += first[index]
+        fill = array('I', first)
+        predecessors = array('I', bytes(4 * len(children)))
+        for parent, child in zip(parents, children):
+            predecessors[fill[child]] = parent
+            fill[child] += 1
+        del parents, children, fill
+
+        depth = 0
+        while edges or decided:
+            for parent, lost in edges.pop(depth, ()):
+                self.update(parent, lost, depth, value, distance, remaining, decided)
+            for child in decided.pop(depth, ()):
+                lost = value[child] == LOSS
+                for k in range(first[child], first[child + 1]):
+                    self.update(predecessors[k], lost, depth, value, distance, remaining, decided)
+            depth += 1
+
+        return array('I', (result | step << 2 for result, step in zip(value, distance)))
+
+    def expand(self, index, p1, p2, player, value, distance, remaining, parents, children, edges, decided):
+        # Decides the position if it is over or has a winning move, else records its moves
+        opponent = 3 - player
+        sides = (None, p1, p2)
+        numbers = self.number
+        owners = self.bb.owners
+        if all(owners[opponent] >> corner & 1 for corner in self.targets[opponent]):
+            value[index], distance[index] = LOSS, 0  # the last move won
+            decided[0].append(index)
+            return
+        if all(owners[player] >> corner & 1 for corner in self.targets[player]):
+            value[index], distance[index] = WIN, 0  # not reachable, kept consistent
+            decided[0].append(index)
+            return
+
+        moves = 0
+        targets = self.targets[player]
+        own_mask, other_mask = owners[player], owners[opponent]
+        wins = False
+        for from_sq, mask in destination_masks(self.bb, KATARENGA, player):
+            from_number = numbers[from_sq]
+            for to_sq in iter_bits(mask):
+                moves += 1
+                captured = other_mask >> to_sq & 1
+                if captured and len(sides[opponent]) == 1:
+                    wins = True
+                elif to_sq in targets and own_mask >> (targets[0] + targets[1] - to_sq) & 1:
+                    wins = True
+                if wins:
+                    break
+                to_number = numbers[to_sq]
+                mover = sorted(to_number if number == from_number else number for number in sides[player])
+                other = [number for number in sides[opponent] if number != to_number]
+                child_p1, child_p2 = (mover, other) if player == 1 else (other, mover)
+                child = self.index(child_p1, child_p2, opponent)
+                if captured:
+                    entry = self.tables[len(child_p1), len(child_p2)][child]
+                    if entry & 3 != DRAW:
+                        edges[entry >> 2].append((index, entry & 3 == LOSS))
+                else:
+                    parents.append(index)
+                    children.append(child)
+            if wins:
+                break
+
+        if wins:
+            value[index], distance[index] = WIN, 1
+            decided[1].append(index)
+        elif not moves:
+            value[index], distance[index] = LOSS, 0  # no legal move: the side to move loses
+            decided[0].append(index)
+        else:
+            value[index] = DRAW
+            remaining[index] = moves
+
+    @staticmethod
+    def update(parent, lost, depth, value, distance, remaining, decided):
+        # A move of parent leads to a position decided at depth, lost or won for its side to move
+        if value[parent] != DRAW:
+            return
+        if lost:
+            value[parent], distance[parent] = WIN, depth + 1
+            decided[depth + 1].append(parent)
+        else:
+            remaining[parent] -= 1
+            if not remaining[parent]:
+                value[parent], distance[parent] = LOSS, depth + 1
+                decided[depth + 1].append(parent)
+
+
+def build(board, max_pawns=DEFAULT_PAWNS, directory=TABLEBASE_DIR):
+    # Solves a 10x10 board's layout and writes its file; returns the file name
+    canonical = canonical_board(board)
+    tables = Generator(canonical).solve(max_pawns)
+    os.makedirs(directory, exist_ok=True)
+    filename = tablebase_path(canonical, directory)
+    write_tablebase(filename, tablebase_key(canonical)[0], max_pawns, tables)
+    return filename
+
+
+def parse_squares(text):
+    # "row,col row,col" -> [(row, col), ...]
+    try:
+        return [tuple(int(value) for value in item.split(",")) for item in text.split()]
+    except ValueError:
+        raise ValueError(f"Bad squares: {text!r} (expected \"row,col row,col\")")
+
+
+def best_line(tablebase, board, player):
+    # Moves of both sides by the table from a position, until the game ends
+    state = GameState(KATARENGA, [row[:] for row in board], player)
+    line = []
+    while not state.winner and len(line) < MAX_LINE:
+        best = tablebase.best_move(state.board, state.current_player, state.legal_moves())
+        if best is None:
+            break
+        line.append(best[0])
+        state.make_move(*best[0])
+    return line, state.winner
+
+
+def place_pawns(board, p1, p2):
+    # Copy of a board's tiles with pawns on the (row, col) squares of each side
+    position = [[value // 10 * 10 for value in row] for row in board]
+    for squares, owner in ((p1, 1), (p2, 2)):
+        for row, col in squares:
+            if not (0 <= row < len(position) and 0 <= col < len(position[0])) \
+                    or position[row][col] == 0 or position[row][col] % 10:
+                raise ValueError(f"Square {row},{col} can't hold a pawn")
+            position[row][col] += owner
+    return position
+
+
+def probe(tablebase, board, p1, p2, player):
+    position = place_pawns(board, p1, p2)
+    entry = tablebase.probe(position, player)
+    if entry is None or entry[0] == UNKNOWN:
+        raise ValueError(f"The tablebase only covers up to {tablebase.max_pawns} pawns, at least one a side")
+    result, steps = entry
+    print(f"Player {player} to move: {RESULT_NAMES[result]}" + (f" in {steps} plies" if result != DRAW else ""))
+    if result == DRAW:
+        return  # the table moves of a draw go on forever
+    line, winner = best_line(tablebase, position, player)
+    for ply, (from_pos, to_pos) in enumerate(line):
+        print(f"  {ply + 1}. player {player if ply % 2 == 0 else 3 - player}: {from_pos} -> {to_pos}")
+    if winner:
+        print(f"  player {winner} wins")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Build the Katarenga endgame tablebase of layouts or probe a position.")
+    parser.add_argument("--layout", default=None,
+                        help="four square names (top left, top right, bottom left, bottom right) or one")
+    parser.add_argument("--data", default=DATA_FILE, help="file holding the squares")
+    parser.add_argument("--index", default=None, help="build for the layouts of this index (Tools.layout_index)")
+    parser.add_argument("--sample", type=int, default=0, help="only N random layouts of the index")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--pawns", type=int, default=DEFAULT_PAWNS, help="largest total pawn count")
+    parser.add_argument("--dir", default=TABLEBASE_DIR, help="directory of the tablebase files")
+    parser.add_argument("--probe", action="store_true", help="look up a position instead of building")
+    parser.add_argument("--p1", default="", help="player 1 pawns for --probe, as \"row,col row,col\"")
+    parser.add_argument("--p2", default="", help="player 2 pawns for --probe")
+    parser.add_argument("--turn", type=int, default=1, help="player to move for --probe")
+    args = parser.parse_args(argv)
+
+    if not 2 <= args.pawns <= 6:
+        parser.error("--pawns must be between 2 and 6")
+    try:
+        if args.index and not args.probe:
+            index = LayoutIndex(args.index)
+            layouts = index.sample(args.sample, args.seed) if args.sample else index.select()
+            index.close()
+            boards = [game_board(KATARENGA, layout["board"]) for layout in layouts]
+        else:
+            squares = load_squares(args.data)
+            spec = args.layout or default_layout(squares)
+            boards = [game_board(KATARENGA, assemble(parse_layout(spec, squares)))]
+
+        if args.probe:
+            tablebase = Tablebase.open_for_board(boards[0], args.dir)
+            if tablebase is None:
+                parser.error(f"No tablebase for this layout in '{args.dir}'")
+            probe(tablebase, boards[0], parse_squares(args.p1), parse_squares(args.p2), args.turn)
+            return 0
+    except ValueError as e:
+        parser.error(str(e))
+
+    start = time.perf_counter()
+    for board in boards:
+        filename = build(board, args.pawns, args.dir)
+        print(f"'{filename}' written ({os.path.getsize(filename)} bytes)", flush=True)
+    print(f"{len(boards)} tablebases built in {time.perf_counter() - start:.1f}s.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
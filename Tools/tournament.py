@@ -0,0 +1,171 @@
+# Self-play tournament between two computer players, without a display.
+#   python -m Tools.tournament --game congress --players mcts:500 random --games 200
+# Games are spread over a process pool. Game i gets a seed derived from --seed and i,
+# and the players swap colors from one game to the next, so any single game can be
+# replayed exactly. Each result goes to the results file (one JSON line per game) as
+# soon as it finishes. The summary reports games/s, the average length and each
+# player's win rate with a 95% Wilson interval. The players evaluate with their hand-set
+# weights, or with the tuned ones of the file given with --weights (Tools.tune).
+import argparse
+import json
+import os
+import random
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from AI.players import make_player, as_move
+from Engine.balance_store import wilson_interval
+from Engine.batch_eval import load_weights
+from Engine.game_state import GameState
+from Engine.layouts import load_squares, parse_layout, default_layout, build_board, parse_game, DATA_FILE
+
+SEED_STRIDE = 1000003
+MAX_PLIES = 400  # longer games are scored as draws
+
+
+def game_seed(base_seed, index):
+    return random.Random(base_seed * SEED_STRIDE + index).getrandbits(32)
+
+
+def play_game(game_type, board, specs, seed, max_plies=MAX_PLIES, random_plies=0, positions=None, weights=None):
+    # One game between specs[0] (player 1) and specs[1] (player 2):
+    # (winner or 0 for a draw, plies, seconds)
+    # positions: list to which (FlatBoard snapshot, player to move) is added before every move
+    # weights: evaluation weights of both players (AI.players.make_player), None for hand-set ones
+    rng = random.Random(seed)
+    state = GameState.new_game(game_type, board)
+    players = {1: make_player(specs[0], game_type, rng.getrandbits(32), weights),
+               2: make_player(specs[1], game_type, rng.getrandbits(32), weights)}
+
+    start = time.perf_counter()
+    try:
+        while not state.winner and state.move_count < max_plies:
+            player = state.current_player
+            if positions is not None:
+                positions.append((state.snapshot(), player))
+            if state.move_count < random_plies:
+                moves = state.legal_moves()
+                move = rng.choice(moves) if moves else None
+            else:
+                move = players[player].choose_move(state.board, player)
+                move = None if move is None else as_move(game_type, move)
+            if move is None:
+                state.winner = 3 - player  # no legal move: the side to move loses
+                break
+            state.make_move(*move)
+    finally:
+        for ai in players.values():
+            if hasattr(ai, "close"):
+                ai.close()
+    return state.winner, state.move_count, time.perf_counter() - start
+
+
+def _run_game(index, game_type, board, players, base_seed, max_plies, random_plies, weights):
+    # Pool entry point: players swap colors on odd games
+    seed = game_seed(base_seed, index)
+    specs = players if index % 2 == 0 else players[::-1]
+    winner, plies, elapsed = play_game(game_type, board, specs, seed, max_plies, random_plies, weights=weights)
+    return {
+        "game": index,
+        "seed": seed,
+        "p1": specs[0],
+        "p2": specs[1],
+        "winner": specs[winner - 1] if winner else None,
+        "plies": plies,
+        "time": round(elapsed, 4),
+    }
+
+
+class Tally:
+
+    def __init__(self, players):
+        self.players = players
+        self.wins = {spec: 0 for spec in players}
+        self.draws = 0
+        self.games = 0
+        self.plies = 0
+
+    def add(self, result):
+        self.games += 1
+        self.plies += result["plies"]
+        if result["winner"] is None:
+            self.draws += 1
+        else:
+            self.wins[result["winner"]] += 1
+
+    def summary(self, elapsed):
+        lines = [f"{self.games} games in {elapsed:.1f}s ({self.games / elapsed if elapsed else 0:.2f} games/s), "
+                 f"average length {self.plies / self.games if self.games else 0:.1f} plies, {self.draws} draws"]
+        for spec in self.players:
+            low, high = wilson_interval(self.wins[spec], self.games)
+            rate = self.wins[spec] / self.games if self.games else 0.0
+            lines.append(f"  {spec:<20} wins {self.wins[spec]:>5}  {rate:6.1%}  [95% CI {low:6.1%} - {high:6.1%}]")
+        return "\n".join(lines)
+
+
+def run_tournament(game_type, board, players, games, seed=0, workers=None, output=None,
+                   max_plies=MAX_PLIES, random_plies=0, progress_every=0, weights=None):
+    tally = Tally(players)
+    start = time.perf_counter()
+    results_file = open(output, "w") if output else None
+    try:
+        with ProcessPoolExecutor(max_workers=workers or os.cpu_count() or 1) as executor:
+            futures = [executor.submit(_run_game, index, game_type, board, players, seed, max_plies, random_plies,
+                                       weights) for index in range(games)]
+            for future in as_completed(futures):
+                result = future.result()
+                tally.add(result)
+                if results_file:
+                    results_file.write(json.dumps(result, separators=(",", ":")) + "\n")
+                    results_file.flush()
+                if progress_every and tally.games % progress_every == 0:
+                    print(tally.summary(time.perf_counter() - start), flush=True)
+    finally:
+        if results_file:
+            results_file.close()
+    return tally, time.perf_counter() - start
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Play computer players against each other without a display.")
+    parser.add_argument("--game", required=True, help="katarenga, congress or isolation")
+    parser.add_argument("--players", nargs=2, required=True, metavar="SPEC",
+                        help="random, alphabeta[:level], mcts[:iterations] or solver[:threshold]")
+    parser.add_argument("--games", type=int, default=100)
+    parser.add_argument("--layout", default=None,
+                        help="four square names (top left, top right, bottom left, bottom right) or one")
+    parser.add_argument("--data", default=DATA_FILE, help="file holding the squares")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--output", default=None, help="results file, one JSON line per game")
+    parser.add_argument("--max-plies", type=int, default=MAX_PLIES)
+    parser.add_argument("--random-plies", type=int, default=0, help="random opening moves, to vary the games")
+    parser.add_argument("--progress", type=int, default=0, help="print the standings every N games")
+    parser.add_argument("--weights", default=None, help="tuned evaluation weights file (default: hand-set ones)")
+    args = parser.parse_args(argv)
+
+    try:
+        game_type = parse_game(args.game)
+        squares = load_squares(args.data)
+        board = build_board(game_type, parse_layout(args.layout or default_layout(squares), squares))
+        for spec in args.players:
+            make_player(spec, game_type)
+        weights = None
+        if args.weights:
+            if not os.path.exists(args.weights):
+                raise ValueError(f"No weights file '{args.weights}'")
+            weights = load_weights(args.weights).get(game_type)
+    except ValueError as e:
+        parser.error(str(e))
+    if args.players[0] == args.players[1]:
+        parser.error("the two players need different specs")
+
+    tally, elapsed = run_tournament(game_type, board, args.players, args.games, args.seed, args.workers,
+                                    args.output, args.max_plies, args.random_plies, args.progress, weights)
+    print(tally.summary(elapsed))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
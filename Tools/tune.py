@@ -0,0 +1,237 @@
+# Tunes the evaluation weights of Engine.batch_eval from self-play (Texel tuning).
+#   python -m Tools.tune --game katarenga --games 200
+#   python -m Tools.tune --game all --index layout_index.db --sample 20 --games 40
+#   python -m Tools.tune --game congress --games 0         refit on the stored positions only
+# Self-play games (Tools.tournament.play_game, the players of Tools.balance) run on a
+# process pool. Every position after the random opening plies is labelled with the
+# result of its game for the side to move (1 win, 0.5 draw, 0 loss); its features
+# (Engine.batch_eval.feature_matrix) and label are added to training/<mode>.npz, so the
+# data of several runs adds up. The self-play players evaluate with the weights of the
+# --weights file, so a run only depends on its seed and that file. The weights are then
+# fitted to the stored positions by logistic regression: evaluation / SCALE is taken as
+# the log-odds of winning. Newton steps on features divided by their spread, with a small
+# L2 penalty, converge in a few iterations whatever the feature ranges. The newest
+# HOLDOUT share of the positions is left out of the fit, and the result only goes to
+# eval_weights.json under a new revision (Engine.batch_eval.write_weights), which the
+# AIs load when created, if there are --min-positions positions and the fitted weights
+# predict the held-out ones better than the current weights.
+import argparse
+import math
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from Engine.batch_eval import (feature_matrix, write_weights, load_weights, FEATURES, DEFAULT_WEIGHTS,
+                               WEIGHTS_FILE, MODE_NAMES, NUMPY_AVAILABLE)
+from Engine.layouts import load_squares, parse_layout, default_layout, assemble, game_board, DATA_FILE, GAME_NAMES
+from Engine.symmetry import layout_orientations
+from Tools.balance import DEFAULT_PLAYERS
+from Tools.layout_index import LayoutIndex
+from Tools.tournament import play_game, game_seed, MAX_PLIES
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+DATA_DIR = "training"
+SCALE = 400.0  # evaluation points per unit of log-odds
+DEFAULT_RANDOM_PLIES = 4
+L2 = 1e-4
+MAX_STEPS = 50
+MIN_POSITIONS = 2000
+HOLDOUT = 0.2  # newest positions, mostly whole games, kept to check the fit
+MIN_GAIN = 1e-4  # held-out log loss the new weights must save to be written
+
+
+def _play(game_type, board, player, seed, max_plies, random_plies, weights):
+    # Pool entry point: [(board bytes, player to move, result for that player)] of one self-play game,
+    # the positions as FlatBoard.to_bytes() (one byte per cell) to keep the transfer small
+    positions = []
+    winner, _, _ = play_game(game_type, game_board(game_type, board), (player, player), seed,
+                             max_plies, random_plies, positions, weights)
+    labelled = []
+    for position, to_move in positions[random_plies:]:
+        result = 0.5 if not winner else float(winner == to_move)
+        labelled.append((position.to_bytes(), to_move, result))
+    return labelled
+
+
+def data_path(game_type, directory=DATA_DIR):
+    return os.path.join(directory, MODE_NAMES[game_type] + ".npz")
+
+
+def load_data(game_type, directory=DATA_DIR):
+    # (features, results, games played) stored for a game mode
+    path = data_path(game_type, directory)
+    if not os.path.exists(path):
+        return np.zeros((0, len(FEATURES[game_type]))), np.zeros(0), 0
+    with np.load(path) as data:
+        features, results, games = data["features"], data["results"], int(data["games"])
+    if features.shape[1] != len(FEATURES[game_type]):
+        raise ValueError(f"'{path}' holds other features, remove it to start again")
+    return features, results, games
+
+
+def save_data(game_type, features, results, games, directory=DATA_DIR):
+    os.makedirs(directory, exist_ok=True)
+    path = data_path(game_type, directory)
+    temp = path + ".tmp.npz"
+    np.savez_compressed(temp, features=features.astype(np.float32), results=results.astype(np.float32),
+                        games=np.array(games))
+    os.replace(temp, path)
+
+
+def generate(game_type, layouts, games, first_game, player, seed=0, workers=None, max_plies=MAX_PLIES,
+             random_plies=DEFAULT_RANDOM_PLIES, weights=None):
+    # (features, results) of games new self-play games spread over the layouts,
+    # the players evaluating with weights (their hand-set evaluation when None)
+    boards, players, results = [], [], []
+    with ProcessPoolExecutor(max_workers=workers or os.cpu_count() or 1) as executor:
+        futures = []
+        for index in range(first_game, first_game + games):
+            board = layouts[index % len(layouts)]
+            futures.append(executor.submit(_play, game_type, board, player, game_seed(seed, index), max_plies,
+                                           random_plies, weights))
+        for done, future in enumerate(as_completed(futures), 1):
+            for position, to_move, result in future.result():
+                boards.append(position)
+                players.append(to_move)
+                results.append(result)
+            if done % 10 == 0 or done == games:
+                print(f"{MODE_NAMES[game_type]}: {done}/{games} games, {len(results)} positions", flush=True)
+    if not boards:
+        return np.zeros((0, len(FEATURES[game_type]))), np.zeros(0)
+    board = game_board(game_type, layouts[0])
+    stacked = np.frombuffer(b"".join(boards), dtype=np.uint8).reshape(-1, len(board), len(board[0]))
+    return feature_matrix(stacked.astype(np.int16), game_type, np.asarray(players)), np.asarray(results)
+
+
+def log_loss(features, results, weights, scale=SCALE):
+    # Mean cross-entropy of the win probabilities sigmoid(features @ weights / scale)
+    logits = features @ np.asarray(weights, dtype=np.float64) / scale
+    # log(1 + e^-x) for a win, log(1 + e^x) for a loss, both without overflow
+    return float(np.mean(results * np.logaddexp(0, -logits) + (1 - results) * np.logaddexp(0, logits)))
+
+
+def fit(features, results, start=None, scale=SCALE, l2=L2, max_steps=MAX_STEPS):
+    # Weights maximizing the likelihood of the results, by Newton's method; (weights, steps)
+    features = np.asarray(features, dtype=np.float64)
+    count, size = features.shape
+    spread = features.std(axis=0)
+    varies = spread > 0
+    spread[~varies] = 1.0
+    scaled = features / spread
+    weights = np.zeros(size) if start is None else np.asarray(start, dtype=np.float64) * spread / scale
+    weights[~varies] = 0.0
+
+    steps = 0
+    for steps in range(1, max_steps + 1):
+        probability = 1 / (1 + np.exp(-(scaled @ weights)))
+        gradient = scaled.T @ (probability - results) / count + l2 * weights
+        hessian = (scaled.T * (probability * (1 - probability))) @ scaled / count + l2 * np.eye(size)
+        step = np.linalg.solve(hessian, gradient)
+        weights -= step
+        if np.abs(step).max() < 1e-9:
+            break
+    return weights * scale / spread, steps
+
+
+def tune(game_type, features, results, weights_file=WEIGHTS_FILE, holdout=HOLDOUT):
+    # Weights of a mode fitted on all but the newest holdout share of the positions and the
+    # details written with them, or None when they predict those positions no better than
+    # the current weights
+    current = load_weights(weights_file).get(game_type, DEFAULT_WEIGHTS[game_type])
+    split = len(results) - max(1, int(len(results) * holdout))
+    weights, steps = fit(features[:split], results[:split], current)
+    before = log_loss(features[split:], results[split:], current)
+    after = log_loss(features[split:], results[split:], weights)
+    print(f"{MODE_NAMES[game_type]}: {split} positions fitted, {len(results) - split} held out, "
+          f"{steps} Newton steps, held-out log loss {before:.4f} -> {after:.4f}")
+    for name, value in zip(FEATURES[game_type], weights):
+        print(f"  {name:<16} {value:10.2f}")
+    if after > before - MIN_GAIN:
+        print(f"{MODE_NAMES[game_type]}: no better than the current weights, not written")
+        return None
+    return {"weights": [round(float(value), 4) for value in weights], "positions": split,
+            "held_out": len(results) - split, "log_loss": round(after, 6), "scale": SCALE}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Tune the evaluation weights from self-play games.")
+    parser.add_argument("--game", default="all", help="katarenga, congress, isolation or all")
+    parser.add_argument("--layout", default=None,
+                        help="four square names (top left, top right, bottom left, bottom right) or one")
+    parser.add_argument("--data", default=DATA_FILE, help="file holding the squares")
+    parser.add_argument("--index", default=None, help="play on the layouts of this index (Tools.layout_index)")
+    parser.add_argument("--sample", type=int, default=0, help="only N random layouts of the index")
+    parser.add_argument("--games", type=int, default=100, help="new self-play games per game mode")
+    parser.add_argument("--player", default=None, help="player spec for both sides (default depends on the mode)")
+    parser.add_argument("--dir", default=DATA_DIR, help="directory of the training positions")
+    parser.add_argument("--weights", default=WEIGHTS_FILE, help="weights file, updated in place")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--max-plies", type=int, default=MAX_PLIES)
+    parser.add_argument("--random-plies", type=int, default=DEFAULT_RANDOM_PLIES)
+    parser.add_argument("--min-positions", type=int, default=MIN_POSITIONS,
+                        help="stored positions needed before the weights are written")
+    args = parser.parse_args(argv)
+
+    if not NUMPY_AVAILABLE or np is None:
+        parser.error("NumPy is required to tune the evaluation")
+    try:
+        game_types = list(MODE_NAMES) if args.game == "all" else [GAME_NAMES[args.game]]
+    except KeyError:
+        parser.error(f"Unknown game mode: {args.game}")
+    try:
+        if args.index:
+            index = LayoutIndex(args.index)
+            entries = index.sample(args.sample, args.seed) if args.sample else index.select()
+            index.close()
+            layouts = [entry["board"] for entry in entries]
+        else:
+            squares = load_squares(args.data)
+            spec = args.layout or default_layout(squares)
+            layouts = [assemble(parse_layout(spec, squares))]
+    except ValueError as e:
+        parser.error(str(e))
+
+    start = time.perf_counter()
+    tuned = {}
+    for game_type in game_types:
+        try:
+            features, results, games = load_data(game_type, args.dir)
+        except ValueError as e:
+            parser.error(str(e))
+        if args.games > 0:
+            player = args.player or DEFAULT_PLAYERS[game_type]
+            # An index keeps one board per orbit of the eight orientations: play all the
+            # orientations that make different games in this mode (as Tools.balance does)
+            mode_layouts = [board for layout in layouts for board in layout_orientations(layout, game_type)] \
+                if args.index else layouts
+            new_features, new_results = generate(game_type, mode_layouts, args.games, games, player, args.seed,
+                                                 args.workers, args.max_plies, args.random_plies,
+                                                 load_weights(args.weights).get(game_type))
+            features = np.concatenate((features, new_features))
+            results = np.concatenate((results, new_results))
+            games += args.games
+            save_data(game_type, features, results, games, args.dir)
+        if len(results) < args.min_positions:
+            print(f"{MODE_NAMES[game_type]}: {len(results)} positions, {args.min_positions} needed to tune")
+            continue
+        if math.isclose(float(results.std()), 0.0):
+            print(f"{MODE_NAMES[game_type]}: not enough decided games to tune")
+            continue
+        mode = tune(game_type, features, results, args.weights)
+        if mode is not None:
+            tuned[game_type] = dict(mode, games=games)
+
+    if tuned:
+        revision = write_weights(tuned, args.weights)
+        print(f"Revision {revision} of '{args.weights}' written in {time.perf_counter() - start:.1f}s.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,130 @@
+import threading
+import time
+
+import pygame
+
+from Engine.layouts import play_move
+
+# Computer moves off the render loop: an AIJob runs ai.choose_move in a thread on its own
+# copy of the board and posts the answer as an AI_MOVE_EVENT (attributes job and move).
+# The game keeps drawing at its frame rate meanwhile and ignores events from jobs it
+# no longer waits for. cancel() asks the search to stop (the AIs check the stop event
+# while searching) and drops its answer.
+# min_time is how long the AI seems to think at least: a fast answer waits in the
+# worker thread for the rest of it, so the player sees their own move first.
+# A job started with released=False searches but only posts its answer once release()
+# is called: that is how a Ponderer searches during the player's turn. A job given
+# after= waits for that (cancelled) job's thread first, as both use the same AI.
+AI_MOVE_EVENT = pygame.USEREVENT + 1
+
+
+class AIJob:
+    def __init__(self, ai, board, player, min_time=0.0, released=True, after=None):
+        self.ai = ai
+        self.board = [row[:] for row in board]  # the game may change its board meanwhile
+        self.player = player
+        self.min_time = min_time
+        self.after = after
+        self.stop = threading.Event()
+        self.released = threading.Event()
+        self.move = None
+        self.done = False
+        self.start_time = None
+        self.release_time = None
+        self.search_time = None  # time spent in choose_move, once it returned
+        self.thread = threading.Thread(target=self._run, daemon=True)
+        if released:
+            self.release()
+
+    def start(self):
+        self.start_time = time.perf_counter()
+        self.thread.start()
+        return self
+
+    def _run(self):
+        if self.after is not None:
+            self.after.thread.join()
+        start = time.perf_counter()
+        try:
+            self.move = self.ai.choose_move(self.board, self.player, stop=self.stop)
+        except Exception as e:
+            print(f"AI error: {e}")
+            self.move = None
+        self.search_time = time.perf_counter() - start
+
+        # Wait to be released, then for the rest of the minimum time, unless cancelled meanwhile
+        self.released.wait()
+        self.stop.wait(max(0.0, self.min_time - (time.perf_counter() - self.release_time)))
+        self.done = True
+        if not self.stop.is_set():
+            pygame.event.post(pygame.event.Event(AI_MOVE_EVENT, job=self, move=self.move))
+
+    def release(self):
+        self.release_time = time.perf_counter()
+        self.released.set()
+
+    def cancel(self):
+        self.stop.set()
+        if not self.released.is_set():
+            self.release()  # wakes the thread up so it can end
+
+    @property
+    def cancelled(self):
+        return self.stop.is_set()
+
+
+class Ponderer:
+    # Thinking on the player's time: once the AI has moved, its answer to the reply it
+    # expects (ai.predicted_reply) is searched in the background. If the player makes
+    # that move, the search already under way becomes the AI's move (a ponder hit);
+    # otherwise it is cancelled. The AI's transposition table keeps what the search
+    # found either way.
+
+    def __init__(self, ai, min_time=0.0):
+        self.ai = ai
+        self.min_time = min_time
+        self.job = None
+        self.predicted = None
+        self.last_job = None  # last job run on the AI, so two searches never overlap
+
+        self.predictions = 0
+        self.hits = 0
+        self.time_saved = 0.0  # search time already done when a hit was released
+
+    def start(self, board, ai_player):
+        # board: position after the AI's move, with the player to move
+        self.cancel()
+        predicted = self.ai.predicted_reply
+        if predicted is None:
+            return
+        self.predicted = predicted
+        self.predictions += 1
+        self.job = AIJob(self.ai, play_move(board, predicted), ai_player, self.min_time,
+                         released=False, after=self.last_job).start()
+        self.last_job = self.job
+
+    def answer(self, played, board, ai_player):
+        # Job for the AI's answer once the player played played
+        job = self.job
+        if job is not None and played == self.predicted:
+            self.hits += 1
+            self.time_saved += job.search_time if job.search_time is not None else time.perf_counter() - job.start_time
+            self.job = None
+            job.release()
+            return job
+        self.cancel()
+        self.last_job = AIJob(self.ai, board, ai_player, self.min_time, after=self.last_job).start()
+        return self.last_job
+
+    def cancel(self):
+        if self.job is not None:
+            self.job.cancel()
+            self.job = None
+
+    def get_stats(self):
+        return {
+            "predictions": self.predictions,
+            "hits": self.hits,
+            "hit_rate": self.hits / self.predictions if self.predictions else 0.0,
+            "time_saved": self.time_saved,
+        }